@@ -0,0 +1,97 @@
+import os
+import logging
+import httpx
+from backboard import BackboardClient
+from backboard_resilience import ResilientBackboardClient
+
+logger = logging.getLogger(__name__)
+
+# One long-lived client per process so connections (and TLS sessions) are reused
+# across chat messages, deck/quiz generation and indexing runs.
+_client: ResilientBackboardClient | None = None
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def backboard_base_url() -> str:
+    return os.getenv("BACKBOARD_BASE_URL", "https://app.backboard.io/api")
+
+
+async def create_backboard_client(api_key: str) -> BackboardClient:
+    """
+    Builds a BackboardClient whose HTTP pool is sized from the environment:
+    - BACKBOARD_BASE_URL: API base url (point it at a local stand-in for offline runs)
+    - BACKBOARD_TIMEOUT_S: transport timeout (180); per-operation timeouts are
+      enforced by backboard_resilience
+    - BACKBOARD_MAX_CONNECTIONS: max open connections (20)
+    - BACKBOARD_MAX_KEEPALIVE: idle connections kept alive (10)
+    - BACKBOARD_KEEPALIVE_EXPIRY_S: how long an idle connection is kept (30)
+    """
+    timeout = _env_float("BACKBOARD_TIMEOUT_S", 180.0)
+    client = BackboardClient(
+        api_key=api_key, base_url=backboard_base_url(), timeout=timeout
+    )
+
+    limits = httpx.Limits(
+        max_connections=_env_int("BACKBOARD_MAX_CONNECTIONS", 20),
+        max_keepalive_connections=_env_int("BACKBOARD_MAX_KEEPALIVE", 10),
+        keepalive_expiry=_env_float("BACKBOARD_KEEPALIVE_EXPIRY_S", 30.0),
+    )
+    # The SDK does not expose pool limits; swap its (still unused) httpx client
+    # for one with the same headers and timeout but our limits. _client is
+    # private, hence the exact SDK pin in requirements.txt.
+    default_http = getattr(client, "_client", None)
+    if not isinstance(default_http, httpx.AsyncClient):
+        raise RuntimeError(
+            "backboard-sdk no longer keeps its httpx client in BackboardClient._client; "
+            "update create_backboard_client for this SDK version"
+        )
+    client._client = httpx.AsyncClient(
+        headers=default_http.headers,
+        timeout=default_http.timeout,
+        limits=limits,
+    )
+    await default_http.aclose()
+    return client
+
+
+async def get_backboard_client(api_key: str) -> ResilientBackboardClient:
+    """
+    Returns the process-wide client, creating it on first use (worker processes
+    and scripts never run the API startup hook). Every call goes through the
+    timeout/retry/circuit-breaker policies in backboard_resilience.
+    """
+    global _client
+    if _client is None:
+        client = await create_backboard_client(api_key)
+        if _client is None:
+            _client = ResilientBackboardClient(client)
+        else:
+            # another caller finished creating it while we awaited
+            await client.aclose()
+    return _client
+
+
+async def start_backboard_client(api_key: str | None):
+    if api_key:
+        await get_backboard_client(api_key)
+        logger.info("Backboard client ready (%s)", backboard_base_url())
+
+
+async def close_backboard_client():
+    global _client
+    client, _client = _client, None
+    if client is not None:
+        await client.aclose()
@@ -1,10 +1,28 @@
 import os
+import time
+import random
+import asyncio
 import hashlib
 import logging
 from datetime import datetime
 from pdf_splitter import split_pdf_to_max_size, MAX_BYTES
+from backboard_resilience import is_upstream_failure
 
-logger = logging.getLogger("uvicorn.error")
+logger = logging.getLogger(__name__)
+
+# Statuses after which a Backboard document will not change any more.
+TERMINAL_DOCUMENT_STATUSES = {"indexed", "failed", "error"}
+
+# How long a non-terminal status is trusted before asking Backboard again.
+DOCUMENT_STATUS_TTL_S = float(os.getenv("BACKBOARD_DOCUMENT_STATUS_TTL_S", "5"))
+
+# Shared thread poller: backs off from the min to the max interval while idle.
+WATCH_MIN_INTERVAL_S = float(os.getenv("BACKBOARD_WATCH_MIN_INTERVAL_S", "2"))
+WATCH_MAX_INTERVAL_S = float(os.getenv("BACKBOARD_WATCH_MAX_INTERVAL_S", "30"))
+
+# document_id -> (status, checked_at monotonic); entries are dropped together
+# with their indexed_documents rows (forget_document_statuses)
+_document_status_cache: dict[str, tuple[str, float]] = {}
 
 def sha256_file(path: str, chunk_size: int = 1024 * 1024) -> str:
     h = hashlib.sha256()
@@ -16,6 +34,209 @@ def sha256_file(path: str, chunk_size: int = 1024 * 1024) -> str:
             h.update(b)
     return h.hexdigest()
 
+def normalize_document_status(status):
+    if status is None:
+        return None
+    value = getattr(status, "value", None)
+    if value:
+        return str(value).lower()
+    return str(status).lower()
+
+
+def remember_document_status(document_id: str, status: str | None):
+    if status:
+        _document_status_cache[document_id] = (status, time.monotonic())
+
+
+def cached_document_status(document_id: str) -> str | None:
+    """
+    Returns the locally known status of a document, or None when it must be re-fetched.
+    Terminal statuses never expire; in-progress ones are trusted for DOCUMENT_STATUS_TTL_S.
+    """
+    entry = _document_status_cache.get(document_id)
+    if entry is None:
+        return None
+    status, checked_at = entry
+    if status in TERMINAL_DOCUMENT_STATUSES:
+        return status
+    if time.monotonic() - checked_at <= DOCUMENT_STATUS_TTL_S:
+        return status
+    return None
+
+
+def forget_document_statuses(document_ids):
+    """Drops cached statuses of documents whose indexed_documents rows are deleted."""
+    for document_id in document_ids:
+        _document_status_cache.pop(document_id, None)
+
+
+def get_file_document_ids(cursor, projectid: str, file_ids) -> tuple[list[str], list[str]]:
+    """
+    Maps project fileids to their Backboard document ids.
+    Returns (document_ids, fileids_without_documents); files indexed before document
+    ids were recorded end up in the second list.
+    """
+    file_ids = list(dict.fromkeys(file_ids or []))
+    if not file_ids:
+        return [], []
+    placeholders = ",".join(["?"] * len(file_ids))
+    cursor.execute(f"""
+        SELECT fileid, document_id
+        FROM indexed_documents
+        WHERE projectid = ? AND fileid IN ({placeholders})
+    """, (projectid, *file_ids))
+    document_ids = []
+    seen_files = set()
+    for fileid, document_id in cursor.fetchall():
+        seen_files.add(fileid)
+        document_ids.append(document_id)
+    return document_ids, [f for f in file_ids if f not in seen_files]
+
+
+def _evaluate_readiness(statuses: dict):
+    """
+    Returns (decided, ready) for a {document_id: status} map.
+    A wanted document absent from a completed listing is "missing".
+    """
+    if "missing" in statuses.values():
+        return True, False
+    if statuses and all(
+        status in TERMINAL_DOCUMENT_STATUSES for status in statuses.values()
+    ):
+        return True, True
+    return False, False
+
+
+class ThreadStatusWatcher:
+    """
+    Polls list_thread_documents for one thread on behalf of every waiter.
+    Polling backs off exponentially (with jitter) while nothing changes, resets to
+    the minimum interval when a status changes, and stops when the last waiter leaves.
+    """
+
+    def __init__(self, client, thread_id: str):
+        self.client = client
+        self.thread_id = thread_id
+        self.statuses: dict[str, str] = {}
+        self.listed = False
+        self.polls = 0
+        self._waiters = 0
+        self._task = None
+        self._changed = asyncio.Event()
+
+    def _notify(self):
+        # wake current waiters and hand future ones a fresh event
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def _poll_once(self) -> bool:
+        try:
+            docs = await self.client.list_thread_documents(self.thread_id)
+        except Exception as e:
+            logger.warning("Thread status poll failed for %s: %s", self.thread_id, e)
+            return False
+        self.polls += 1
+        listed = {}
+        for doc in docs:
+            document_id = str(doc.document_id)
+            status = normalize_document_status(getattr(doc, "status", None))
+            remember_document_status(document_id, status)
+            listed[document_id] = status
+        changed = not self.listed or listed != self.statuses
+        self.statuses = listed
+        self.listed = True
+        return changed
+
+    async def _run(self):
+        interval = WATCH_MIN_INTERVAL_S
+        try:
+            while self._waiters:
+                changed = await self._poll_once()
+                self._notify()
+                if changed:
+                    interval = WATCH_MIN_INTERVAL_S
+                else:
+                    interval = min(WATCH_MAX_INTERVAL_S, interval * 2)
+                await asyncio.sleep(interval * random.uniform(0.8, 1.2))
+        finally:
+            if _thread_watchers.get(self.thread_id) is self:
+                _thread_watchers.pop(self.thread_id, None)
+
+    def _statuses_for(self, wanted):
+        if not wanted:
+            return dict(self.statuses)
+        statuses = {}
+        for document_id in wanted:
+            status = cached_document_status(document_id)
+            if status is None and self.listed:
+                status = self.statuses.get(document_id, "missing")
+            statuses[document_id] = status
+        return statuses
+
+    async def wait(self, document_ids=None, timeout_s: float = 900):
+        wanted = list(dict.fromkeys(document_ids or []))
+        deadline = time.monotonic() + timeout_s
+
+        # answer straight from the status cache when possible
+        if wanted:
+            statuses = {d: cached_document_status(d) for d in wanted}
+            decided, ready = _evaluate_readiness(statuses)
+            if decided:
+                return ready, statuses
+
+        self._waiters += 1
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        try:
+            while True:
+                changed = self._changed
+                if self.listed:
+                    statuses = self._statuses_for(wanted)
+                    decided, ready = _evaluate_readiness(statuses)
+                    if decided:
+                        return ready, statuses
+                else:
+                    statuses = {}
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False, statuses
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._waiters -= 1
+            if self._waiters == 0 and self._task is not None:
+                self._task.cancel()
+                self._task = None
+                if _thread_watchers.get(self.thread_id) is self:
+                    _thread_watchers.pop(self.thread_id, None)
+
+
+# thread_id -> watcher shared by every generator waiting on that thread
+_thread_watchers: dict[str, ThreadStatusWatcher] = {}
+
+
+def get_thread_watcher(client, thread_id: str) -> ThreadStatusWatcher:
+    watcher = _thread_watchers.get(thread_id)
+    if watcher is None:
+        watcher = ThreadStatusWatcher(client, thread_id)
+        _thread_watchers[thread_id] = watcher
+    return watcher
+
+
+async def wait_for_documents_ready(client, thread_id: str, document_ids=None, timeout_s: int = 900):
+    """
+    Waits until the given Backboard documents are indexed (or failed).
+    Only the selected documents are tracked; with no document_ids the whole thread is.
+    Concurrent callers on the same thread share one poller.
+    Returns (ready, {document_id: status}). A document that is no longer listed in
+    the thread is reported as "missing" and stops the wait early.
+    """
+    watcher = get_thread_watcher(client, thread_id)
+    return await watcher.wait(document_ids, timeout_s=timeout_s)
+
+
 async def index_project_documents_impl(projectid: str, userid: str, cursor, conn, client_factory, get_memory, file_ids=None):
     """
     Returns dict payload for the endpoint.
@@ -67,26 +288,52 @@ async def index_project_documents_impl(projectid: str, userid: str, cursor, conn
                 continue
 
             size = os.path.getsize(abs_path)
+            uploaded = []
             if size <= MAX_BYTES:
-                await client.upload_document_to_thread(thread_id=thread_id, file_path=abs_path)
+                doc = await client.upload_document_to_thread(thread_id=thread_id, file_path=abs_path)
+                uploaded.append(doc)
                 uploaded_docs += 1
             else:
                 parts = split_pdf_to_max_size(abs_path, max_bytes=MAX_BYTES)
                 for part_path in parts:
-                    await client.upload_document_to_thread(thread_id=thread_id, file_path=part_path)
+                    doc = await client.upload_document_to_thread(thread_id=thread_id, file_path=part_path)
+                    uploaded.append(doc)
                     uploaded_split_docs += 1
                     try:
                         os.remove(part_path)
                     except Exception:
                         pass
 
+            now = datetime.utcnow().isoformat()
+            # a re-indexed file replaces the documents of its previous version
+            cursor.execute(
+                "SELECT document_id FROM indexed_documents WHERE projectid=? AND fileid=?",
+                (projectid, fileid),
+            )
+            forget_document_statuses(r[0] for r in cursor.fetchall())
+            cursor.execute(
+                "DELETE FROM indexed_documents WHERE projectid=? AND fileid=?",
+                (projectid, fileid),
+            )
+            for doc in uploaded:
+                document_id = str(doc.document_id)
+                status = normalize_document_status(getattr(doc, "status", None))
+                remember_document_status(document_id, status)
+                cursor.execute("""
+                    INSERT OR REPLACE INTO indexed_documents (document_id, projectid, fileid, status, updated_at)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (document_id, projectid, fileid, status, now))
             cursor.execute("""
                 INSERT OR IGNORE INTO indexed_files (projectid, fileid, content_hash, indexed_at)
                 VALUES (?, ?, ?, ?)
-            """, (projectid, fileid, content_hash, datetime.utcnow().isoformat()))
+            """, (projectid, fileid, content_hash, now))
             conn.commit()
 
         except Exception as e:
+            if is_upstream_failure(e):
+                # Backboard is down or overloaded: fail the whole run so the job is
+                # retried with backoff (files indexed so far are skipped next time)
+                raise
             failed += 1
             logger.exception("Index failed for fileid=%s path=%s error=%s", fileid, rel_path, e)
 
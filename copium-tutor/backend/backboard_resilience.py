@@ -0,0 +1,298 @@
+import os
+import time
+import random
+import asyncio
+import logging
+from dataclasses import dataclass
+from backboard.exceptions import (
+    BackboardAPIError,
+    BackboardRateLimitError,
+    BackboardServerError,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class BackboardUnavailableError(BackboardServerError):
+    """Raised without calling Backboard while the circuit breaker is open."""
+
+
+@dataclass(frozen=True)
+class CallPolicy:
+    timeout_s: float
+    idempotent: bool
+    retries: int = 2
+    hedge: bool = False
+    # the call only opens a stream; the breaker hears how it went from the
+    # stream (_GuardedStream), not when it is created
+    streamed: bool = False
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+RETRY_BASE_S = _env_float("BACKBOARD_RETRY_BASE_S", 0.5)
+RETRY_MAX_S = _env_float("BACKBOARD_RETRY_MAX_S", 8.0)
+# 0 disables hedging; otherwise a second attempt starts after this many seconds
+HEDGE_AFTER_S = _env_float("BACKBOARD_HEDGE_AFTER_S", 0.0)
+GENERATION_TIMEOUT_S = _env_float("BACKBOARD_GENERATION_TIMEOUT_S", 180.0)
+UPLOAD_TIMEOUT_S = _env_float("BACKBOARD_UPLOAD_TIMEOUT_S", 300.0)
+# longest wait for the next event of a streamed reply
+STREAM_IDLE_TIMEOUT_S = _env_float("BACKBOARD_STREAM_IDLE_TIMEOUT_S", 60.0)
+
+POLICIES = {
+    "get_thread": CallPolicy(timeout_s=10, idempotent=True, retries=3, hedge=True),
+    "list_thread_documents": CallPolicy(timeout_s=15, idempotent=True, retries=3, hedge=True),
+    "get_document_status": CallPolicy(timeout_s=10, idempotent=True, retries=3, hedge=True),
+    "create_assistant": CallPolicy(timeout_s=20, idempotent=False),
+    "create_thread": CallPolicy(timeout_s=20, idempotent=False),
+    "delete_assistant": CallPolicy(timeout_s=20, idempotent=True),
+    "delete_thread": CallPolicy(timeout_s=20, idempotent=True),
+    "upload_document_to_thread": CallPolicy(timeout_s=UPLOAD_TIMEOUT_S, idempotent=False),
+    "add_message": CallPolicy(timeout_s=GENERATION_TIMEOUT_S, idempotent=False),
+}
+
+
+def is_upstream_failure(exc: BaseException) -> bool:
+    """Failures that say something about Backboard's health (not our request)."""
+    if isinstance(exc, (asyncio.TimeoutError, BackboardServerError, BackboardRateLimitError)):
+        return True
+    # the SDK maps timeouts and connection errors to a bare BackboardAPIError
+    return type(exc) is BackboardAPIError and getattr(exc, "status_code", None) is None
+
+
+def _is_retryable(exc: BaseException, idempotent: bool) -> bool:
+    if isinstance(exc, BackboardUnavailableError):
+        return False
+    if isinstance(exc, BackboardRateLimitError):
+        # rejected before doing any work, safe to repeat for every operation
+        return True
+    return idempotent and is_upstream_failure(exc)
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `threshold` consecutive upstream failures; open fails fast
+    for `cooldown_s`; then half_open lets a single probe through, which closes the
+    breaker on success or re-opens it on failure.
+    """
+
+    def __init__(self, threshold: int, cooldown_s: float):
+        self.threshold = threshold
+        self.cooldown_s = cooldown_s
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.last_error = None
+        self.total_failures = 0
+        self.total_rejected = 0
+        self._probe_in_flight = False
+
+    def before_call(self):
+        if self.state == "open":
+            if time.monotonic() - self.opened_at >= self.cooldown_s:
+                self.state = "half_open"
+            else:
+                self.total_rejected += 1
+                raise BackboardUnavailableError("Backboard circuit breaker is open")
+        if self.state == "half_open":
+            if self._probe_in_flight:
+                self.total_rejected += 1
+                raise BackboardUnavailableError("Backboard circuit breaker is half-open")
+            self._probe_in_flight = True
+
+    def record_success(self):
+        self._probe_in_flight = False
+        self.consecutive_failures = 0
+        if self.state != "closed":
+            logger.info("Backboard circuit breaker closed")
+        self.state = "closed"
+
+    def record_failure(self, exc: BaseException):
+        self._probe_in_flight = False
+        if not is_upstream_failure(exc):
+            # the call reached Backboard and got a client-side answer (404, 400, ...)
+            if self.state == "half_open":
+                self.record_success()
+            return
+        self.total_failures += 1
+        self.consecutive_failures += 1
+        self.last_error = f"{type(exc).__name__}: {exc}"
+        if self.state == "half_open" or self.consecutive_failures >= self.threshold:
+            if self.state != "open":
+                logger.warning(
+                    "Backboard circuit breaker opened after %d failures (%s)",
+                    self.consecutive_failures,
+                    self.last_error,
+                )
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def snapshot(self) -> dict:
+        retry_in = None
+        if self.state == "open":
+            retry_in = max(0.0, self.cooldown_s - (time.monotonic() - self.opened_at))
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "total_failures": self.total_failures,
+            "rejected_calls": self.total_rejected,
+            "last_error": self.last_error,
+            "retry_in_s": retry_in,
+        }
+
+
+breaker = CircuitBreaker(
+    threshold=int(_env_float("BACKBOARD_BREAKER_THRESHOLD", 5)),
+    cooldown_s=_env_float("BACKBOARD_BREAKER_COOLDOWN_S", 30.0),
+)
+
+
+def _backoff_s(attempt: int) -> float:
+    # "full jitter": uniform in [0, min(max, base * 2^attempt)]
+    return random.uniform(0, min(RETRY_MAX_S, RETRY_BASE_S * (2**attempt)))
+
+
+async def _attempt(fn, args, kwargs, policy: CallPolicy):
+    breaker.before_call()
+    try:
+        result = await asyncio.wait_for(fn(*args, **kwargs), timeout=policy.timeout_s)
+    except asyncio.CancelledError:
+        breaker._probe_in_flight = False
+        raise
+    except Exception as e:
+        breaker.record_failure(e)
+        raise
+    if not policy.streamed:
+        breaker.record_success()
+    return result
+
+
+async def _hedged_attempt(fn, args, kwargs, policy: CallPolicy):
+    """Starts a second identical request if the first is slower than HEDGE_AFTER_S."""
+    tasks = {asyncio.create_task(_attempt(fn, args, kwargs, policy))}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=HEDGE_AFTER_S)
+        if not done:
+            tasks.add(asyncio.create_task(_attempt(fn, args, kwargs, policy)))
+        pending = set(tasks)
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = error or task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+async def call_with_policy(op_name: str, fn, /, *args, policy: CallPolicy | None = None, **kwargs):
+    policy = policy or POLICIES.get(op_name) or CallPolicy(timeout_s=30, idempotent=False)
+    attempt = 0
+    while True:
+        try:
+            if policy.hedge and policy.idempotent and HEDGE_AFTER_S > 0:
+                return await _hedged_attempt(fn, args, kwargs, policy)
+            return await _attempt(fn, args, kwargs, policy)
+        except Exception as e:
+            if attempt >= policy.retries or not _is_retryable(e, policy.idempotent):
+                raise
+            delay = _backoff_s(attempt)
+            attempt += 1
+            logger.warning(
+                "Backboard %s failed (%s: %s), retry %d/%d in %.2fs",
+                op_name, type(e).__name__, e, attempt, policy.retries, delay,
+            )
+            await asyncio.sleep(delay)
+
+
+class _GuardedStream:
+    """
+    Async iterator over a streamed reply that fails with a timeout when no event
+    arrives for `idle_timeout_s`, and reports how the stream ended to the breaker.
+    """
+
+    def __init__(self, stream, idle_timeout_s: float):
+        self._stream = stream.__aiter__()
+        self._idle_timeout_s = idle_timeout_s
+        self._reported = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return await asyncio.wait_for(
+                self._stream.__anext__(), timeout=self._idle_timeout_s
+            )
+        except StopAsyncIteration:
+            self._reported = True
+            breaker.record_success()
+            raise
+        except asyncio.CancelledError:
+            self._release_probe()
+            raise
+        except Exception as e:
+            self._reported = True
+            breaker.record_failure(e)
+            await self.aclose()
+            raise
+
+    def _release_probe(self):
+        # abandoned before it ended: no verdict, but let another call probe
+        if not self._reported:
+            self._reported = True
+            breaker._probe_in_flight = False
+
+    async def aclose(self):
+        self._release_probe()
+        close = getattr(self._stream, "aclose", None)
+        if close is not None:
+            try:
+                await close()
+            except Exception:
+                pass
+
+
+class ResilientBackboardClient:
+    """
+    Wraps a BackboardClient so every call goes through call_with_policy.
+    add_message always appends a turn to the thread, so it is only retried when
+    Backboard rejected it before doing any work (rate limits).
+    """
+
+    def __init__(self, client):
+        self._inner = client
+
+    def __getattr__(self, name):
+        attr = getattr(self._inner, name)
+        if name not in POLICIES or not callable(attr):
+            return attr
+
+        async def wrapped(*args, **kwargs):
+            return await call_with_policy(name, attr, *args, **kwargs)
+
+        return wrapped
+
+    async def add_message(self, *args, **kwargs):
+        policy = POLICIES["add_message"]
+        if kwargs.get("stream"):
+            stream = await call_with_policy(
+                "add_message", self._inner.add_message, *args,
+                policy=CallPolicy(
+                    timeout_s=policy.timeout_s, idempotent=False, retries=0, streamed=True
+                ),
+                **kwargs,
+            )
+            return _GuardedStream(stream, STREAM_IDLE_TIMEOUT_S)
+        return await call_with_policy(
+            "add_message", self._inner.add_message, *args, policy=policy, **kwargs
+        )
@@ -0,0 +1,112 @@
+"""Shared setup for the offline benchmarks: fake Backboard server + throwaway database."""
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def serve(app, port: int):
+    import uvicorn
+
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def start_offline_backend(**env):
+    """
+    Starts fake_backboard on a free port, points the backend at it with a temporary
+    database, and imports main. Extra keyword arguments are set as env variables
+    before import. Returns (main module, fake_backboard module, server).
+    """
+    port = free_port()
+    tmpdir = tempfile.mkdtemp(prefix="copium-bench-")
+    os.environ["COPIUM_DB_PATH"] = os.path.join(tmpdir, "bench.db")
+    os.environ["BACKBOARD_API_KEY"] = "bench-key"
+    os.environ["BACKBOARD_BASE_URL"] = f"http://127.0.0.1:{port}/api"
+    for key, value in env.items():
+        os.environ[key] = str(value)
+
+    import fake_backboard
+
+    server = serve(fake_backboard.app, port)
+    os.chdir(tmpdir)  # keep uploaded_files/ out of the source tree
+    import main
+
+    return main, fake_backboard, server
+
+
+def seed_user_project(main, userid: str = "benchuser", projectid: str = "benchproj"):
+    main.cursor.execute(
+        "INSERT OR IGNORE INTO users (userid, email) VALUES (?, ?)",
+        (userid, f"{userid}@example.com"),
+    )
+    main.cursor.execute(
+        "INSERT OR IGNORE INTO projects (projectid, userid, name) VALUES (?, ?, ?)",
+        (projectid, userid, projectid),
+    )
+    main.conn.commit()
+    return userid, projectid
+
+
+def seed_chat(main, userid: str, projectid: str, chatid: str = "benchchat"):
+    now = datetime.now(timezone.utc).isoformat()
+    main.cursor.execute(
+        "INSERT OR IGNORE INTO chat_sessions (chatid, projectid, userid, title, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+        (chatid, projectid, userid, "Bench chat", now, now),
+    )
+    main.conn.commit()
+    return chatid
+
+
+def seed_pdf(main, projectid: str, fileid: str = "benchfile", pages: int = 3):
+    from pypdf import PdfWriter
+
+    # under the throwaway working dir; the absolute path is stored as-is, since
+    # indexing joins it onto the backend dir and an absolute path wins
+    abs_path = os.path.abspath(os.path.join(main.UPLOAD_DIR, f"{fileid}_notes.pdf"))
+    os.makedirs(os.path.dirname(abs_path), exist_ok=True)
+    writer = PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=612, height=792)
+    with open(abs_path, "wb") as f:
+        writer.write(f)
+    main.cursor.execute(
+        "INSERT OR IGNORE INTO files (fileid, filepath, filesize, filetype) VALUES (?, ?, ?, ?)",
+        (fileid, abs_path, os.path.getsize(abs_path), "application/pdf"),
+    )
+    main.cursor.execute(
+        "INSERT OR IGNORE INTO fileinproj (projectid, fileid) VALUES (?, ?)",
+        (projectid, fileid),
+    )
+    main.conn.commit()
+    return fileid, abs_path
+
+
+def summarize(label: str, timings_ms: list[float]) -> str:
+    import statistics
+
+    timings = sorted(timings_ms)
+    p95 = timings[max(0, int(len(timings) * 0.95) - 1)]
+    return (
+        f"{label:<14} n={len(timings):<5} mean={statistics.mean(timings):8.2f}ms  "
+        f"p50={statistics.median(timings):8.2f}ms  p95={p95:8.2f}ms"
+    )
@@ -0,0 +1,64 @@
+"""
+Latency of send_chat_message with a fresh BackboardClient per call vs the pooled
+process-wide client, against the local fake Backboard server.
+
+    cd copium-tutor/backend
+    python benchmarks/bench_client_pool.py --requests 200
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from _harness import seed_chat, seed_user_project, start_offline_backend, summarize
+
+
+async def _run(main, chatid: str, userid: str, n: int) -> list[float]:
+    body = main.SendChatMessageRequest(content="What is a derivative?")
+    timings = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        res = await main.send_chat_message(chatid, body, session=userid)
+        timings.append((time.perf_counter() - t0) * 1000)
+        assert res["success"], res
+    return timings
+
+
+def main_cli():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    main, _, server = start_offline_backend()
+    import backboard_client
+    from backboard import BackboardClient
+
+    userid, projectid = seed_user_project(main)
+    chatid = seed_chat(main, userid, projectid)
+
+    async def bench():
+        # warm up: creates the assistant/thread row and the pooled connection
+        await _run(main, chatid, userid, 5)
+        pooled = await _run(main, chatid, userid, args.requests)
+
+        pooled_getter = main.get_backboard_client
+        async def per_call_getter(api_key):
+            return BackboardClient(api_key=api_key, base_url=os.environ["BACKBOARD_BASE_URL"])
+
+        main.get_backboard_client = per_call_getter
+        try:
+            per_call = await _run(main, chatid, userid, args.requests)
+        finally:
+            main.get_backboard_client = pooled_getter
+        await backboard_client.close_backboard_client()
+        return per_call, pooled
+
+    per_call, pooled = asyncio.run(bench())
+    print(f"send_chat_message x{args.requests} against {os.environ['BACKBOARD_BASE_URL']}")
+    print(summarize("per-call", per_call))
+    print(summarize("pooled", pooled))
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    main_cli()
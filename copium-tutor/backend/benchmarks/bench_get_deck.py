@@ -0,0 +1,89 @@
+"""
+Cost of serializing get_deck's payload for a large deck the way FastAPI does for
+a plain dict: jsonable_encoder + the stdlib json JSONResponse vs the app's
+default orjson-backed FastJSONResponse, and end-to-end over HTTP.
+
+    cd copium-tutor/backend
+    python benchmarks/bench_get_deck.py --cards 5000
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+import httpx
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from _harness import free_port, seed_user_project, serve, start_offline_backend, summarize
+
+
+def seed_deck(main, userid: str, projectid: str, n: int) -> str:
+    deckid = "benchdeck"
+    main.cursor.execute(
+        "INSERT OR IGNORE INTO decks (deckid, projectid, userid, name, prompt, status, createddate) VALUES (?, ?, ?, ?, ?, 'ready', datetime('now'))",
+        (deckid, projectid, userid, "Big deck", "Everything"),
+    )
+    main.cursor.executemany(
+        "INSERT INTO cards (cardid, deckid, front, back, position, due_at, interval_days, ease, reps, lapses) VALUES (?, ?, ?, ?, ?, datetime('now'), 1.0, 2.5, 0, 0)",
+        [
+            (
+                uuid.uuid4().hex[:8],
+                deckid,
+                f"Question {i}: what does concept {i} describe?",
+                f"Concept {i} describes a process with several steps.\n\n[External] General knowledge.",
+                i,
+            )
+            for i in range(n)
+        ],
+    )
+    main.conn.commit()
+    return deckid
+
+
+def main_cli():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cards", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    main, _, _ = start_offline_backend()
+    userid, projectid = seed_user_project(main)
+    deckid = seed_deck(main, userid, projectid, args.cards)
+
+    async def handler_once():
+        return await main.get_deck(deckid, session=userid)
+
+    legacy, fast = [], []
+    for _ in range(args.repeat):
+        payload = asyncio.run(handler_once())
+
+        # previous path: jsonable_encoder, then the stdlib json module
+        t0 = time.perf_counter()
+        JSONResponse(jsonable_encoder(payload))
+        legacy.append((time.perf_counter() - t0) * 1000)
+
+        # default_response_class=FastJSONResponse: jsonable_encoder, then orjson
+        t0 = time.perf_counter()
+        response = main.FastJSONResponse(jsonable_encoder(payload))
+        fast.append((time.perf_counter() - t0) * 1000)
+
+    print(f"get_deck with {args.cards} cards, {len(response.body) / 1024:.0f} KiB response")
+    print(summarize("json (before)", legacy))
+    print(summarize("orjson", fast))
+
+    port = free_port()
+    server = serve(main.app, port)
+    http = []
+    with httpx.Client(base_url=f"http://127.0.0.1:{port}", cookies={"session": userid}) as client:
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            res = client.get(f"/decks/{deckid}")
+            http.append((time.perf_counter() - t0) * 1000)
+            assert res.json()["success"]
+    print(summarize("HTTP get_deck", http))
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    main_cli()
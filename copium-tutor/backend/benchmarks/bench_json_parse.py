@@ -0,0 +1,137 @@
+"""
+Parsing cost of model replies: the previous multi-pass quiz/deck parsers vs the
+single-pass tolerant parser (whole text, and fed as 24-char stream chunks), over
+the sample replies in benchmarks/fixtures/.
+
+    cd copium-tutor/backend
+    python benchmarks/bench_json_parse.py --repeat 2000
+"""
+import argparse
+import glob
+import json
+import os
+import time
+
+import _harness  # noqa: F401  (puts the backend on sys.path)
+from json_stream import TolerantJsonParser, parse_tolerant_json
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+# region Previous parsers (kept here as the baseline)
+def _legacy_extract_json_object(raw):
+    start = raw.find("{")
+    end = raw.rfind("}")
+    if start == -1 or end == -1 or end <= start:
+        return None
+    return raw[start : end + 1]
+
+
+def _legacy_fix_unescaped_newlines(json_text):
+    fixed = []
+    in_string = False
+    escaped = False
+    for ch in json_text:
+        if in_string:
+            if ch in "\r\n":
+                fixed.append("\\n")
+                escaped = False
+                continue
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        else:
+            if ch == '"':
+                in_string = True
+        fixed.append(ch)
+    return "".join(fixed)
+
+
+def _legacy_extract_questions_array(raw):
+    key_idx = raw.find('"questions"')
+    if key_idx == -1:
+        return []
+    bracket_idx = raw.find("[", key_idx)
+    if bracket_idx == -1:
+        return []
+    depth = 0
+    for i in range(bracket_idx, len(raw)):
+        if raw[i] == "[":
+            depth += 1
+        elif raw[i] == "]":
+            depth -= 1
+            if depth == 0:
+                snippet = raw[bracket_idx : i + 1]
+                try:
+                    return json.loads(snippet)
+                except json.JSONDecodeError:
+                    try:
+                        return json.loads(_legacy_fix_unescaped_newlines(snippet))
+                    except json.JSONDecodeError:
+                        return []
+    return []
+
+
+def legacy_parse(raw_text):
+    json_text = _legacy_extract_json_object(raw_text) or raw_text
+    try:
+        return json.loads(json_text)
+    except json.JSONDecodeError:
+        try:
+            return json.loads(_legacy_fix_unescaped_newlines(json_text))
+        except json.JSONDecodeError:
+            questions_only = _legacy_extract_questions_array(raw_text)
+            if questions_only:
+                return questions_only
+            return None
+
+
+# endregion
+
+
+def stream_parse(raw_text, chunk=24):
+    parser = TolerantJsonParser(item_key="cards" if '"cards"' in raw_text else "questions")
+    for i in range(0, len(raw_text), chunk):
+        parser.feed(raw_text[i : i + chunk])
+    return parser.result()
+
+
+def _describe(value) -> str:
+    if isinstance(value, list):
+        return f"list[{len(value)}]"
+    if isinstance(value, dict):
+        for key in ("questions", "cards"):
+            if isinstance(value.get(key), list):
+                return f"{key}={len(value[key])}"
+        return "dict"
+    return "FAILED"
+
+
+def _time_us(fn, text, repeat) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn(text)
+    return (time.perf_counter() - t0) / repeat * 1e6
+
+
+def main_cli():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'fixture':<30} {'bytes':>6}  {'legacy':>18}  {'tolerant':>18}  {'stream(24)':>18}")
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.txt"))):
+        with open(path) as f:
+            text = f.read()
+        row = [f"{os.path.basename(path):<30} {len(text):>6}"]
+        for fn in (legacy_parse, parse_tolerant_json, stream_parse):
+            us = _time_us(fn, text, args.repeat)
+            row.append(f"{us:8.1f}us {_describe(fn(text)):>9}")
+        print("  ".join(row))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,96 @@
+"""
+Latency of GET /study/queue for a user with many decks and cards (plus other
+users' cards in the same tables), with the query plans it runs.
+
+    cd copium-tutor/backend
+    python benchmarks/bench_study_queue.py --decks 50 --cards 20000
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from _harness import seed_user_project, start_offline_backend, summarize
+
+
+def seed_decks(main, userid: str, projectid: str, decks: int, cards: int, rng: random.Random):
+    now = datetime.now(timezone.utc)
+    per_deck = cards // decks
+    for d in range(decks):
+        deckid = uuid.uuid4().hex[:8]
+        main.cursor.execute(
+            "INSERT INTO decks (deckid, projectid, userid, name, prompt, status, createddate) VALUES (?, ?, ?, ?, ?, 'ready', ?)",
+            (deckid, projectid, userid, f"Deck {d}", "Everything", (now - timedelta(days=decks - d)).isoformat()),
+        )
+        rows = []
+        for i in range(per_deck):
+            if rng.random() < 0.3:
+                # new card: never reviewed
+                due_at, introduced_at, reps = now.isoformat(), None, 0
+            else:
+                # in review: due anywhere from a month ago to a month ahead
+                due_at = (now + timedelta(days=rng.uniform(-30, 30))).isoformat()
+                introduced_at = (now - timedelta(days=rng.uniform(0, 60))).isoformat()
+                reps = rng.randint(1, 8)
+            rows.append(
+                (uuid.uuid4().hex[:12], deckid, f"Front {d}-{i}", f"Back {d}-{i}", i, due_at, reps, introduced_at)
+            )
+        main.cursor.executemany(
+            "INSERT INTO cards (cardid, deckid, front, back, position, due_at, interval_days, ease, reps, lapses, introduced_at) VALUES (?, ?, ?, ?, ?, ?, 1.0, 2.5, ?, 0, ?)",
+            rows,
+        )
+    main.conn.commit()
+
+
+def main_cli():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--decks", type=int, default=50)
+    parser.add_argument("--cards", type=int, default=20000)
+    parser.add_argument("--other-users", type=int, default=4)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    main, _, _ = start_offline_backend()
+    rng = random.Random(7)
+    userid, projectid = seed_user_project(main)
+    seed_decks(main, userid, projectid, args.decks, args.cards, rng)
+    for n in range(args.other_users):
+        other, other_project = seed_user_project(main, f"other{n}", f"otherproj{n}")
+        seed_decks(main, other, other_project, args.decks, args.cards, rng)
+    main.conn.execute("ANALYZE")
+
+    for label, projectid_filter in (("all decks", None), ("one course", projectid)):
+        timings = []
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            response = asyncio.run(
+                main.study_queue(limit=args.limit, projectid=projectid_filter, session=userid)
+            )
+            timings.append((time.perf_counter() - t0) * 1000)
+        payload = response
+        print(
+            summarize(f"study_queue {label}", timings),
+            f"due={payload['due']} new={payload['new']}",
+        )
+
+    now = datetime.now(timezone.utc).isoformat()
+    plans = {
+        "due": (
+            "SELECT c.cardid FROM decks d JOIN cards c ON c.deckid = d.deckid WHERE d.userid=? AND c.introduced_at IS NOT NULL AND c.due_at<=? ORDER BY c.due_at LIMIT 20",
+            (userid, now),
+        ),
+        "new": (
+            "SELECT c.cardid FROM decks d JOIN cards c ON c.deckid = d.deckid WHERE d.userid=? AND c.introduced_at IS NULL ORDER BY d.createddate, d.deckid, c.position LIMIT 20",
+            (userid,),
+        ),
+    }
+    for name, (sql, params) in plans.items():
+        plan = main.conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+        print(f"{name} plan:", " | ".join(row[3] for row in plan))
+
+
+if __name__ == "__main__":
+    main_cli()
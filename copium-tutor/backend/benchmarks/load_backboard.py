@@ -0,0 +1,120 @@
+"""
+Offline load test of the Backboard-backed paths (indexing, deck creation, quiz
+generation, chat) against the fake Backboard server.
+
+    cd copium-tutor/backend
+    python benchmarks/load_backboard.py --concurrency 10 --rounds 3 --latency-ms 50
+
+Latency and failures are injected by the fake server (see fake_backboard.py).
+"""
+import argparse
+import asyncio
+import time
+
+from _harness import (
+    seed_chat,
+    seed_pdf,
+    seed_user_project,
+    start_offline_backend,
+    summarize,
+)
+
+
+async def _timed(timings: list, coro):
+    t0 = time.perf_counter()
+    try:
+        return await coro
+    finally:
+        timings.append((time.perf_counter() - t0) * 1000)
+
+
+def main_cli():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--generation-ms", type=float, default=200)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    main, fake, server = start_offline_backend(
+        FAKE_BACKBOARD_INDEX_DELAY_S=0.5,
+        BACKBOARD_WATCH_MIN_INTERVAL_S=0.2,
+        BACKBOARD_RETRY_BASE_S=0.05,
+    )
+    fake.config.update(
+        latency_ms=args.latency_ms,
+        generation_ms=args.generation_ms,
+        failure_rate=args.failure_rate,
+    )
+
+    userid, projectid = seed_user_project(main)
+    chatid = seed_chat(main, userid, projectid)
+    fileid, _ = seed_pdf(main, projectid)
+
+    timings = {"index": [], "create_deck": [], "quiz": [], "chat": []}
+    outcomes = {"quiz_ready": 0, "quiz_failed": 0, "errors": 0}
+
+    async def one_quiz(n: int):
+        quizid = f"load{n}"
+        main.cursor.execute(
+            """
+            INSERT INTO quizzes (quizid, projectid, userid, title, topic, quiz_type, num_questions,
+                                 document_ids_json, status, createddate)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'pending', datetime('now'))
+            """,
+            (quizid, projectid, userid, "Load", "midterm", "mcq", 5, f'["{fileid}"]'),
+        )
+        main.conn.commit()
+        await main._generate_quiz_content(
+            quizid, projectid, userid, "midterm", "mcq", 5, [fileid], fresh=True
+        )
+        main.cursor.execute("SELECT status FROM quizzes WHERE quizid=?", (quizid,))
+        status = main.cursor.fetchone()[0]
+        outcomes["quiz_ready" if status == "ready" else "quiz_failed"] += 1
+
+    deck_body = main.CreateDeckRequest(name="Load deck", prompt="Key ideas", no_cache=True)
+
+    async def one_deck():
+        created = await main.create_deck(projectid, deck_body, session=userid)
+        await main._run_deck_generation_job({"deckid": created["deckid"], "userid": userid})
+
+    async def guarded(coro):
+        try:
+            await coro
+        except Exception:
+            outcomes["errors"] += 1
+
+    async def run():
+        await _timed(
+            timings["index"],
+            main._run_index_job({"projectid": projectid, "userid": userid}),
+        )
+        chat_body = main.SendChatMessageRequest(content="Explain the main theorem")
+        counter = 0
+        for _ in range(args.rounds):
+            tasks = []
+            for _ in range(args.concurrency):
+                counter += 1
+                tasks.append(guarded(_timed(timings["create_deck"], one_deck())))
+                tasks.append(guarded(_timed(timings["quiz"], one_quiz(counter))))
+                tasks.append(guarded(_timed(timings["chat"], main.send_chat_message(chatid, chat_body, session=userid))))
+            await asyncio.gather(*tasks)
+
+    t0 = time.perf_counter()
+    asyncio.run(run())
+    wall = time.perf_counter() - t0
+
+    print(
+        f"concurrency={args.concurrency} rounds={args.rounds} latency={args.latency_ms}ms "
+        f"generation={args.generation_ms}ms failure_rate={args.failure_rate}"
+    )
+    for label, values in timings.items():
+        if values:
+            print(summarize(label, values))
+    print(f"outcomes: {outcomes}  fake server: {fake.stats}  wall={wall:.2f}s")
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    main_cli()
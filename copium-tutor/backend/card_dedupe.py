@@ -0,0 +1,191 @@
+import os
+import re
+import zlib
+import random
+import struct
+import hashlib
+
+from generation_cache import normalize_prompt
+
+# Cards whose shingle sets overlap at least this much (Jaccard) are duplicates.
+CARD_DEDUPE_THRESHOLD = float(os.getenv("CARD_DEDUPE_THRESHOLD", "0.8"))
+
+# MinHash signature of NUM_PERM values, split into LSH bands of BAND_ROWS values:
+# cards sharing any band become candidates (~98% recall at Jaccard 0.8).
+NUM_PERM = 32
+BAND_ROWS = 4
+SHINGLE_CHARS = 5
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20240917)  # fixed: signatures must match across processes
+_PERMUTATIONS = [
+    (_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)
+]
+
+_EXTERNAL_NOTE = re.compile(r"\n\n\[External\].*\Z", re.S)
+
+
+def card_shingles(front: str, back: str) -> set[int]:
+    """
+    Hashed character shingles of a card. The "[External] ..." note appended to
+    generated backs is left out, so it does not make two cards look different.
+    """
+    back = _EXTERNAL_NOTE.sub("", back or "")
+    text = f"{normalize_prompt(front)} | {normalize_prompt(back)}"
+    if len(text) <= SHINGLE_CHARS:
+        return {zlib.crc32(text.encode())}
+    return {
+        zlib.crc32(text[i : i + SHINGLE_CHARS].encode())
+        for i in range(len(text) - SHINGLE_CHARS + 1)
+    }
+
+
+def jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _band_buckets(shingles: set[int]) -> list[tuple[int, int]]:
+    signature = [
+        min((a * h + b) % _PRIME for h in shingles) & 0xFFFFFFFF
+        for a, b in _PERMUTATIONS
+    ]
+    buckets = []
+    for band, start in enumerate(range(0, NUM_PERM, BAND_ROWS)):
+        digest = hashlib.blake2b(
+            struct.pack(f"<{BAND_ROWS}I", *signature[start : start + BAND_ROWS]),
+            digest_size=8,
+        ).digest()
+        buckets.append((band, int.from_bytes(digest, "little", signed=True)))
+    return buckets
+
+
+def index_cards(db_cursor, projectid: str, cards: list[tuple[str, str, str]]):
+    """Adds (cardid, front, back) rows to the project's LSH index, without committing."""
+    db_cursor.executemany(
+        "INSERT INTO card_lsh (projectid, band, bucket, cardid) VALUES (?, ?, ?, ?)",
+        [
+            (projectid, band, bucket, cardid)
+            for cardid, front, back in cards
+            for band, bucket in _band_buckets(card_shingles(front, back))
+        ],
+    )
+
+
+def unindex_cards(db_cursor, cardids: list[str]):
+    db_cursor.executemany(
+        "DELETE FROM card_lsh WHERE cardid=?", [(cardid,) for cardid in cardids]
+    )
+
+
+def unindex_project(db_cursor, projectid: str):
+    db_cursor.execute("DELETE FROM card_lsh WHERE projectid=?", (projectid,))
+
+
+def ensure_indexed(db_cursor, projectid: str) -> int:
+    """Indexes the project's cards that predate the index (or were missed). Returns how many."""
+    db_cursor.execute(
+        """
+        SELECT c.cardid, c.front, c.back
+        FROM cards c
+        JOIN decks d ON d.deckid = c.deckid
+        WHERE d.projectid=?
+          AND NOT EXISTS (SELECT 1 FROM card_lsh l WHERE l.cardid = c.cardid)
+        """,
+        (projectid,),
+    )
+    rows = db_cursor.fetchall()
+    if rows:
+        index_cards(db_cursor, projectid, rows)
+    return len(rows)
+
+
+def _candidates(db_cursor, projectid: str, buckets: list[tuple[int, int]]) -> list[tuple]:
+    match = " OR ".join("(band=? AND bucket=?)" for _ in buckets)
+    db_cursor.execute(
+        f"""
+        SELECT c.cardid, c.front, c.back
+        FROM cards c
+        WHERE c.cardid IN (
+            SELECT cardid FROM card_lsh WHERE projectid=? AND ({match})
+        )
+        """,
+        (projectid, *[v for pair in buckets for v in pair]),
+    )
+    return db_cursor.fetchall()
+
+
+def drop_duplicates(
+    db_cursor,
+    projectid: str,
+    cards: list[tuple[str, str]],
+    threshold: float = CARD_DEDUPE_THRESHOLD,
+) -> tuple[list[tuple[str, str]], int]:
+    """
+    Filters (front, back) pairs about to be inserted: drops the ones that are
+    near-duplicates of a card already in the project, or of an earlier pair in
+    the same batch. Returns (kept pairs, number dropped).
+    """
+    kept, kept_shingles = [], []
+    for front, back in cards:
+        shingles = card_shingles(front, back)
+        if any(jaccard(shingles, other) >= threshold for other in kept_shingles):
+            continue
+        if any(
+            jaccard(shingles, card_shingles(f, b)) >= threshold
+            for _, f, b in _candidates(db_cursor, projectid, _band_buckets(shingles))
+        ):
+            continue
+        kept.append((front, back))
+        kept_shingles.append(shingles)
+    return kept, len(cards) - len(kept)
+
+
+def duplicate_clusters(
+    db_cursor, projectid: str, threshold: float = CARD_DEDUPE_THRESHOLD
+) -> list[list[str]]:
+    """
+    Groups the project's cards into clusters of near-duplicates (card ids, two
+    or more per cluster). Pairs sharing an LSH bucket are checked against the
+    exact shingle overlap; clusters are the connected components.
+    """
+    db_cursor.execute(
+        """
+        SELECT DISTINCT a.cardid, b.cardid
+        FROM card_lsh a
+        JOIN card_lsh b
+          ON b.projectid = a.projectid AND b.band = a.band
+         AND b.bucket = a.bucket AND b.cardid > a.cardid
+        WHERE a.projectid=?
+        """,
+        (projectid,),
+    )
+    pairs = db_cursor.fetchall()
+    if not pairs:
+        return []
+
+    cardids = {cardid for pair in pairs for cardid in pair}
+    db_cursor.execute(
+        f"SELECT cardid, front, back FROM cards WHERE cardid IN ({','.join('?' * len(cardids))})",
+        tuple(cardids),
+    )
+    shingles = {cardid: card_shingles(front, back) for cardid, front, back in db_cursor.fetchall()}
+
+    parent = {}
+
+    def find(x):
+        parent.setdefault(x, x)
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for a, b in pairs:
+        if a in shingles and b in shingles and jaccard(shingles[a], shingles[b]) >= threshold:
+            parent[find(a)] = find(b)
+
+    clusters: dict[str, list[str]] = {}
+    for cardid in parent:
+        clusters.setdefault(find(cardid), []).append(cardid)
+    return [sorted(members) for members in clusters.values() if len(members) > 1]
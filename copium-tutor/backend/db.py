@@ -1,9 +1,24 @@
 import os
 import sqlite3
+from datetime import datetime, timezone
 
-DB_PATH = os.path.join(os.path.dirname(__file__), "database.db")
+DB_PATH = os.getenv(
+    "COPIUM_DB_PATH", os.path.join(os.path.dirname(__file__), "database.db")
+)
 
-conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+
+def connect_db() -> sqlite3.Connection:
+    """
+    Opens a connection to the shared database. WAL mode plus a busy timeout let the
+    API and background workers (possibly in other processes) write concurrently.
+    """
+    db_conn = sqlite3.connect(DB_PATH, check_same_thread=False, timeout=30)
+    db_conn.execute("PRAGMA journal_mode=WAL")
+    db_conn.execute("PRAGMA busy_timeout=30000")
+    return db_conn
+
+
+conn = connect_db()
 cursor = conn.cursor()
 
 
@@ -43,10 +58,15 @@ def init_db():
         userid TEXT NOT NULL,
         name TEXT NOT NULL,
         prompt TEXT NOT NULL,
+        status TEXT,                      -- 'pending' | 'generating' | 'ready' | 'failed'
+        generation_error TEXT,
         createddate TEXT NOT NULL
     )
     """)
 
+    _add_column_if_missing("decks", "status", "TEXT")
+    _add_column_if_missing("decks", "generation_error", "TEXT")
+
     # cards: the generated (or manual) Q/A inside a deck
     cursor.execute("""
     CREATE TABLE IF NOT EXISTS cards (
@@ -61,7 +81,8 @@ def init_db():
     ease REAL,
     reps INTEGER,
     lapses INTEGER,
-    last_reviewed_at TEXT
+    last_reviewed_at TEXT,
+    introduced_at TEXT                -- first review; NULL while the card is new
     )
     """)
 
@@ -72,6 +93,54 @@ def init_db():
     _add_column_if_missing("cards", "reps", "INTEGER")
     _add_column_if_missing("cards", "lapses", "INTEGER")
     _add_column_if_missing("cards", "last_reviewed_at", "TEXT")
+    _add_column_if_missing("cards", "introduced_at", "TEXT")
+
+    # backfill cards inserted without a position or scheduling state: positions
+    # follow the order decks were displayed in (position, then insertion order)
+    cursor.execute("""
+    UPDATE cards SET position = (
+        SELECT rn FROM (
+            SELECT rowid AS rid,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY deckid ORDER BY COALESCE(position, 999999), rowid
+                   ) - 1 AS rn
+            FROM cards
+            WHERE deckid IN (SELECT deckid FROM cards WHERE position IS NULL)
+        ) WHERE rid = cards.rowid
+    )
+    WHERE deckid IN (SELECT deckid FROM cards WHERE position IS NULL)
+    """)
+    cursor.execute(
+        """
+        UPDATE cards
+        SET due_at = COALESCE(due_at, ?),
+            interval_days = COALESCE(interval_days, 0),
+            ease = COALESCE(ease, 2.5),
+            reps = COALESCE(reps, 0),
+            lapses = COALESCE(lapses, 0)
+        WHERE due_at IS NULL OR interval_days IS NULL OR ease IS NULL
+              OR reps IS NULL OR lapses IS NULL
+        """,
+        (datetime.now(timezone.utc).isoformat(),),
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_cards_deck_position ON cards (deckid, position)"
+    )
+    cursor.execute(
+        "UPDATE cards SET introduced_at = last_reviewed_at WHERE introduced_at IS NULL AND last_reviewed_at IS NOT NULL"
+    )
+    # study queue: cards in review by due time, new cards in deck order, and
+    # how many cards were introduced today (the new-card limit)
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_cards_deck_due ON cards (deckid, due_at) WHERE introduced_at IS NOT NULL"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_cards_deck_new ON cards (deckid, position) WHERE introduced_at IS NULL"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_cards_deck_introduced ON cards (deckid, introduced_at) WHERE introduced_at IS NOT NULL"
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_decks_user ON decks (userid, projectid)")
 
     # backboard: persistent memory per course
     cursor.execute("""
@@ -93,6 +162,21 @@ def init_db():
     )
     """)
 
+    # indexed_documents: Backboard document ids created for each indexed file
+    # (a split PDF maps to several documents)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS indexed_documents (
+        document_id TEXT PRIMARY KEY,
+        projectid TEXT NOT NULL,
+        fileid TEXT NOT NULL,
+        status TEXT,
+        updated_at TEXT NOT NULL
+    )
+    """)
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_indexed_documents_file ON indexed_documents (projectid, fileid)"
+    )
+
     # chat_sessions: one row per chat "thread" shown in the left sidebar (per course)
     cursor.execute("""
     CREATE TABLE IF NOT EXISTS chat_sessions (
@@ -151,6 +235,134 @@ def init_db():
     )
     """)
 
+    # jobs: durable background work (quiz/deck generation, indexing) claimed by workers with leases
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS jobs (
+        jobid TEXT PRIMARY KEY,
+        kind TEXT NOT NULL,
+        payload_json TEXT NOT NULL,
+        status TEXT NOT NULL,             -- 'queued' | 'running' | 'done' | 'failed'
+        attempts INTEGER NOT NULL DEFAULT 0,
+        max_attempts INTEGER NOT NULL DEFAULT 3,
+        dedupe_key TEXT,
+        lease_owner TEXT,
+        lease_expires_at REAL,
+        run_after REAL NOT NULL,
+        last_error TEXT,
+        result_json TEXT,
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL
+    )
+    """)
+    _add_column_if_missing("jobs", "result_json", "TEXT")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_jobs_runnable ON jobs (status, run_after)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_jobs_dedupe ON jobs (dedupe_key, status)"
+    )
+
+    # generation_cache: quiz/deck generations reused for identical requests in a course
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS generation_cache (
+        cache_key TEXT PRIMARY KEY,
+        projectid TEXT NOT NULL,
+        kind TEXT NOT NULL,               -- 'quiz' | 'deck'
+        index_version TEXT NOT NULL,
+        payload_json TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        last_used_at REAL NOT NULL,
+        hits INTEGER NOT NULL DEFAULT 0
+    )
+    """)
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_generation_cache_lru ON generation_cache (last_used_at)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_generation_cache_project ON generation_cache (projectid, index_version)"
+    )
+
+    # question_bank: generated quiz questions per course, sampled into new quizzes
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS question_bank (
+        questionid TEXT PRIMARY KEY,
+        projectid TEXT NOT NULL,
+        topic TEXT NOT NULL,              -- normalized quiz topic
+        quiz_type TEXT NOT NULL,          -- 'mcq' | 'short' | 'long'
+        sources_key TEXT NOT NULL,        -- sorted fileids the questions were generated from
+        index_version TEXT NOT NULL,
+        question_hash TEXT NOT NULL,
+        question_json TEXT NOT NULL,
+        answer_json TEXT NOT NULL,
+        explanation TEXT,
+        created_at REAL NOT NULL,
+        UNIQUE (projectid, topic, quiz_type, sources_key, index_version, question_hash)
+    )
+    """)
+    # question_bank_served: which bank questions each user has already been given
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS question_bank_served (
+        userid TEXT NOT NULL,
+        questionid TEXT NOT NULL,
+        served_at REAL NOT NULL,
+        PRIMARY KEY (userid, questionid)
+    )
+    """)
+
+    # card_lsh: MinHash band buckets of each card, to find near-duplicates in a course
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS card_lsh (
+        projectid TEXT NOT NULL,
+        band INTEGER NOT NULL,
+        bucket INTEGER NOT NULL,
+        cardid TEXT NOT NULL
+    )
+    """)
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_card_lsh_bucket ON card_lsh (projectid, band, bucket)"
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_card_lsh_card ON card_lsh (cardid)")
+
+    # review_log: append-only history of card reviews
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS review_log (
+        logid TEXT PRIMARY KEY,
+        userid TEXT NOT NULL,
+        cardid TEXT NOT NULL,
+        deckid TEXT NOT NULL,
+        projectid TEXT NOT NULL,
+        rating TEXT NOT NULL,             -- 'again' | 'hard' | 'good' | 'easy'
+        prev_interval_days REAL NOT NULL,
+        next_interval_days REAL NOT NULL,
+        elapsed_days REAL,                -- since the previous review; NULL for the first
+        reviewed_at TEXT NOT NULL
+    )
+    """)
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_review_log_card ON review_log (cardid, reviewed_at)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_review_log_user ON review_log (userid, reviewed_at)"
+    )
+    # review_daily: per-user, per-deck daily counts kept up to date with review_log
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS review_daily (
+        userid TEXT NOT NULL,
+        deckid TEXT NOT NULL,
+        projectid TEXT NOT NULL,
+        day TEXT NOT NULL,                -- UTC date, YYYY-MM-DD
+        reviews INTEGER NOT NULL,
+        passes INTEGER NOT NULL,          -- rated anything but 'again'
+        mature_reviews INTEGER NOT NULL,  -- previous interval of 21 days or more
+        mature_passes INTEGER NOT NULL,
+        new_cards INTEGER NOT NULL,       -- first reviews
+        PRIMARY KEY (userid, deckid, day)
+    )
+    """)
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_review_daily_user_day ON review_daily (userid, day)"
+    )
+
     # basic migrations for quizzes table
     cursor.execute("PRAGMA table_info(quizzes)")
     quiz_cols = {row[1] for row in cursor.fetchall()}
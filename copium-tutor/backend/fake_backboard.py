@@ -0,0 +1,363 @@
+"""
+Local stand-in for the subset of the Backboard API the backend uses, for offline
+load and latency testing. Run it and point the backend at it:
+
+    uvicorn fake_backboard:app --port 8100
+    BACKBOARD_BASE_URL=http://127.0.0.1:8100/api BACKBOARD_API_KEY=fake uvicorn main:app
+
+Behaviour is tuned through the environment (or at runtime with POST /api/_config):
+- FAKE_BACKBOARD_LATENCY_MS: base latency added to every request (0)
+- FAKE_BACKBOARD_JITTER_MS: extra uniform random latency (0)
+- FAKE_BACKBOARD_GENERATION_MS: extra latency for add_message (0)
+- FAKE_BACKBOARD_TOKEN_DELAY_MS: delay between streamed chunks (20)
+- FAKE_BACKBOARD_FAILURE_RATE: share of requests answered with a 503 (0)
+- FAKE_BACKBOARD_INDEX_DELAY_S: time until an uploaded document is "indexed" (1)
+"""
+import os
+import re
+import json
+import time
+import uuid
+import random
+import asyncio
+from datetime import datetime, timezone
+from fastapi import FastAPI, APIRouter, Request, UploadFile, File, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+config = {
+    "latency_ms": _env_float("FAKE_BACKBOARD_LATENCY_MS", 0),
+    "jitter_ms": _env_float("FAKE_BACKBOARD_JITTER_MS", 0),
+    "generation_ms": _env_float("FAKE_BACKBOARD_GENERATION_MS", 0),
+    "token_delay_ms": _env_float("FAKE_BACKBOARD_TOKEN_DELAY_MS", 20),
+    "failure_rate": _env_float("FAKE_BACKBOARD_FAILURE_RATE", 0),
+    "index_delay_s": _env_float("FAKE_BACKBOARD_INDEX_DELAY_S", 1),
+}
+
+# in-memory state
+assistants: dict[str, dict] = {}
+threads: dict[str, dict] = {}
+documents: dict[str, dict] = {}
+stats = {"requests": 0, "failures": 0, "messages": 0, "uploads": 0}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+app = FastAPI(title="Fake Backboard")
+api = APIRouter(prefix="/api")
+
+
+@app.middleware("http")
+async def inject_latency_and_failures(request: Request, call_next):
+    if request.url.path.startswith("/api/_"):
+        return await call_next(request)
+    stats["requests"] += 1
+    delay_ms = config["latency_ms"] + random.uniform(0, config["jitter_ms"])
+    if delay_ms > 0:
+        await asyncio.sleep(delay_ms / 1000)
+    if config["failure_rate"] > 0 and random.random() < config["failure_rate"]:
+        stats["failures"] += 1
+        return JSONResponse({"detail": "Injected failure"}, status_code=503)
+    return await call_next(request)
+
+
+# region Assistants & Threads
+@api.post("/assistants")
+async def create_assistant(request: Request):
+    body = await request.json()
+    assistant_id = str(uuid.uuid4())
+    assistants[assistant_id] = {
+        "assistant_id": assistant_id,
+        "name": body.get("name", ""),
+        "description": body.get("description"),
+        "created_at": _now(),
+    }
+    return assistants[assistant_id]
+
+
+@api.get("/assistants/{assistant_id}")
+async def get_assistant(assistant_id: str):
+    if assistant_id not in assistants:
+        raise HTTPException(status_code=404, detail="Assistant not found")
+    return assistants[assistant_id]
+
+
+@api.delete("/assistants/{assistant_id}")
+async def delete_assistant(assistant_id: str):
+    assistants.pop(assistant_id, None)
+    for thread_id in [t for t, v in threads.items() if v["assistant_id"] == assistant_id]:
+        threads.pop(thread_id, None)
+    return {"message": "Assistant deleted"}
+
+
+@api.post("/assistants/{assistant_id}/threads")
+async def create_thread(assistant_id: str):
+    if assistant_id not in assistants:
+        raise HTTPException(status_code=404, detail="Assistant not found")
+    thread_id = str(uuid.uuid4())
+    threads[thread_id] = {
+        "thread_id": thread_id,
+        "assistant_id": assistant_id,
+        "created_at": _now(),
+        "documents": [],
+    }
+    return _thread_payload(threads[thread_id])
+
+
+def _thread_payload(thread: dict) -> dict:
+    return {"thread_id": thread["thread_id"], "created_at": thread["created_at"], "messages": []}
+
+
+@api.get("/threads/{thread_id}")
+async def get_thread(thread_id: str):
+    if thread_id not in threads:
+        raise HTTPException(status_code=404, detail="Thread not found")
+    return _thread_payload(threads[thread_id])
+
+
+@api.delete("/threads/{thread_id}")
+async def delete_thread(thread_id: str):
+    threads.pop(thread_id, None)
+    return {"message": "Thread deleted"}
+
+
+# endregion
+
+
+# region Documents
+def _document_payload(doc: dict) -> dict:
+    age = time.monotonic() - doc["uploaded_at"]
+    delay = doc["index_delay_s"]
+    if age >= delay:
+        status = "indexed"
+    elif age >= delay / 2:
+        status = "processing"
+    else:
+        status = "pending"
+    return {
+        "document_id": doc["document_id"],
+        "filename": doc["filename"],
+        "status": status,
+        "created_at": doc["created_at"],
+        "file_size_bytes": doc["size"],
+    }
+
+
+@api.post("/threads/{thread_id}/documents")
+async def upload_document(thread_id: str, file: UploadFile = File(...)):
+    if thread_id not in threads:
+        raise HTTPException(status_code=404, detail="Thread not found")
+    content = await file.read()
+    stats["uploads"] += 1
+    document_id = str(uuid.uuid4())
+    documents[document_id] = {
+        "document_id": document_id,
+        "filename": file.filename,
+        "size": len(content),
+        "created_at": _now(),
+        "uploaded_at": time.monotonic(),
+        "index_delay_s": config["index_delay_s"],
+    }
+    threads[thread_id]["documents"].append(document_id)
+    return _document_payload(documents[document_id])
+
+
+@api.get("/threads/{thread_id}/documents")
+async def list_thread_documents(thread_id: str):
+    if thread_id not in threads:
+        raise HTTPException(status_code=404, detail="Thread not found")
+    return [_document_payload(documents[d]) for d in threads[thread_id]["documents"]]
+
+
+@api.get("/documents/{document_id}/status")
+async def get_document_status(document_id: str):
+    if document_id not in documents:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return _document_payload(documents[document_id])
+
+
+# endregion
+
+
+# region Messages
+_CANNED_TERMS = [
+    ("osmosis", "water moving across a membrane toward higher solute concentration"),
+    ("mitosis", "one nucleus dividing into two identical daughter nuclei"),
+    ("entropy", "a measure of how many microstates fit a macrostate"),
+    ("inflation", "a general rise in prices that erodes purchasing power"),
+    ("recursion", "a function defined in terms of smaller calls to itself"),
+    ("photosynthesis", "plants turning light, water and CO2 into glucose"),
+    ("supply curve", "how much sellers offer at each possible price"),
+    ("half-life", "the time for half of a radioactive sample to decay"),
+    ("big-O notation", "an upper bound on how running time grows with input"),
+    ("natural selection", "heritable traits that aid survival becoming common"),
+    ("Ohm's law", "voltage equals current times resistance"),
+    ("opportunity cost", "the value of the best alternative given up"),
+]
+
+
+def _canned_flashcards(prompt: str) -> str:
+    # distinct cards, but the same ones every call: a second deck on a course
+    # shows the duplicate filter at work
+    cards = [
+        {
+            "front": f"What is {term}?",
+            "back": f"{meaning[0].upper()}{meaning[1:]}.",
+            "external": False,
+            "note": "",
+        }
+        for term, meaning in _CANNED_TERMS
+    ]
+    return json.dumps({"ok": True, "mode": "grounded", "confidence": 80, "cards": cards}, indent=2)
+
+
+def _canned_questions(quiz_type: str, count: int, offset: int = 0, label: str = "") -> dict:
+    questions, answers, explanations = [], {}, {}
+    for i in range(offset, offset + count):
+        qid = f"q{i + 1}"
+        item = {"id": qid, "type": quiz_type, "question": f"Stand-in {label}question {i + 1}?"}
+        if quiz_type == "mcq":
+            item["choices"] = [f"Option {c} for question {i + 1}" for c in "ABCD"]
+            answers[qid] = i % 4
+        else:
+            answers[qid] = f"Model answer for question {i + 1}."
+        questions.append(item)
+        explanations[qid] = f"Because of reason {i + 1}."
+    return {"questions": questions, "answers": answers, "explanations": explanations}
+
+
+def _canned_quiz(prompt: str) -> str:
+    count_match = re.search(r"Number of questions:\s*(\d+)", prompt)
+    type_match = re.search(r"Quiz type:\s*(\w+)", prompt)
+    count = int(count_match.group(1)) if count_match else 5
+    quiz_type = type_match.group(1).lower() if type_match else "mcq"
+    # continue numbering after questions the prompt says already exist
+    _, _, existing = prompt.partition("Do not repeat any of these existing questions:")
+    offset = len(re.findall(r"^- ", existing, re.M))
+    quiz = _canned_questions(quiz_type, count, offset)
+    # answers and explanations go inside each question, as the prompt asks
+    for q in quiz["questions"]:
+        q["answer"] = quiz["answers"][q["id"]]
+        q["explanation"] = quiz["explanations"][q["id"]]
+    return json.dumps({"questions": quiz["questions"]}, indent=2)
+
+
+def _canned_quiz_batch(prompt: str) -> str:
+    quizzes = []
+    for key, topic, quiz_type, count in re.findall(
+        r"^- (quiz\d+): topic: (.*?); type: (\w+); questions: (\d+)", prompt, re.M
+    ):
+        quiz = _canned_questions(quiz_type, int(count), label=f"{topic} ")
+        quizzes.append({"key": key, **quiz})
+    return json.dumps({"quizzes": quizzes}, indent=2)
+
+
+def _canned_reply(content: str) -> str:
+    if "study flashcards" in content:
+        return _canned_flashcards(content)
+    if "several quizzes at once" in content:
+        return _canned_quiz_batch(content)
+    if "generating quizzes" in content:
+        return _canned_quiz(content)
+    return "## Short answer\nThis is the stand-in tutor.\n\n## Details\n- Point one\n- Point two"
+
+
+async def _read_message_request(request: Request) -> dict:
+    if request.headers.get("content-type", "").startswith("application/json"):
+        return await request.json()
+    form = await request.form()
+    data = dict(form)
+    data["stream"] = str(data.get("stream", "false")).lower() == "true"
+    return data
+
+
+def _chunks(text: str, size: int = 24):
+    for i in range(0, len(text), size):
+        yield text[i : i + size]
+
+
+@api.post("/threads/messages")
+async def add_message(request: Request):
+    data = await _read_message_request(request)
+    thread_id = str(data.get("thread_id") or "")
+    if thread_id not in threads:
+        raise HTTPException(status_code=404, detail="Thread not found")
+    stats["messages"] += 1
+    reply = _canned_reply(str(data.get("content") or ""))
+    if config["generation_ms"] > 0:
+        await asyncio.sleep(config["generation_ms"] / 1000)
+
+    message = {
+        "message_id": str(uuid.uuid4()),
+        "thread_id": thread_id,
+        "assistant_id": threads[thread_id]["assistant_id"],
+        "role": "assistant",
+        "status": "COMPLETED",
+        "content": reply,
+        "created_at": _now(),
+    }
+
+    if not data.get("stream"):
+        return {"messages": [message]}
+
+    async def events():
+        for chunk in _chunks(reply):
+            yield f"data: {json.dumps({'type': 'content_streaming', 'content': chunk})}\n\n"
+            if config["token_delay_ms"] > 0:
+                await asyncio.sleep(config["token_delay_ms"] / 1000)
+        yield f"data: {json.dumps({'type': 'message_complete', **message})}\n\n"
+        yield f"data: {json.dumps({'type': 'run_ended', 'status': 'completed'})}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+# endregion
+
+
+# region Control
+@api.get("/_config")
+async def get_config():
+    return {"config": config, "stats": stats}
+
+
+@api.post("/_config")
+async def update_config(body: dict):
+    for key, value in body.items():
+        if key in config:
+            config[key] = float(value)
+    return {"config": config}
+
+
+@api.post("/_reset")
+async def reset():
+    assistants.clear()
+    threads.clear()
+    documents.clear()
+    for key in stats:
+        stats[key] = 0
+    return {"success": True}
+
+
+# endregion
+
+app.include_router(api)
+
+
+if __name__ == "__main__":
+    import argparse
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run the fake Backboard server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    args = parser.parse_args()
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
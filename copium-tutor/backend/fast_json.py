@@ -0,0 +1,17 @@
+import orjson
+from fastapi.responses import JSONResponse
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+class FastJSONResponse(JSONResponse):
+    """orjson-backed JSON response; the app's default response class."""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=_ORJSON_OPTIONS)
+
+
+def dumps_text(value) -> str:
+    """json.dumps replacement for TEXT columns."""
+    return orjson.dumps(value, option=_ORJSON_OPTIONS).decode()
+
@@ -0,0 +1,102 @@
+import os
+import re
+import time
+import hashlib
+import orjson
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+# Cached quiz/deck generations, shared by every user of a course.
+GENERATION_CACHE_TTL_S = _env_float("GENERATION_CACHE_TTL_S", 24 * 3600)
+GENERATION_CACHE_MAX_ENTRIES = int(_env_float("GENERATION_CACHE_MAX_ENTRIES", 2000))
+GENERATION_CACHE_ENABLED = os.getenv("GENERATION_CACHE", "1") == "1"
+
+
+def project_index_version(db_cursor, projectid: str) -> str:
+    """
+    Hash of the content hashes of the files indexed for a course. It changes
+    whenever a document is (re)indexed or the course memory is reset, so cache
+    entries made against older documents are never served.
+    """
+    db_cursor.execute(
+        "SELECT fileid, content_hash FROM indexed_files WHERE projectid=? ORDER BY fileid, content_hash",
+        (projectid,),
+    )
+    rows = db_cursor.fetchall()
+    if not rows:
+        return "none"
+    h = hashlib.sha256()
+    for fileid, content_hash in rows:
+        h.update(f"{fileid}:{content_hash};".encode())
+    return h.hexdigest()[:16]
+
+
+def normalize_prompt(text: str) -> str:
+    """"Midterm review!" and "  midterm   REVIEW " map to the same key."""
+    text = re.sub(r"\s+", " ", (text or "").lower()).strip()
+    return text.strip(" .!?,;:")
+
+
+def generation_cache_key(projectid: str, index_version: str, kind: str, prompt: str) -> str:
+    parts = [projectid, index_version, kind, normalize_prompt(prompt)]
+    return hashlib.sha256("\x1f".join(parts).encode()).hexdigest()
+
+
+def get_cached_generation(db_conn, key: str):
+    """Returns the cached payload (and bumps its LRU position), or None."""
+    if not GENERATION_CACHE_ENABLED:
+        return None
+    now = time.time()
+    row = db_conn.execute(
+        "SELECT payload_json FROM generation_cache WHERE cache_key=? AND created_at>=?",
+        (key, now - GENERATION_CACHE_TTL_S),
+    ).fetchone()
+    if row is None:
+        return None
+    db_conn.execute(
+        "UPDATE generation_cache SET last_used_at=?, hits=hits+1 WHERE cache_key=?",
+        (now, key),
+    )
+    db_conn.commit()
+    return orjson.loads(row[0])
+
+
+def put_cached_generation(
+    db_conn, key: str, projectid: str, index_version: str, kind: str, payload
+):
+    if not GENERATION_CACHE_ENABLED:
+        return
+    now = time.time()
+    db_conn.execute(
+        """
+        INSERT OR REPLACE INTO generation_cache
+            (cache_key, projectid, kind, index_version, payload_json, created_at, last_used_at, hits)
+        VALUES (?, ?, ?, ?, ?, ?, ?, 0)
+        """,
+        (key, projectid, kind, index_version, orjson.dumps(payload).decode(), now, now),
+    )
+    # entries for documents the course no longer has, expired ones, then LRU overflow
+    db_conn.execute(
+        "DELETE FROM generation_cache WHERE projectid=? AND index_version<>?",
+        (projectid, index_version),
+    )
+    db_conn.execute(
+        "DELETE FROM generation_cache WHERE created_at<?", (now - GENERATION_CACHE_TTL_S,)
+    )
+    db_conn.execute(
+        """
+        DELETE FROM generation_cache WHERE cache_key IN (
+            SELECT cache_key FROM generation_cache
+            ORDER BY last_used_at DESC
+            LIMIT -1 OFFSET ?
+        )
+        """,
+        (GENERATION_CACHE_MAX_ENTRIES,),
+    )
+    db_conn.commit()
@@ -0,0 +1,429 @@
+import os
+import json
+import time
+import uuid
+import socket
+import asyncio
+import logging
+from datetime import datetime, timezone
+from db import connect_db
+from log_config import request_id_var
+
+logger = logging.getLogger(__name__)
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+# Global cap on jobs running at once in one worker.
+JOB_CONCURRENCY = int(_env_float("GENERATION_CONCURRENCY", 4))
+# A claimed job belongs to its worker until the lease expires; heartbeats extend it.
+JOB_LEASE_S = _env_float("JOB_LEASE_S", 60)
+JOB_POLL_INTERVAL_S = _env_float("JOB_POLL_INTERVAL_S", 1)
+JOB_RETRY_DELAY_S = _env_float("JOB_RETRY_DELAY_S", 5)
+# Cap on LLM generations (quizzes, quiz batches and decks together) running at
+# once across every worker process.
+GENERATION_MAX_IN_FLIGHT = int(_env_float("GENERATION_MAX_IN_FLIGHT", 8))
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def enqueue_job(
+    db_cursor,
+    db_conn,
+    kind: str,
+    payload: dict,
+    dedupe_key: str | None = None,
+    max_attempts: int = 3,
+    commit: bool = True,
+) -> str:
+    """
+    Persists a job and returns its id. With a dedupe_key, an already queued or
+    running job with the same key is returned instead of adding a second one.
+    """
+    if dedupe_key:
+        db_cursor.execute(
+            "SELECT jobid FROM jobs WHERE dedupe_key=? AND status IN ('queued', 'running')",
+            (dedupe_key,),
+        )
+        row = db_cursor.fetchone()
+        if row:
+            return row[0]
+
+    jobid = uuid.uuid4().hex[:12]
+    now = _now_iso()
+    db_cursor.execute(
+        """
+        INSERT INTO jobs (jobid, kind, payload_json, status, attempts, max_attempts,
+                          dedupe_key, run_after, created_at, updated_at)
+        VALUES (?, ?, ?, 'queued', 0, ?, ?, ?, ?, ?)
+        """,
+        (jobid, kind, json.dumps(payload), max_attempts, dedupe_key, time.time(), now, now),
+    )
+    if commit:
+        db_conn.commit()
+    _wake_local_worker()
+    return jobid
+
+
+def get_job(db_cursor, jobid: str) -> dict | None:
+    db_cursor.execute(
+        """
+        SELECT jobid, kind, status, attempts, max_attempts, last_error, created_at, updated_at,
+               result_json, payload_json
+        FROM jobs WHERE jobid=?
+        """,
+        (jobid,),
+    )
+    r = db_cursor.fetchone()
+    if r is None:
+        return None
+    return {
+        "jobid": r[0],
+        "kind": r[1],
+        "status": r[2],
+        "attempts": r[3],
+        "max_attempts": r[4],
+        "last_error": r[5],
+        "created_at": r[6],
+        "updated_at": r[7],
+        "result": json.loads(r[8]) if r[8] else None,
+        "payload": json.loads(r[9] or "{}"),
+    }
+
+
+def claim_job(
+    db_conn, owner: str, kinds, limits: dict[tuple[str, ...], int] | None = None
+) -> tuple[str, str, dict, int] | None:
+    """
+    Atomically leases the oldest runnable job of the given kinds. `limits` maps a
+    tuple of kinds to how many jobs of those kinds, together, may be running at
+    once across all workers.
+    """
+    kinds = list(kinds)
+    now = time.time()
+    db_conn.execute("BEGIN IMMEDIATE")
+    try:
+        if limits:
+            running = dict(
+                db_conn.execute(
+                    "SELECT kind, COUNT(*) FROM jobs WHERE status='running' GROUP BY kind"
+                ).fetchall()
+            )
+            full = {
+                kind
+                for group, cap in limits.items()
+                if sum(running.get(k, 0) for k in group) >= cap
+                for kind in group
+            }
+            kinds = [k for k in kinds if k not in full]
+        if not kinds:
+            db_conn.commit()
+            return None
+        placeholders = ",".join(["?"] * len(kinds))
+        row = db_conn.execute(
+            f"""
+            SELECT jobid, kind, payload_json, attempts FROM jobs
+            WHERE status='queued' AND run_after<=? AND kind IN ({placeholders})
+            ORDER BY run_after, created_at
+            LIMIT 1
+            """,
+            (now, *kinds),
+        ).fetchone()
+        if row is None:
+            db_conn.commit()
+            return None
+        jobid, kind, payload_json, attempts = row
+        db_conn.execute(
+            """
+            UPDATE jobs
+            SET status='running', lease_owner=?, lease_expires_at=?, attempts=attempts+1, updated_at=?
+            WHERE jobid=?
+            """,
+            (owner, now + JOB_LEASE_S, _now_iso(), jobid),
+        )
+        db_conn.commit()
+    except Exception:
+        db_conn.rollback()
+        raise
+    return jobid, kind, json.loads(payload_json or "{}"), attempts + 1
+
+
+def heartbeat_job(db_conn, jobid: str, owner: str) -> bool:
+    cur = db_conn.execute(
+        """
+        UPDATE jobs SET lease_expires_at=?, updated_at=?
+        WHERE jobid=? AND lease_owner=? AND status='running'
+        """,
+        (time.time() + JOB_LEASE_S, _now_iso(), jobid, owner),
+    )
+    db_conn.commit()
+    return cur.rowcount > 0
+
+
+def complete_job(db_conn, jobid: str, owner: str, result=None) -> bool:
+    """Marks the job done if `owner` still holds its lease. Returns whether it did."""
+    cur = db_conn.execute(
+        """
+        UPDATE jobs
+        SET status='done', result_json=?, lease_owner=NULL, lease_expires_at=NULL, updated_at=?
+        WHERE jobid=? AND lease_owner=? AND status='running'
+        """,
+        (json.dumps(result) if result is not None else None, _now_iso(), jobid, owner),
+    )
+    db_conn.commit()
+    return cur.rowcount > 0
+
+
+def fail_job(db_conn, jobid: str, owner: str, error: str, attempts: int, max_attempts: int) -> bool:
+    """
+    Requeues the job with a delay, or marks it failed, if `owner` still holds its
+    lease. Returns True if it gave up (False as well when the lease was lost).
+    """
+    give_up = attempts >= max_attempts
+    cur = db_conn.execute(
+        """
+        UPDATE jobs
+        SET status=?, last_error=?, lease_owner=NULL, lease_expires_at=NULL, run_after=?, updated_at=?
+        WHERE jobid=? AND lease_owner=? AND status='running'
+        """,
+        (
+            "failed" if give_up else "queued",
+            error[:2000],
+            time.time() + JOB_RETRY_DELAY_S * attempts,
+            _now_iso(),
+            jobid,
+            owner,
+        ),
+    )
+    db_conn.commit()
+    return give_up and cur.rowcount > 0
+
+
+def recover_abandoned_jobs(db_conn) -> list[tuple[str, str, dict]]:
+    """
+    Requeues running jobs whose lease expired (their worker crashed or was killed).
+    Jobs that already used all attempts are marked failed and returned so the
+    caller can run the kind's give-up hook.
+    """
+    now = time.time()
+    db_conn.execute("BEGIN IMMEDIATE")
+    try:
+        expired = db_conn.execute(
+            """
+            SELECT jobid, kind, payload_json, attempts, max_attempts FROM jobs
+            WHERE status='running' AND lease_expires_at < ?
+            """,
+            (now,),
+        ).fetchall()
+        given_up = []
+        for jobid, kind, payload_json, attempts, max_attempts in expired:
+            if attempts >= max_attempts:
+                status = "failed"
+                given_up.append((jobid, kind, json.loads(payload_json or "{}")))
+            else:
+                status = "queued"
+            db_conn.execute(
+                """
+                UPDATE jobs
+                SET status=?, last_error=?, lease_owner=NULL, lease_expires_at=NULL, run_after=?, updated_at=?
+                WHERE jobid=?
+                """,
+                (status, "Lease expired (worker stopped)", now, _now_iso(), jobid),
+            )
+        db_conn.commit()
+    except Exception:
+        db_conn.rollback()
+        raise
+    if expired:
+        logger.warning("Recovered %d abandoned job(s)", len(expired))
+    return given_up
+
+
+class JobHandler:
+    def __init__(
+        self,
+        run,
+        on_give_up=None,
+        max_in_flight: int | None = None,
+        in_flight_group: str | None = None,
+    ):
+        # run(payload) does the work and may return a JSON-able result;
+        # on_give_up(payload, error) cleans up after the last attempt;
+        # max_in_flight caps running jobs of this kind across all workers, or of
+        # all kinds with the same in_flight_group together
+        self.run = run
+        self.on_give_up = on_give_up
+        self.max_in_flight = max_in_flight
+        self.in_flight_group = in_flight_group
+
+
+class JobWorker:
+    """
+    Claims jobs from the jobs table and runs them with at most `concurrency` in
+    flight. Leases are renewed by a heartbeat while a job runs, so a crashed
+    worker's jobs are picked up again once their lease expires.
+    """
+
+    def __init__(self, handlers: dict[str, JobHandler], concurrency: int = JOB_CONCURRENCY):
+        self.handlers = handlers
+        self.concurrency = max(1, concurrency)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._db = None
+        self._loop_task = None
+        self._running: set[asyncio.Task] = set()
+        self._wake = None
+        self._stopping = False
+
+    def notify(self):
+        if self._wake is not None:
+            self._wake.set()
+
+    def start(self):
+        global _local_worker
+        self._db = connect_db()
+        self._wake = asyncio.Event()
+        self._stopping = False
+        for jobid, kind, payload in recover_abandoned_jobs(self._db):
+            self._spawn_give_up(kind, payload, "Lease expired (worker stopped)")
+        self._loop_task = asyncio.create_task(self._loop())
+        _local_worker = self
+        logger.info("Job worker %s started (concurrency=%d)", self.owner, self.concurrency)
+
+    async def stop(self, timeout_s: float = 10):
+        global _local_worker
+        self._stopping = True
+        if _local_worker is self:
+            _local_worker = None
+        if self._loop_task:
+            self._loop_task.cancel()
+            try:
+                await self._loop_task
+            except asyncio.CancelledError:
+                pass
+        if self._running:
+            await asyncio.wait(self._running, timeout=timeout_s)
+        for task in list(self._running):
+            task.cancel()
+        # unfinished jobs go straight back to the queue instead of waiting for the lease
+        if self._db is not None:
+            self._db.execute(
+                """
+                UPDATE jobs SET status='queued', lease_owner=NULL, lease_expires_at=NULL,
+                       attempts=MAX(attempts-1, 0), updated_at=?
+                WHERE status='running' AND lease_owner=?
+                """,
+                (_now_iso(), self.owner),
+            )
+            self._db.commit()
+            self._db.close()
+            self._db = None
+
+    async def run_forever(self):
+        self.start()
+        try:
+            await self._loop_task
+        finally:
+            await self.stop()
+
+    async def _loop(self):
+        last_recovery = time.monotonic()
+        groups: dict[str, tuple[list[str], int]] = {}
+        for kind, h in self.handlers.items():
+            if h.max_in_flight:
+                groups.setdefault(h.in_flight_group or kind, ([], h.max_in_flight))[0].append(kind)
+        limits = {tuple(kinds): cap for kinds, cap in groups.values()}
+        while not self._stopping:
+            try:
+                while len(self._running) < self.concurrency:
+                    claimed = claim_job(self._db, self.owner, self.handlers.keys(), limits)
+                    if claimed is None:
+                        break
+                    task = asyncio.create_task(self._run_job(*claimed))
+                    self._running.add(task)
+                    task.add_done_callback(self._job_finished)
+
+                if time.monotonic() - last_recovery >= JOB_LEASE_S / 2:
+                    last_recovery = time.monotonic()
+                    for jobid, kind, payload in recover_abandoned_jobs(self._db):
+                        self._spawn_give_up(kind, payload, "Lease expired (worker stopped)")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception("Job worker loop error: %s", e)
+
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=JOB_POLL_INTERVAL_S)
+            except asyncio.TimeoutError:
+                pass
+
+    def _job_finished(self, task: asyncio.Task):
+        self._running.discard(task)
+        self.notify()
+
+    def _spawn_give_up(self, kind: str, payload: dict, error: str):
+        handler = self.handlers.get(kind)
+        if handler is None or handler.on_give_up is None:
+            return
+        task = asyncio.create_task(handler.on_give_up(payload, error))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _heartbeat(self, jobid: str, on_lost):
+        while True:
+            await asyncio.sleep(JOB_LEASE_S / 3)
+            if not heartbeat_job(self._db, jobid, self.owner):
+                logger.warning("Lost lease on job %s, stopping it", jobid)
+                on_lost()
+                return
+
+    async def _run_job(self, jobid: str, kind: str, payload: dict, attempts: int):
+        handler = self.handlers[kind]
+        # log records of the job carry its id (each job runs in its own task)
+        request_id_var.set(f"job-{jobid}")
+        # another worker reclaimed the job (our lease expired): stop, so the
+        # two do not write the same deck or quiz
+        job_task = asyncio.current_task()
+        lease_lost = False
+
+        def on_lease_lost():
+            nonlocal lease_lost
+            lease_lost = True
+            job_task.cancel()
+
+        heartbeat = asyncio.create_task(self._heartbeat(jobid, on_lease_lost))
+        try:
+            result = await handler.run(payload)
+        except asyncio.CancelledError:
+            if lease_lost:
+                return
+            raise
+        except Exception as e:
+            logger.exception("Job %s (%s) failed: %s", jobid, kind, e)
+            error = f"{type(e).__name__}: {e}"
+            row = self._db.execute("SELECT max_attempts FROM jobs WHERE jobid=?", (jobid,)).fetchone()
+            max_attempts = row[0] if row else attempts
+            if fail_job(self._db, jobid, self.owner, error, attempts, max_attempts):
+                if handler.on_give_up is not None:
+                    await handler.on_give_up(payload, error)
+            return
+        finally:
+            heartbeat.cancel()
+        if not complete_job(self._db, jobid, self.owner, result):
+            logger.warning("Job %s finished after its lease was lost; result dropped", jobid)
+
+
+# worker running in this process, if any (lets enqueue_job skip the poll delay)
+_local_worker: JobWorker | None = None
+
+
+def _wake_local_worker():
+    if _local_worker is not None:
+        _local_worker.notify()
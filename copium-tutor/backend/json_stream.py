@@ -0,0 +1,223 @@
+"""
+Tolerant JSON parsing for LLM output, in one pass and usable on streamed tokens.
+
+Model replies are "almost JSON": wrapped in ``` fences or prose, with raw newlines
+inside strings, trailing commas, or cut off mid-way. TolerantJsonParser reads the
+first JSON object/array it finds and accepts all of those:
+- text around the value is ignored; the value is the first { or [ inside a ```
+  fence, else the first {, else (once the whole reply is in) the first [, so a
+  bracket in prose before the JSON ("Here are [10] cards:") is not taken for it
+- control characters inside strings are kept as-is (strict=False)
+- stray commas and colons are ignored
+- when the input ends early, open containers are closed and items of an array
+  that were not finished are dropped
+
+    parser = TolerantJsonParser(item_key="cards")
+    for chunk in chunks:
+        for card in parser.feed(chunk):   # each element of "cards" once complete
+            ...
+    payload = parser.result()
+"""
+import re
+import json
+from json.decoder import scanstring
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_NUMBER = re.compile(r"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][-+]?\d+)?")
+_LITERALS = {"true": True, "false": False, "null": None}
+_START = re.compile(r"[{\[]")
+_FENCE = "```"
+_STRING_BODY = re.compile(r'((?:[^"\\]|\\.)*)"', re.S)
+_LENIENT_DECODER = json.JSONDecoder(strict=False)
+
+
+class TolerantJsonParser:
+    def __init__(self, item_key: str | None = None):
+        # elements of the first array stored under item_key are returned by feed()
+        self.item_key = item_key
+        self.text = ""  # everything fed so far
+        self.done = False
+        self._buf = ""
+        self._pos = 0
+        self._root = None
+        self._started = False
+        # open containers: [container, pending dict key]
+        self._stack: list[list] = []
+        self._items = None  # the watched array, once opened
+
+    def feed(self, chunk: str) -> list:
+        self.text += chunk
+        if self.done:
+            return []
+        self._buf += chunk
+        items = self._parse(final=False)
+        # drop consumed input so long streams stay cheap
+        if self._started and self._pos > 1024:
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+        return items
+
+    def result(self):
+        """Best-effort value of everything fed so far (closes what is still open)."""
+        if not self.done:
+            self._parse(final=True)
+            # unfinished elements of arrays are incomplete records: drop them
+            for i in range(len(self._stack) - 1, 0, -1):
+                parent = self._stack[i - 1][0]
+                if isinstance(parent, list) and parent and parent[-1] is self._stack[i][0]:
+                    parent.pop()
+            self._stack.clear()
+            self.done = True
+        return self._root
+
+    def _parse(self, final: bool) -> list:
+        items = []
+        buf = self._buf
+        pos = self._pos
+        end = len(buf)
+
+        if not self._started:
+            start = _json_start(buf, final)
+            if start is None:
+                return items  # keep the prose: a fence or { may still follow
+            pos = start
+            self._started = True
+
+        stack = self._stack
+        while pos < end:
+            pos = _WHITESPACE.match(buf, pos).end()
+            if pos >= end:
+                break
+            ch = buf[pos]
+
+            if ch == "{" or ch == "[":
+                container = {} if ch == "{" else []
+                if (
+                    ch == "["
+                    and self._items is None
+                    and self.item_key is not None
+                    and stack
+                    and stack[-1][1] == self.item_key
+                ):
+                    self._items = container
+                self._add_value(container)
+                if self._root is None:
+                    self._root = container
+                stack.append([container, None])
+                pos += 1
+
+            elif ch == "}" or ch == "]":
+                pos += 1
+                if stack:
+                    closed = stack.pop()[0]
+                    if stack and stack[-1][0] is self._items and self._items is not closed:
+                        items.append(closed)
+                if not stack:
+                    self.done = True
+                    break
+
+            elif ch == "," or ch == ":":
+                pos += 1
+
+            elif ch == '"':
+                if buf.find('"', pos + 1) < 0:
+                    break  # string not closed yet; avoids a costly decode error
+                try:
+                    value, pos = scanstring(buf, pos + 1, False)
+                except json.JSONDecodeError as e:
+                    if e.msg.startswith("Unterminated"):
+                        break  # wait for more input (or it was truncated)
+                    # invalid escape such as "\d": keep the string body as written
+                    m = _STRING_BODY.match(buf, pos + 1)
+                    if m is None:
+                        break
+                    value, pos = m.group(1).replace('\\"', '"'), m.end()
+                top = stack[-1] if stack else None
+                if top is not None and isinstance(top[0], dict) and top[1] is None:
+                    top[1] = value
+                else:
+                    self._add_scalar(value, items)
+
+            else:
+                m = _NUMBER.match(buf, pos)
+                if m is not None:
+                    if m.end() == end and not final:
+                        break  # the number may continue in the next chunk
+                    text = m.group()
+                    value = float(text) if any(c in text for c in ".eE") else int(text)
+                    self._add_scalar(value, items)
+                    pos = m.end()
+                    continue
+                word = next((w for w in _LITERALS if buf.startswith(w, pos)), None)
+                if word is not None:
+                    self._add_scalar(_LITERALS[word], items)
+                    pos += len(word)
+                    continue
+                rest = buf[pos:end]
+                if not final and (rest == "-" or any(w.startswith(rest) for w in _LITERALS)):
+                    break  # a number or literal split across chunks
+                pos += 1  # junk (prose, ellipsis, ...): skip it
+
+        self._pos = pos
+        return items
+
+    def _add_value(self, value):
+        if not self._stack:
+            return
+        top = self._stack[-1]
+        container = top[0]
+        if isinstance(container, list):
+            container.append(value)
+        elif top[1] is not None:
+            container[top[1]] = value
+            top[1] = None
+        # a value without a key inside an object is dropped
+
+    def _add_scalar(self, value, items: list):
+        self._add_value(value)
+        if self._items is not None and self._stack and self._stack[-1][0] is self._items:
+            items.append(value)
+
+
+def _json_start(text: str, final: bool) -> int | None:
+    """
+    Where the JSON value of a reply starts, or None if it is not known yet (or,
+    when final, there is none). A top-level array is only taken once the whole
+    reply is in and it has no object, since an earlier [ may just be prose.
+    """
+    brace = text.find("{")
+    fence = text.find(_FENCE)
+    if fence >= 0 and (brace < 0 or fence < brace):
+        m = _START.search(text, fence + len(_FENCE))
+        if m is not None:
+            return m.start()
+        if not final:
+            return None
+    if brace >= 0:
+        return brace
+    if not final:
+        return None
+    bracket = text.find("[")
+    return bracket if bracket >= 0 else None
+
+
+def parse_tolerant_json(raw):
+    """
+    Parses the JSON object/array in an LLM reply, or returns None if there is none.
+    Well-formed replies (even fenced or with raw newlines) take the C decoder; the
+    tolerant parser only runs when that fails.
+    """
+    if raw is None:
+        return None
+    if not isinstance(raw, str):
+        raw = str(raw)
+    start = _json_start(raw, final=True)
+    if start is None:
+        return None
+    try:
+        return _LENIENT_DECODER.raw_decode(raw, start)[0]
+    except json.JSONDecodeError:
+        pass
+    parser = TolerantJsonParser()
+    parser.feed(raw[start:])
+    return parser.result()
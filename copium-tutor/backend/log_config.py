@@ -0,0 +1,160 @@
+"""
+Application logging: one JSON object per line, written from a background thread
+so request handlers never block on stdout/stderr.
+
+    LOG_LEVEL=INFO                           default level for app modules
+    LOG_LEVELS=jobs=DEBUG,backboard_ops=WARNING   per-module overrides
+    LOG_FORMAT=json|text                     text is easier to read locally
+    LOG_PAYLOAD_SAMPLE_RATE=0.05             share of large payloads (raw LLM
+    LOG_PAYLOAD_MAX_CHARS=500                replies, ...) logged, and how much
+
+Every record carries the id of the HTTP request (X-Request-ID) or job it was
+logged from; extra={...} fields are added to the JSON object.
+"""
+import os
+import sys
+import uuid
+import atexit
+import queue
+import random
+import logging
+import logging.handlers
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+import orjson
+
+# id of the request (or job) being handled by the current task
+request_id_var: ContextVar[str | None] = ContextVar("request_id", default=None)
+
+LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0.05"))
+LOG_PAYLOAD_MAX_CHARS = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", "500"))
+
+# attributes every LogRecord has; anything else came in through extra={...}
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+_listener: logging.handlers.QueueListener | None = None
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and key != "request_id":
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry, default=str).decode()
+
+
+class _RequestIdFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        # runs in the logging call, while the request's context is still current
+        record.request_id = request_id_var.get()
+        return True
+
+
+class _ContextQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # keep extra fields (QueueHandler.prepare folds everything into msg)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def payload_for_log(text) -> dict:
+    """
+    Summary of a large payload for extra={...}: always its size, and for a
+    sample of calls (LOG_PAYLOAD_SAMPLE_RATE) the first LOG_PAYLOAD_MAX_CHARS.
+    """
+    text = text if isinstance(text, str) else str(text)
+    summary = {"chars": len(text)}
+    if random.random() < LOG_PAYLOAD_SAMPLE_RATE:
+        summary["head"] = text[:LOG_PAYLOAD_MAX_CHARS]
+    return summary
+
+
+def _parse_levels(spec: str) -> dict[str, str]:
+    levels = {}
+    for item in spec.split(","):
+        name, _, level = item.partition("=")
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging():
+    """Installs the queue handler on the root logger (once per process)."""
+    global _listener
+    if _listener is not None:
+        return
+
+    stream = logging.StreamHandler(sys.stderr)
+    if os.getenv("LOG_FORMAT", "json") == "text":
+        stream.setFormatter(
+            logging.Formatter("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s")
+        )
+    else:
+        stream.setFormatter(JsonFormatter())
+
+    log_queue: queue.Queue = queue.Queue(-1)
+    handler = _ContextQueueHandler(log_queue)
+    handler.addFilter(_RequestIdFilter())
+
+    root = logging.getLogger()
+    root.addHandler(handler)
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    # one INFO line per HTTP call to Backboard is noise unless asked for
+    levels = {"httpx": "WARNING", **_parse_levels(os.getenv("LOG_LEVELS", ""))}
+    for name, level in levels.items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+class RequestIdMiddleware:
+    """
+    ASGI middleware: takes X-Request-ID from the request (or makes one), makes
+    it available to log records and echoes it in the response.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", ()):
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex[:12]
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", ()))
+                headers.append((b"x-request-id", request_id.encode("latin-1")))
+                message["headers"] = headers
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id_var.reset(token)
@@ -11,20 +11,62 @@ from fastapi import (
     Response,
     Cookie,
     Body,
+    Request,
 )
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from datetime import datetime, timedelta
 import datetime as dt
 from pydantic import BaseModel
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from dotenv import load_dotenv
 import asyncio
-from backboard import BackboardClient
-from backboard.exceptions import BackboardNotFoundError, BackboardServerError
+import orjson
+from backboard.exceptions import BackboardNotFoundError
 from pdf_splitter import split_pdf_to_max_size, MAX_BYTES
-from db import conn, cursor, init_db, DB_PATH
-from backboard_ops import index_project_documents_impl
+from json_stream import TolerantJsonParser, parse_tolerant_json
+from fast_json import FastJSONResponse, dumps_text
+from db import conn, cursor, init_db, connect_db
+from pubsub import PubSub
+from log_config import RequestIdMiddleware, payload_for_log, setup_logging
+from jobs import JobHandler, JobWorker, enqueue_job, get_job, GENERATION_MAX_IN_FLIGHT
+from generation_cache import (
+    generation_cache_key,
+    get_cached_generation,
+    project_index_version,
+    put_cached_generation,
+)
+from question_bank import (
+    QUESTION_BANK_FILL_SIZE,
+    add_questions,
+    assemble_quiz,
+    bank_question_texts,
+    bank_rows_for,
+    mark_served,
+    sample_questions,
+)
+from card_dedupe import (
+    CARD_DEDUPE_THRESHOLD,
+    drop_duplicates,
+    duplicate_clusters,
+    ensure_indexed,
+    index_cards,
+    unindex_cards,
+    unindex_project,
+)
+from review_log import ReviewEntry, daily_stats, log_reviews
+from backboard_client import (
+    get_backboard_client,
+    start_backboard_client,
+    close_backboard_client,
+)
+from backboard_resilience import breaker as backboard_breaker, is_upstream_failure
+from backboard_ops import (
+    index_project_documents_impl,
+    forget_document_statuses,
+    get_file_document_ids,
+    wait_for_documents_ready,
+)
 from typing import Literal, Optional
 
 # endregion
@@ -33,10 +75,11 @@ from typing import Literal, Optional
 load_dotenv(dotenv_path=Path(__file__).resolve().parent / ".env")
 BACKBOARD_API_KEY = os.getenv("BACKBOARD_API_KEY")
 
-logger = logging.getLogger("uvicorn.error")
-logger.setLevel(logging.DEBUG)
+setup_logging()
+logger = logging.getLogger(__name__)
 
-app = FastAPI()
+app = FastAPI(default_response_class=FastJSONResponse)
+app.add_middleware(RequestIdMiddleware)
 salt = bcrypt.gensalt()
 
 init_db()
@@ -44,6 +87,31 @@ init_db()
 PUBLIC_DIR = Path(__file__).resolve().parent / "public"
 PUBLIC_DIR.mkdir(parents=True, exist_ok=True)
 app.mount("/public", StaticFiles(directory=PUBLIC_DIR), name="public")
+
+
+# Generation and indexing jobs normally run in a separate `python -m worker` process;
+# set JOB_WORKER_IN_API=1 to also run a worker inside the API (single-process setups).
+JOB_WORKER_IN_API = os.getenv("JOB_WORKER_IN_API", "0") == "1"
+
+
+@app.on_event("startup")
+async def on_startup():
+    global _quiz_bridge_task
+    await start_backboard_client(BACKBOARD_API_KEY)
+    if JOB_WORKER_IN_API:
+        job_worker.start()
+    _quiz_bridge_task = asyncio.create_task(_quiz_status_bridge())
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    if _quiz_bridge_task is not None:
+        _quiz_bridge_task.cancel()
+    if JOB_WORKER_IN_API:
+        await job_worker.stop()
+    await close_backboard_client()
+
+
 # endregion
 
 
@@ -79,9 +147,27 @@ class FileProjectRelation:
     projectid: str
 
 
+@dataclass
+class CardSchedule:
+    interval_days: float
+    ease: float
+    reps: int
+    lapses: int
+
+    @classmethod
+    def from_row(cls, interval_days, ease, reps, lapses) -> "CardSchedule":
+        return cls(
+            interval_days=float(interval_days) if interval_days is not None else 0.0,
+            ease=float(ease) if ease is not None else 2.5,
+            reps=int(reps) if reps is not None else 0,
+            lapses=int(lapses) if lapses is not None else 0,
+        )
+
+
 class CreateDeckRequest(BaseModel):
     name: str
     prompt: str
+    no_cache: bool = False  # always generate fresh cards
 
 
 class CreateQuizRequest(BaseModel):
@@ -89,6 +175,11 @@ class CreateQuizRequest(BaseModel):
     quiz_type: str
     num_questions: int
     document_ids: list[str] = []
+    no_cache: bool = False  # generate new questions instead of sampling the bank
+
+
+class CreateQuizBatchRequest(BaseModel):
+    quizzes: list[CreateQuizRequest]
 
 
 class SubmitQuizRequest(BaseModel):
@@ -100,6 +191,15 @@ class CreateCardRequest(BaseModel):
     back: str
 
 
+class CreateCardsBulkRequest(BaseModel):
+    cards: list[CreateCardRequest]
+
+
+class DedupeCardsRequest(BaseModel):
+    merge: bool = False  # False only reports the duplicate clusters
+    threshold: float | None = None
+
+
 class UpdateCardRequest(BaseModel):
     front: str | None = None
     back: str | None = None
@@ -109,6 +209,16 @@ class ReviewCardRequest(BaseModel):
     rating: Literal["again", "hard", "good", "easy"]
 
 
+class BatchReviewItem(BaseModel):
+    cardid: str
+    rating: Literal["again", "hard", "good", "easy"]
+    reviewed_at: datetime | None = None  # when the card was flipped (default: now)
+
+
+class BatchReviewRequest(BaseModel):
+    reviews: list[BatchReviewItem]
+
+
 class CreateChatRequest(BaseModel):
     title: str | None = None
     llm_provider: str | None = "openai"
@@ -129,39 +239,131 @@ class RenameChatRequest(BaseModel):
 
 
 # region Helper: Backboard & Memory
-async def get_or_create_backboard_memory(projectid: str, db_cursor=None, db_conn=None):
-    db_cursor = db_cursor or cursor
-    db_conn = db_conn or conn
-    # check DB first
+# How long a successful get_thread check is trusted before validating again.
+BACKBOARD_MEMORY_TTL_S = float(os.getenv("BACKBOARD_MEMORY_TTL_S", "300"))
+
+# projectid -> (assistant_id, thread_id, validated_at monotonic)
+_backboard_memory_cache: dict[str, tuple[str, str, float]] = {}
+
+
+def _remember_backboard_memory(projectid: str, assistant_id: str, thread_id: str):
+    _backboard_memory_cache[projectid] = (assistant_id, thread_id, time.monotonic())
+
+
+def invalidate_backboard_memory(projectid: str):
+    _backboard_memory_cache.pop(projectid, None)
+
+
+def _is_backboard_memory_fresh(projectid: str, assistant_id: str, thread_id: str):
+    cached = _backboard_memory_cache.get(projectid)
+    if cached is None:
+        return False
+    # a changed backboard_projects row (possibly written by another process)
+    # no longer matches the cached pair
+    if cached[0] != assistant_id or cached[1] != thread_id:
+        invalidate_backboard_memory(projectid)
+        return False
+    return time.monotonic() - cached[2] <= BACKBOARD_MEMORY_TTL_S
+
+
+def _read_backboard_memory(projectid: str, db_cursor):
     db_cursor.execute(
         "SELECT assistant_id, memory_thread_id FROM backboard_projects WHERE projectid=?",
         (projectid,),
     )
     row = db_cursor.fetchone()
-    client = BackboardClient(api_key=BACKBOARD_API_KEY)
-
     if row and row[0] and row[1]:
-        assistant_id = row[0]
-        thread_id = row[1]
+        return row[0], row[1]
+    return None
+
+
+def _claim_backboard_memory(projectid: str, expected, assistant_id: str, thread_id: str):
+    """
+    Compare-and-swap on the backboard_projects row: writes the new ids only if the
+    row still holds `expected` (None = no usable row yet). Returns False when another
+    request or process changed the row first. Indexed files are only wiped by the winner.
+    """
+    if expected is None:
+        cursor.execute(
+            """
+            INSERT INTO backboard_projects (projectid, assistant_id, memory_thread_id)
+            VALUES (?, ?, ?)
+            ON CONFLICT(projectid) DO UPDATE
+            SET assistant_id=excluded.assistant_id, memory_thread_id=excluded.memory_thread_id
+            WHERE backboard_projects.assistant_id IS NULL
+               OR backboard_projects.memory_thread_id IS NULL
+            """,
+            (projectid, assistant_id, thread_id),
+        )
+    else:
+        cursor.execute(
+            """
+            UPDATE backboard_projects SET assistant_id=?, memory_thread_id=?
+            WHERE projectid=? AND assistant_id=? AND memory_thread_id=?
+            """,
+            (assistant_id, thread_id, projectid, expected[0], expected[1]),
+        )
+    if cursor.rowcount == 0:
+        conn.rollback()
+        return False
+    _forget_project_documents(cursor, projectid)
+    conn.commit()
+    _remember_backboard_memory(projectid, assistant_id, thread_id)
+    return True
+
+
+def _forget_project_documents(db_cursor, projectid: str):
+    """Drops the course's indexing records (and cached document statuses), without committing."""
+    db_cursor.execute(
+        "SELECT document_id FROM indexed_documents WHERE projectid=?", (projectid,)
+    )
+    forget_document_statuses(r[0] for r in db_cursor.fetchall())
+    db_cursor.execute("DELETE FROM indexed_files WHERE projectid=?", (projectid,))
+    db_cursor.execute("DELETE FROM indexed_documents WHERE projectid=?", (projectid,))
+
+
+def _forget_file_documents(db_cursor, fileid: str):
+    """Same as _forget_project_documents, for one file in every course it is in."""
+    db_cursor.execute(
+        "SELECT document_id FROM indexed_documents WHERE fileid=?", (fileid,)
+    )
+    forget_document_statuses(r[0] for r in db_cursor.fetchall())
+    db_cursor.execute("DELETE FROM indexed_files WHERE fileid=?", (fileid,))
+    db_cursor.execute("DELETE FROM indexed_documents WHERE fileid=?", (fileid,))
+
+
+async def _resolve_backboard_memory(projectid: str, client, validate: bool):
+    """
+    Validates, recreates or creates the course memory. Runs at most once at a time
+    per project (see get_or_create_backboard_memory) and always on the shared connection,
+    since callers may close their own connection while it is still running.
+    """
+    existing = _read_backboard_memory(projectid, cursor)
+
+    if existing:
+        assistant_id, thread_id = existing
+        if not validate and _is_backboard_memory_fresh(
+            projectid, assistant_id, thread_id
+        ):
+            return assistant_id, thread_id
         try:
             await client.get_thread(thread_id)
-            return client, assistant_id, thread_id
+            _remember_backboard_memory(projectid, assistant_id, thread_id)
+            return assistant_id, thread_id
         except BackboardNotFoundError:
             logger.warning(
                 "Backboard thread missing for project %s, recreating", projectid
             )
             try:
                 thread = await client.create_thread(assistant_id)
-                thread_id = str(thread.thread_id)
-                db_cursor.execute(
-                    "UPDATE backboard_projects SET memory_thread_id=? WHERE projectid=?",
-                    (thread_id, projectid),
-                )
-                db_cursor.execute(
-                    "DELETE FROM indexed_files WHERE projectid=?", (projectid,)
-                )
-                db_conn.commit()
-                return client, assistant_id, thread_id
+                new_thread_id = str(thread.thread_id)
+                if _claim_backboard_memory(
+                    projectid, existing, assistant_id, new_thread_id
+                ):
+                    return assistant_id, new_thread_id
+                # someone else already replaced the thread; use theirs
+                await _discard_backboard_thread(client, new_thread_id)
+                return _read_backboard_memory(projectid, cursor) or existing
             except BackboardNotFoundError:
                 logger.warning(
                     "Backboard assistant missing for project %s, recreating", projectid
@@ -182,16 +384,99 @@ async def get_or_create_backboard_memory(projectid: str, db_cursor=None, db_conn
     assistant_id = str(assistant.assistant_id)
     thread_id = str(thread.thread_id)
 
-    db_cursor.execute(
-        "INSERT OR REPLACE INTO backboard_projects (projectid, assistant_id, memory_thread_id) VALUES (?, ?, ?)",
-        (projectid, assistant_id, thread_id),
-    )
-    db_cursor.execute("DELETE FROM indexed_files WHERE projectid=?", (projectid,))
-    db_conn.commit()
+    if _claim_backboard_memory(projectid, existing, assistant_id, thread_id):
+        return assistant_id, thread_id
+
+    # lost the race to another process: keep the winner's memory, drop ours
+    logger.info("Backboard memory for project %s created concurrently", projectid)
+    try:
+        await client.delete_assistant(assistant_id)
+    except Exception as e:
+        logger.warning("Could not delete orphan assistant %s: %s", assistant_id, e)
+    winner = _read_backboard_memory(projectid, cursor)
+    if winner is None:
+        raise RuntimeError(f"Backboard memory for project {projectid} disappeared")
+    return winner
+
+
+async def _discard_backboard_thread(client, thread_id: str):
+    try:
+        await client.delete_thread(thread_id)
+    except Exception as e:
+        logger.warning("Could not delete orphan thread %s: %s", thread_id, e)
+
+
+# (projectid, validate) -> in-flight validation/creation shared by concurrent callers
+_backboard_memory_inflight: dict[tuple[str, bool], asyncio.Task] = {}
+
+
+async def get_or_create_backboard_memory(
+    projectid: str, db_cursor=None, validate: bool = False
+):
+    """
+    Returns (client, assistant_id, thread_id) for a course.
+    The thread is only re-checked with Backboard when the last validation is older
+    than BACKBOARD_MEMORY_TTL_S, or always when validate=True. Concurrent callers
+    for the same project share one in-flight validation/creation; a validating
+    one also serves callers that do not need validation, but not the reverse.
+    """
+    db_cursor = db_cursor or cursor
+    client = await get_backboard_client(BACKBOARD_API_KEY)
+
+    existing = _read_backboard_memory(projectid, db_cursor)
+    if (
+        existing
+        and not validate
+        and _is_backboard_memory_fresh(projectid, *existing)
+    ):
+        return client, existing[0], existing[1]
+
+    if validate:
+        # a non-validating resolve may return the cached row unchecked: let it
+        # finish (so the two never create the memory twice), then validate
+        unvalidated = _backboard_memory_inflight.get((projectid, False))
+        if unvalidated is not None:
+            await asyncio.wait([unvalidated])
+
+    key = (projectid, validate)
+    task = _backboard_memory_inflight.get((projectid, True)) or _backboard_memory_inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(
+            _resolve_backboard_memory(projectid, client, validate)
+        )
+        _backboard_memory_inflight[key] = task
+
+        def _done(t, key=key):
+            if _backboard_memory_inflight.get(key) is t:
+                _backboard_memory_inflight.pop(key, None)
 
+        task.add_done_callback(_done)
+
+    # shield: a cancelled caller must not abort creation for the others
+    assistant_id, thread_id = await asyncio.shield(task)
     return client, assistant_id, thread_id
 
 
+async def with_backboard_memory(projectid: str, op, db_cursor=None):
+    """
+    Runs `await op(client, assistant_id, thread_id)` for a course.
+    If Backboard reports the thread (or assistant) as gone, the cached validation
+    is dropped, the memory is revalidated/recreated and op is retried once.
+    """
+    client, assistant_id, thread_id = await get_or_create_backboard_memory(
+        projectid, db_cursor=db_cursor
+    )
+    try:
+        return await op(client, assistant_id, thread_id)
+    except BackboardNotFoundError:
+        logger.warning("Backboard memory stale for project %s, revalidating", projectid)
+        invalidate_backboard_memory(projectid)
+        client, assistant_id, thread_id = await get_or_create_backboard_memory(
+            projectid, db_cursor=db_cursor, validate=True
+        )
+        return await op(client, assistant_id, thread_id)
+
+
 # endregion
 
 
@@ -377,8 +662,8 @@ async def login(data: dict, response: Response):
     password = data.get("password")
     cursor.execute("SELECT userid, password FROM users WHERE email=?", (email,))
     row = cursor.fetchone()
-    logger.debug(f"Login attempt: {email}")
-    logger.debug(row)
+    # never log the row: it holds the password hash
+    logger.debug("Login attempt", extra={"email": email, "known_user": row is not None})
     stored_password = row[1] if row else None
     if stored_password is None:
         return {"success": False, "message": "Invalid email or password"}
@@ -441,6 +726,15 @@ async def logout(response: Response):
     return {"success": True, "message": "Logged out successfully"}
 
 
+@app.get("/health")
+async def health():
+    circuit = backboard_breaker.snapshot()
+    return {
+        "success": True,
+        "backboard": {"configured": bool(BACKBOARD_API_KEY), "circuit": circuit},
+    }
+
+
 # endregion
 
 # NOW API BS:
@@ -490,7 +784,7 @@ async def upload_file(
         f.write(content)
         file_size = len(content)
 
-    logger.debug(f"Uploaded file {file.filename} as {filepath}")
+    logger.debug("Uploaded file %s as %s", file.filename, filepath)
     return {"success": True, "fileid": fileid, "message": "File uploaded successfully"}
 
 
@@ -499,7 +793,6 @@ async def upload_file(
 async def get_file(fileid: str):
     cursor.execute("SELECT filepath FROM files WHERE fileid=?", (fileid,))
     row = cursor.fetchone()
-    logger.debug(row)
     if not row:
         raise HTTPException(status_code=404, detail="File not found")
 
@@ -581,6 +874,8 @@ async def delete_file(fileid: str, session: str = Cookie(None)):
 
     cursor.execute("DELETE FROM files WHERE fileid=?", (fileid,))
     cursor.execute("DELETE FROM fileinproj WHERE fileid=?", (fileid,))
+    # changes the index version, so generations made from this file are not served again
+    _forget_file_documents(cursor, fileid)
     conn.commit()
 
     return {"success": True, "message": "File deleted successfully"}
@@ -782,6 +1077,8 @@ async def delete_project(projectid: str, session: str = Cookie(None)):
 
     cursor.execute("DELETE FROM projects WHERE projectid=?", (projectid,))
     cursor.execute("DELETE FROM fileinproj WHERE projectid=?", (projectid,))
+    _forget_project_documents(cursor, projectid)
+    unindex_project(cursor, projectid)
     conn.commit()
 
     return {"success": True, "message": "Project deleted successfully"}
@@ -812,13 +1109,19 @@ async def list_decks(projectid: str, session: str = Cookie(None)):
         return {"success": False, "message": "Project not found"}
 
     cursor.execute(
-        "SELECT deckid, name, prompt, createddate FROM decks WHERE projectid=? AND userid=? ORDER BY createddate DESC",
+        "SELECT deckid, name, prompt, createddate, status FROM decks WHERE projectid=? AND userid=? ORDER BY createddate DESC",
         (projectid, userid),
     )
     rows = cursor.fetchall()
 
     decks = [
-        {"deckid": r[0], "name": r[1], "prompt": r[2], "createddate": r[3]}
+        {
+            "deckid": r[0],
+            "name": r[1],
+            "prompt": r[2],
+            "createddate": r[3],
+            "status": r[4] or "ready",
+        }
         for r in rows
     ]
     return {"success": True, "decks": decks}
@@ -833,7 +1136,7 @@ async def list_all_decks(session: str = Cookie(None)):
     userid = session
     cursor.execute(
         """
-        SELECT d.deckid, d.projectid, d.name, d.prompt, d.createddate, p.name
+        SELECT d.deckid, d.projectid, d.name, d.prompt, d.createddate, p.name, d.status
         FROM decks d
         JOIN projects p ON p.projectid = d.projectid
         WHERE d.userid=?
@@ -850,6 +1153,7 @@ async def list_all_decks(session: str = Cookie(None)):
             "prompt": r[3],
             "createddate": r[4],
             "project_name": r[5],
+            "status": r[6] or "ready",
         }
         for r in rows
     ]
@@ -902,101 +1206,53 @@ Schema:
       "id": "q1",
       "type": "mcq|short|long",
       "question": "...",
-      "choices": ["Option text A", "Option text B", "Option text C", "Option text D"] // for mcq only
+      "choices": ["Option text A", "Option text B", "Option text C", "Option text D"], // for mcq only
+      "answer": 0,          // mcq: index of correct choice; short/long: model answer
+      "explanation": "..."
     }
-  ],
-  "answers": {
-    "q1": 0,           // mcq: index of correct choice
-    "q2": "..."        // short/long: model answer
-  },
-  "explanations": {
-    "q1": "..."
-  }
+  ]
 }
 Rules:
 - Generate the requested number of questions exactly.
+- Put each question's answer and explanation inside the question object.
 - Use ONLY the course documents already indexed in memory as the source of truth.
 - For mcq: 4 choices, one correct; answers use 0-based index; choices must be full answer text (not labels like A/B/C/D).
 """.strip()
 
-# endregion
-
-
-def _extract_json_object(raw: str) -> str | None:
-    if raw is None:
-        return None
-    if not isinstance(raw, str):
-        raw = str(raw)
-    start = raw.find("{")
-    end = raw.rfind("}")
-    if start == -1 or end == -1 or end <= start:
-        return None
-    return raw[start : end + 1]
-
-
-def _fix_unescaped_newlines(json_text: str) -> str:
-    fixed = []
-    in_string = False
-    escaped = False
-    for ch in json_text:
-        if in_string:
-            if ch in "\r\n":
-                fixed.append("\\n")
-                escaped = False
-                continue
-            if escaped:
-                escaped = False
-            elif ch == "\\":
-                escaped = True
-            elif ch == '"':
-                in_string = False
-        else:
-            if ch == '"':
-                in_string = True
-        fixed.append(ch)
-    return "".join(fixed)
-
-
-def _extract_questions_array(raw: str) -> list:
-    if not isinstance(raw, str):
-        return []
-    key = '"questions"'
-    key_idx = raw.find(key)
-    if key_idx == -1:
-        return []
-    bracket_idx = raw.find("[", key_idx)
-    if bracket_idx == -1:
-        return []
-    depth = 0
-    for i in range(bracket_idx, len(raw)):
-        if raw[i] == "[":
-            depth += 1
-        elif raw[i] == "]":
-            depth -= 1
-            if depth == 0:
-                snippet = raw[bracket_idx : i + 1]
-                try:
-                    return json.loads(snippet)
-                except json.JSONDecodeError:
-                    try:
-                        return json.loads(_fix_unescaped_newlines(snippet))
-                    except json.JSONDecodeError:
-                        return []
-    return []
+QUIZ_BATCH_SYSTEM = """
+You are an expert tutor generating several quizzes at once from course documents.
+Return ONLY valid JSON (no markdown, no commentary).
 
+Schema:
+{
+  "quizzes": [
+    {
+      "key": "quiz1",
+      "questions": [
+        {
+          "id": "q1",
+          "type": "mcq|short|long",
+          "question": "...",
+          "choices": ["Option text A", "Option text B", "Option text C", "Option text D"] // for mcq only
+        }
+      ],
+      "answers": {
+        "q1": 0           // mcq: index of correct choice; short/long: model answer
+      },
+      "explanations": {
+        "q1": "..."
+      }
+    }
+  ]
+}
+Rules:
+- Return one entry per requested quiz, with its key, in the order requested.
+- Each quiz has exactly the number of questions requested for it.
+- Use ONLY the course documents already indexed in memory as the source of truth.
+- For mcq: 4 choices, one correct; answers use 0-based index; choices must be full answer text (not labels like A/B/C/D).
+""".strip()
 
-def _parse_quiz_payload(raw_text: str):
-    json_text = _extract_json_object(raw_text) or raw_text
-    try:
-        return json.loads(json_text)
-    except json.JSONDecodeError:
-        try:
-            return json.loads(_fix_unescaped_newlines(json_text))
-        except json.JSONDecodeError:
-            questions_only = _extract_questions_array(raw_text)
-            if questions_only:
-                return questions_only
-            raise
+# endregion
 
 
 def _safe_int(value, default=None):
@@ -1021,15 +1277,6 @@ def _token_overlap_ratio(expected: str, actual: str) -> float:
     return matches / len(expected_tokens)
 
 
-def _normalize_document_status(status):
-    if status is None:
-        return None
-    value = getattr(status, "value", None)
-    if value:
-        return str(value).lower()
-    return str(status).lower()
-
-
 def _display_filename(filepath: str) -> str:
     if not filepath:
         return ""
@@ -1039,39 +1286,45 @@ def _display_filename(filepath: str) -> str:
     return base
 
 
-async def _wait_for_thread_ready(
-    client, thread_id: str, timeout_s: int = 900, interval_s: int = 2
-):
-    deadline = time.monotonic() + timeout_s
-    last_statuses = []
-    while True:
-        try:
-            docs = await client.list_thread_documents(thread_id)
-            last_statuses = [
-                _normalize_document_status(getattr(doc, "status", None)) for doc in docs
-            ]
-        except Exception:
-            last_statuses = []
-
-        if last_statuses and all(
-            status in {"indexed", "failed"} for status in last_statuses
-        ):
-            return True, last_statuses
+# Quiz status changes, pushed to /quizzes/{quizid}/events subscribers. Changes
+# made in this process are published directly; _quiz_status_bridge picks up
+# the ones written by worker processes.
+quiz_events = PubSub()
+_quiz_states: dict[str, tuple] = {}  # last published (status, error, questions ready)
 
-        if time.monotonic() >= deadline:
-            return False, last_statuses
 
-        await asyncio.sleep(interval_s)
+def _publish_quiz_state(
+    quizid: str, status: str, generation_error: str | None, questions_ready: int
+):
+    state = (status, generation_error, questions_ready)
+    if _quiz_states.get(quizid) == state:
+        return
+    _quiz_states[quizid] = state
+    quiz_events.publish(
+        quizid,
+        {
+            "status": status,
+            "generation_error": generation_error,
+            "questions_ready": questions_ready,
+        },
+    )
 
 
 def _set_quiz_status(
-    db_cursor, db_conn, quizid: str, status: str, generation_error: str | None = None
+    db_cursor,
+    db_conn,
+    quizid: str,
+    status: str,
+    generation_error: str | None = None,
+    commit: bool = True,
 ):
     db_cursor.execute(
         "UPDATE quizzes SET status=?, generation_error=? WHERE quizid=?",
         (status, generation_error, quizid),
     )
-    db_conn.commit()
+    if commit:
+        db_conn.commit()
+        _publish_quiz_state(quizid, status, generation_error, 0)
 
 
 def _set_quiz_payload(
@@ -1081,171 +1334,325 @@ def _set_quiz_payload(
     questions_payload: dict,
     answer_key: dict,
     explanations: dict,
+    status: str = "ready",
+    commit: bool = True,
+    generation_error: str | None = None,
 ):
     num_questions = len(questions_payload.get("questions", []))
+    # while questions are still arriving, num_questions keeps the requested count
     db_cursor.execute(
         """
         UPDATE quizzes
-        SET status=?, generation_error=?, questions_json=?, answer_key_json=?, explanations_json=?, num_questions=?
+        SET status=?, generation_error=?, questions_json=?, answer_key_json=?, explanations_json=?,
+            num_questions=CASE WHEN ?='ready' THEN ? ELSE num_questions END
         WHERE quizid=?
         """,
         (
-            "ready",
-            None,
-            json.dumps(questions_payload),
-            json.dumps(answer_key),
-            json.dumps(explanations),
+            status,
+            generation_error,
+            dumps_text(questions_payload),
+            dumps_text(answer_key),
+            dumps_text(explanations),
+            status,
             num_questions,
             quizid,
         ),
     )
-    db_conn.commit()
+    if commit:
+        db_conn.commit()
+        _publish_quiz_state(quizid, status, generation_error, num_questions)
 
 
-async def _generate_quiz_content(
-    quizid: str,
-    projectid: str,
-    userid: str,
-    topic: str,
-    quiz_type: str,
-    num_questions: int,
-    document_ids: list[str],
-):
-    local_conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-    local_cursor = local_conn.cursor()
-    try:
-        if not BACKBOARD_API_KEY:
-            _set_quiz_status(
-                local_cursor, local_conn, quizid, "failed", "BACKBOARD_API_KEY not set"
-            )
-            return
+def _check_quiz_documents_indexed(
+    db_cursor, projectid: str, document_ids: list[str]
+) -> str | None:
+    """Returns an error message unless every selected file is indexed."""
+    if not document_ids:
+        return "No documents selected."
 
-        if not document_ids:
-            _set_quiz_status(
-                local_cursor, local_conn, quizid, "failed", "No documents selected."
-            )
-            return
+    placeholders = ",".join(["?"] * len(document_ids))
+    db_cursor.execute(
+        f"""
+        SELECT COUNT(DISTINCT fileid)
+        FROM indexed_files
+        WHERE projectid=? AND fileid IN ({placeholders})
+        """,
+        (projectid, *document_ids),
+    )
+    count = db_cursor.fetchone()[0]
+    if count != len(set(document_ids)):
+        return "Selected documents are not indexed yet. Go to the course page and click Index documents."
+    return None
 
-        placeholders = ",".join(["?"] * len(document_ids))
-        local_cursor.execute(
-            f"""
-            SELECT COUNT(DISTINCT fileid)
-            FROM indexed_files
-            WHERE projectid=? AND fileid IN ({placeholders})
-            """,
-            (projectid, *document_ids),
-        )
-        count = local_cursor.fetchone()[0]
-        if count != len(set(document_ids)):
-            _set_quiz_status(
-                local_cursor,
-                local_conn,
-                quizid,
-                "failed",
-                "Selected documents are not indexed yet. Go to the course page and click Index documents.",
-            )
-            return
 
-        client, assistant_id, thread_id = await get_or_create_backboard_memory(
-            projectid, db_cursor=local_cursor, db_conn=local_conn
-        )
+async def _wait_for_quiz_documents(
+    db_cursor, db_conn, projectid: str, document_ids: list[str]
+):
+    """
+    Waits until Backboard has processed the selected files. Returns
+    (error, None) or (None, (client, thread_id, selected file names)).
+    """
+    # generation waits on the thread for a long time, so validate it up front
+    client, assistant_id, thread_id = await get_or_create_backboard_memory(
+        projectid, db_cursor=db_cursor, validate=True
+    )
 
+    # Only block on the Backboard documents behind the selected files. Files
+    # indexed before document ids were recorded fall back to the whole thread.
+    backboard_doc_ids, untracked_files = get_file_document_ids(
+        db_cursor, projectid, document_ids
+    )
+    if untracked_files:
         try:
             docs = await client.list_thread_documents(thread_id)
         except Exception:
             docs = []
 
         if not docs:
-            _set_quiz_status(
-                local_cursor,
-                local_conn,
-                quizid,
-                "failed",
+            return (
                 "No indexed documents found for this course. Click Index documents first.",
+                None,
             )
-            return
 
         logger.debug(
             "Quiz generation: thread %s has %d documents", thread_id, len(docs)
         )
+        backboard_doc_ids = None
 
-        ready, statuses = await _wait_for_thread_ready(client, thread_id)
-        if not ready:
-            _set_quiz_status(
-                local_cursor,
-                local_conn,
-                quizid,
-                "failed",
-                "Documents are still indexing. Try again soon.",
-            )
-            return
-
-        local_cursor.execute(
-            f"SELECT fileid, filepath FROM files WHERE fileid IN ({placeholders})",
-            (*document_ids,),
+    ready, statuses = await wait_for_documents_ready(
+        client, thread_id, backboard_doc_ids
+    )
+    if not ready and "missing" in statuses.values():
+        return (
+            "Selected documents are not indexed yet. Go to the course page and click Index documents.",
+            None,
         )
-        file_rows = local_cursor.fetchall()
-        selected_files = [
-            _display_filename(row[1]) for row in file_rows if row and row[1]
-        ]
+    if not ready:
+        return "Documents are still indexing. Try again soon.", None
 
-        generation_prompt = f"""
-Course: {projectid}
-Quiz topic: {topic}
-Quiz type: {quiz_type}
-Number of questions: {num_questions}
+    placeholders = ",".join(["?"] * len(document_ids))
+    db_cursor.execute(
+        f"SELECT fileid, filepath FROM files WHERE fileid IN ({placeholders})",
+        (*document_ids,),
+    )
+    file_rows = db_cursor.fetchall()
+    selected_files = [
+        _display_filename(row[1]) for row in file_rows if row and row[1]
+    ]
+    return None, (client, thread_id, selected_files)
 
-Task:
-Generate a quiz with the exact number of questions requested.
-Prioritize these files: {", ".join(selected_files) if selected_files else "selected documents"}.
-If needed, you may use any indexed course documents to complete the quiz.
-""".strip()
 
-        response = await client.add_message(
-            thread_id=thread_id,
-            content=QUIZ_SYSTEM + "\n\n" + generation_prompt,
-            llm_provider="openai",
-            model_name="gpt-4o",
-            stream=False,
-            memory="Auto",
-        )
+def _set_quiz_from_bank(
+    db_cursor,
+    db_conn,
+    quizid: str,
+    userid: str,
+    rows: list,
+    status: str = "ready",
+    commit: bool = True,
+    generation_error: str | None = None,
+):
+    questions, answer_key, explanations = assemble_quiz(rows)
+    mark_served(db_conn, userid, [row[0] for row in rows], commit=False)
+    _set_quiz_payload(
+        db_cursor,
+        db_conn,
+        quizid,
+        {"questions": questions},
+        answer_key,
+        explanations,
+        status=status,
+        commit=commit,
+        generation_error=generation_error,
+    )
 
-        raw = getattr(response, "content", response)
-        raw_str = raw if isinstance(raw, str) else str(raw)
-        logger.debug("Quiz raw response: %s", raw_str[:2000])
-        payload = _parse_quiz_payload(raw_str)
 
-        questions = []
-        answer_key = {}
-        explanations = {}
-        if isinstance(payload, dict) or isinstance(payload, list):
-            questions, answer_key, explanations = _normalize_quiz_payload(
-                payload, quiz_type, num_questions
-            )
+def _short_quiz_warning(got: int, wanted: int) -> str | None:
+    """generation_error of a quiz that is ready with fewer questions than asked."""
+    if got >= wanted:
+        return None
+    return f"Only {got} of {wanted} questions could be generated. Try generating again for more."
+
+
+async def _stream_quiz_questions(client, thread_id: str, content: str, on_question):
+    """Streams a quiz reply, calling on_question(q) for every question as it completes."""
+    parser = TolerantJsonParser(item_key="questions")
+    events = await client.add_message(
+        thread_id=thread_id,
+        content=content,
+        llm_provider="openai",
+        model_name="gpt-4o",
+        stream=True,
+        memory="Auto",
+    )
+    async for event in events:
+        if event.get("type") == "content_streaming":
+            for question in parser.feed(event.get("content") or ""):
+                on_question(question)
+    return parser
+
 
-        if not questions:
-            retry_prompt = (
-                generation_prompt
-                + "\n\nReturn the JSON directly. Do not return an empty questions list."
+# streamed questions are banked (and shown) every N questions or T seconds
+QUIZ_STREAM_FLUSH_QUESTIONS = int(os.getenv("QUIZ_STREAM_FLUSH_QUESTIONS", "5"))
+QUIZ_STREAM_FLUSH_S = float(os.getenv("QUIZ_STREAM_FLUSH_S", "1.0"))
+
+
+async def _generate_quiz_content(
+    quizid: str,
+    projectid: str,
+    userid: str,
+    topic: str,
+    quiz_type: str,
+    num_questions: int,
+    document_ids: list[str],
+    fresh: bool = False,
+):
+    local_conn = connect_db()
+    local_cursor = local_conn.cursor()
+    try:
+        if not BACKBOARD_API_KEY:
+            _set_quiz_status(
+                local_cursor, local_conn, quizid, "failed", "BACKBOARD_API_KEY not set"
             )
-            response = await client.add_message(
-                thread_id=thread_id,
-                content=QUIZ_SYSTEM + "\n\n" + retry_prompt,
-                llm_provider="openai",
-                model_name="gpt-4o",
-                stream=False,
-                memory="Auto",
+            return
+
+        error = _check_quiz_documents_indexed(local_cursor, projectid, document_ids)
+        if error:
+            _set_quiz_status(local_cursor, local_conn, quizid, "failed", error)
+            return
+
+        # Quizzes come from the course question bank; the model is only asked
+        # when the bank has too few questions this user has not seen yet (or
+        # the quiz asked for fresh ones), and then for a bank refill at once.
+        bank_key = (
+            projectid,
+            topic,
+            quiz_type,
+            document_ids,
+            project_index_version(local_cursor, projectid),
+        )
+        if not fresh:
+            rows = sample_questions(local_conn, userid, *bank_key, num_questions)
+            if len(rows) == num_questions:
+                _set_quiz_from_bank(local_cursor, local_conn, quizid, userid, rows)
+                return
+
+        error, source = await _wait_for_quiz_documents(
+            local_cursor, local_conn, projectid, document_ids
+        )
+        if error:
+            _set_quiz_status(local_cursor, local_conn, quizid, "failed", error)
+            return
+        client, thread_id, selected_files = source
+
+        def quiz_prompt(count: int) -> str:
+            prompt = f"""
+Course: {projectid}
+Quiz topic: {topic}
+Quiz type: {quiz_type}
+Number of questions: {count}
+
+Task:
+Generate a quiz with the exact number of questions requested.
+Prioritize these files: {", ".join(selected_files) if selected_files else "selected documents"}.
+If needed, you may use any indexed course documents to complete the quiz.
+""".strip()
+            banked = bank_question_texts(local_conn, *bank_key)
+            if banked:
+                prompt += "\n\nDo not repeat any of these existing questions:\n" + "\n".join(
+                    f"- {text}" for text in banked
+                )
+            return QUIZ_SYSTEM + "\n\n" + prompt
+
+        # -------------------------
+        # Bank streamed questions in small batches, and fill the quiz from
+        # the bank while it is short, so the page can show questions early
+        # and a cut-off reply keeps everything that arrived
+        # -------------------------
+        quiz_rows = []
+        deferred = []  # questions whose answer is not inline (answers map at the end)
+        pending = []  # streamed questions not banked yet
+        last_flush = time.monotonic()
+
+        def save_questions(questions, answer_key, explanations):
+            if questions:
+                add_questions(
+                    local_conn, *bank_key, questions, answer_key, explanations
+                )
+            missing = num_questions - len(quiz_rows)
+            if missing <= 0:
+                return
+            rows = sample_questions(local_conn, userid, *bank_key, missing)
+            if rows:
+                quiz_rows.extend(rows)
+                status = "ready" if len(quiz_rows) >= num_questions else "generating"
+                _set_quiz_from_bank(
+                    local_cursor, local_conn, quizid, userid, quiz_rows, status=status
+                )
+
+        def flush_pending():
+            nonlocal last_flush
+            last_flush = time.monotonic()
+            if pending:
+                save_questions(*_normalize_quiz_payload(pending, quiz_type, len(pending)))
+                pending.clear()
+
+        def on_question(q):
+            if isinstance(q, dict) and _answer_from_question(q) is None:
+                deferred.append(q)
+                return
+            pending.append(q)
+            # once the quiz is full the rest only goes to the bank, in one go at the end
+            if len(quiz_rows) < num_questions and (
+                len(pending) >= QUIZ_STREAM_FLUSH_QUESTIONS
+                or time.monotonic() - last_flush >= QUIZ_STREAM_FLUSH_S
+            ):
+                flush_pending()
+
+        async def stream_questions(count: int):
+            try:
+                parser = await _stream_quiz_questions(
+                    client, thread_id, quiz_prompt(count), on_question
+                )
+            except Exception as e:
+                logger.warning("Quiz stream for %s broke off: %s", quizid, e)
+                flush_pending()
+                if not quiz_rows and is_upstream_failure(e):
+                    raise  # nothing to show: let the job be retried
+                return
+            flush_pending()
+            logger.debug(
+                "Quiz %s: raw reply", quizid, extra={"payload": payload_for_log(parser.text)}
             )
-            raw = getattr(response, "content", response)
-            raw_str = raw if isinstance(raw, str) else str(raw)
-            logger.debug("Quiz retry raw response: %s", raw_str[:2000])
-            payload = _parse_quiz_payload(raw_str)
-            if isinstance(payload, dict) or isinstance(payload, list):
-                questions, answer_key, explanations = _normalize_quiz_payload(
-                    payload, quiz_type, num_questions
+            final = parser.result()
+            if deferred and isinstance(final, dict):
+                save_questions(
+                    *_normalize_quiz_payload(
+                        {**final, "questions": deferred}, quiz_type, len(deferred)
+                    )
                 )
+            deferred.clear()
+
+        await stream_questions(min(50, max(num_questions, QUESTION_BANK_FILL_SIZE)))
+
+        # ask again only for what is still missing
+        missing = num_questions - len(quiz_rows)
+        if missing > 0:
+            logger.debug("Quiz %s: %d questions missing, asking again", quizid, missing)
+            await stream_questions(missing)
+
+        if len(quiz_rows) < num_questions:
+            # out of new questions: repeat the ones this user saw longest ago
+            rows = sample_questions(
+                local_conn,
+                userid,
+                *bank_key,
+                num_questions - len(quiz_rows),
+                allow_repeats=True,
+            )
+            quiz_rows.extend(r for r in rows if r[0] not in {q[0] for q in quiz_rows})
 
-        if not questions:
+        if not quiz_rows:
             _set_quiz_status(
                 local_cursor,
                 local_conn,
@@ -1255,16 +1662,21 @@ If needed, you may use any indexed course documents to complete the quiz.
             )
             return
 
-        _set_quiz_payload(
+        # still short after the retry and the repeats: ready, but say so
+        _set_quiz_from_bank(
             local_cursor,
             local_conn,
             quizid,
-            {"questions": questions},
-            answer_key,
-            explanations,
+            userid,
+            quiz_rows,
+            generation_error=_short_quiz_warning(len(quiz_rows), num_questions),
         )
 
     except Exception as e:
+        if is_upstream_failure(e):
+            # Backboard is down or overloaded: fail the job so it is retried with
+            # backoff (on_give_up marks the quiz failed once attempts run out)
+            raise
         logger.error("Quiz generation failed: %s", e)
         err_detail = f"{type(e).__name__}: {e}".strip()
         message = (
@@ -1277,6 +1689,68 @@ If needed, you may use any indexed course documents to complete the quiz.
         local_conn.close()
 
 
+async def _run_quiz_generation_job(payload: dict):
+    quizid = payload["quizid"]
+    local_conn = connect_db()
+    try:
+        row = local_conn.execute(
+            """
+            SELECT projectid, userid, topic, quiz_type, num_questions, document_ids_json
+            FROM quizzes WHERE quizid=?
+            """,
+            (quizid,),
+        ).fetchone()
+    finally:
+        local_conn.close()
+    if row is None:
+        logger.warning("Quiz %s disappeared before generation", quizid)
+        return
+
+    try:
+        document_ids = orjson.loads(row[5] or "[]")
+        if not isinstance(document_ids, list):
+            document_ids = []
+    except json.JSONDecodeError:
+        document_ids = []
+
+    await _generate_quiz_content(
+        quizid=quizid,
+        projectid=row[0],
+        userid=row[1],
+        topic=row[2],
+        quiz_type=row[3],
+        num_questions=row[4],
+        document_ids=document_ids,
+        fresh=bool(payload.get("fresh")),
+    )
+
+
+async def _give_up_quiz_generation(payload: dict, error: str):
+    local_conn = connect_db()
+    try:
+        _set_quiz_status(
+            local_conn.cursor(),
+            local_conn,
+            payload["quizid"],
+            "failed",
+            f"Quiz generation was interrupted ({error}). Try generating again.",
+        )
+    finally:
+        local_conn.close()
+
+
+JOB_HANDLERS = {
+    "quiz_generation": JobHandler(
+        _run_quiz_generation_job,
+        on_give_up=_give_up_quiz_generation,
+        max_in_flight=GENERATION_MAX_IN_FLIGHT,
+        in_flight_group="generation",
+    ),
+}
+
+job_worker = JobWorker(JOB_HANDLERS)
+
+
 def _normalize_choice_list(raw):
     if isinstance(raw, dict):
         items = list(raw.items())
@@ -1472,225 +1946,480 @@ def _normalize_quiz_payload(payload, quiz_type: str, num_questions: int):
     return questions, answer_key, explanations
 
 
-def _safe_json_load(raw: str):
-    try:
-        return json.loads(raw)
-    except Exception:
-        extracted = _extract_json_object(raw)
-        if extracted:
-            try:
-                return json.loads(extracted)
-            except Exception:
-                return None
-        return None
+CARDS_BULK_MAX = 1000
+
+
+def _insert_cards(
+    db_cursor, deckid: str, cards: list[tuple[str, str]], start_position: int | None = None
+) -> list[dict]:
+    """
+    Inserts (front, back) pairs in one executemany, without committing, at
+    contiguous positions (after the deck's last card unless start_position is
+    given) and with initial scheduling: due now, ease 2.5, no reviews yet.
+    The cards are added to the course's duplicate index as well.
+    """
+    if start_position is None:
+        db_cursor.execute(
+            "SELECT COALESCE(MAX(position), -1) + 1 FROM cards WHERE deckid=?",
+            (deckid,),
+        )
+        start_position = db_cursor.fetchone()[0]
+
+    due_at = datetime.now(dt.UTC).isoformat()
+    rows = [
+        (uuid.uuid4().hex[:8], deckid, front, back, start_position + i, due_at)
+        for i, (front, back) in enumerate(cards)
+    ]
+    db_cursor.executemany(
+        """
+        INSERT INTO cards (
+            cardid, deckid, front, back, position,
+            due_at, interval_days, ease, reps, lapses, last_reviewed_at
+        ) VALUES (?, ?, ?, ?, ?, ?, 0.0, 2.5, 0, 0, NULL)
+        """,
+        rows,
+    )
+    db_cursor.execute("SELECT projectid FROM decks WHERE deckid=?", (deckid,))
+    index_cards(db_cursor, db_cursor.fetchone()[0], [(r[0], r[2], r[3]) for r in rows])
+    return [
+        {
+            "cardid": r[0],
+            "deckid": deckid,
+            "front": r[2],
+            "back": r[3],
+            "position": r[4],
+            "due_at": due_at,
+        }
+        for r in rows
+    ]
 
 
 @app.post("/projects/{projectid}/decks")
 async def create_deck(
     projectid: str, body: CreateDeckRequest, session: str = Cookie(None)
 ):
-    print("\n" + "=" * 80)
-    print(f"[CREATE_DECK] projectid={projectid}")
-    print(f"[DECK NAME] {body.name}")
-    print(f"[USER PROMPT] {body.prompt}")
-
     if session is None:
-        print("[AUTH] ❌ Unauthorized")
         return {"success": False, "message": "Unauthorized"}
     userid = session
-    print(f"[AUTH] ✅ userid={userid}")
 
     cursor.execute(
         "SELECT 1 FROM projects WHERE projectid=? AND userid=?", (projectid, userid)
     )
     if cursor.fetchone() is None:
-        print("[PROJECT] ❌ Project not found or not owned by user")
         return {"success": False, "message": "Project not found"}
-    print("[PROJECT] ✅ Ownership verified")
 
     deckid = uuid.uuid4().hex[:8]
     createddate = datetime.now(dt.UTC).isoformat()
 
-    cursor.execute(
-        "INSERT INTO decks (deckid, projectid, userid, name, prompt, createddate) VALUES (?, ?, ?, ?, ?, ?)",
-        (deckid, projectid, userid, body.name, body.prompt, createddate),
-    )
-    conn.commit()
-    print(f"[DB] Deck created deckid={deckid}")
-
-    print("[BACKBOARD] API key present:", bool(BACKBOARD_API_KEY))
     if not BACKBOARD_API_KEY:
-        print("[BACKBOARD] ❌ No API key, skipping generation")
+        cursor.execute(
+            "INSERT INTO decks (deckid, projectid, userid, name, prompt, status, createddate) VALUES (?, ?, ?, ?, ?, 'ready', ?)",
+            (deckid, projectid, userid, body.name, body.prompt, createddate),
+        )
+        conn.commit()
+        logger.warning("BACKBOARD_API_KEY not set, deck %s created without cards", deckid)
         return {
             "success": True,
             "deckid": deckid,
+            "status": "ready",
             "generated": 0,
             "confidence": 0,
             "mode": "external_only",
             "warning": "BACKBOARD_API_KEY not set, cards not generated",
         }
 
-    client, assistant_id, thread_id = await get_or_create_backboard_memory(projectid)
-    print("[BACKBOARD]")
-    print("  assistant_id:", assistant_id)
-    print("  thread_id:", thread_id)
-
-    file_paths = get_project_file_paths(projectid)
-    file_names = [os.path.basename(p) for p in (file_paths or [])]
+    cached = None
+    if not body.no_cache:
+        cache_key, _ = _deck_cache_key(cursor, projectid, body.prompt)
+        cached = get_cached_generation(conn, cache_key)
+    if cached is not None:
+        cursor.execute(
+            "INSERT INTO decks (deckid, projectid, userid, name, prompt, status, createddate) VALUES (?, ?, ?, ?, ?, 'ready', ?)",
+            (deckid, projectid, userid, body.name, body.prompt, createddate),
+        )
+        # a cache hit is a copy of a deck the user asked for again, so it is not
+        # filtered against the course's cards (POST /projects/{id}/cards/dedupe merges them)
+        _insert_cards(
+            cursor,
+            deckid,
+            [(card["front"], card["back"]) for card in cached["cards"]],
+            start_position=0,
+        )
+        conn.commit()
+        logger.info(
+            "Deck created from cache",
+            extra={"deckid": deckid, "projectid": projectid, "cards": len(cached["cards"])},
+        )
+        return {
+            "success": True,
+            "deckid": deckid,
+            "status": "ready",
+            "generated": len(cached["cards"]),
+            "confidence": cached["confidence"],
+            "mode": cached["mode"],
+            "cached": True,
+        }
 
-    print("[INDEXED FILES]")
-    if not file_names:
-        print("  ⚠️ NONE FOUND")
-    else:
-        for n in file_names:
-            print("  -", n)
+    cursor.execute(
+        "INSERT INTO decks (deckid, projectid, userid, name, prompt, status, createddate) VALUES (?, ?, ?, ?, ?, 'pending', ?)",
+        (deckid, projectid, userid, body.name, body.prompt, createddate),
+    )
+    # deck row and its generation job are committed together
+    jobid = enqueue_job(
+        cursor,
+        conn,
+        "deck_generation",
+        {"deckid": deckid, "userid": userid},
+        dedupe_key=f"deck:{deckid}",
+        commit=False,
+    )
+    conn.commit()
+    logger.info(
+        "Deck created, generation queued",
+        extra={"deckid": deckid, "projectid": projectid, "jobid": jobid},
+    )
 
-    user_prompt = f"""
-Course: {projectid}
-Deck name: {body.name}
+    return {"success": True, "deckid": deckid, "status": "pending", "jobid": jobid}
 
-User study prompt:
-{body.prompt}
 
-Indexed file names (for context; retrieval uses the indexed docs automatically):
-{chr(10).join(f"- {n}" for n in file_names) if file_names else "- (none found)"}
-""".strip()
+def _deck_cache_key(db_cursor, projectid: str, prompt: str) -> tuple[str, str]:
+    index_version = project_index_version(db_cursor, projectid)
+    return generation_cache_key(projectid, index_version, "deck", prompt), index_version
 
-    # -------------------------
-    # Generate cards (single pass + one retry if JSON is bad)
-    # -------------------------
-    warning = None
-    print("[GENERATION] Generating flashcards (single-pass)")
 
-    gen = await client.add_message(
-        thread_id=thread_id,
-        content=FLASHCARDS_SYSTEM + "\n\n" + user_prompt,
-        llm_provider="openai",
-        model_name="gpt-4o",
-        stream=False,
-        # use Readonly so you don't store flashcards in memory
-        memory="Readonly",
+def _set_deck_status(
+    db_cursor, db_conn, deckid: str, status: str, generation_error: str | None = None
+):
+    db_cursor.execute(
+        "UPDATE decks SET status=?, generation_error=? WHERE deckid=?",
+        (status, generation_error, deckid),
     )
+    db_conn.commit()
+
+
+# Stream flashcards from Backboard and save each card as soon as it is complete
+# (set DECK_STREAMING=0 to wait for the whole response instead).
+DECK_STREAMING = os.getenv("DECK_STREAMING", "1") == "1"
+DECK_MIN_CARDS = 10
+DECK_MAX_CARDS = 20
+
+
+def _clean_flashcard(c) -> dict | None:
+    if not isinstance(c, dict):
+        return None
+    front = (c.get("front") or "").strip()
+    back = (c.get("back") or "").strip()
+    if not front or not back:
+        return None
+
+    external = bool(c.get("external", True))
+    note = (c.get("note") or "").strip()
+    if external and not note:
+        note = "General knowledge (not found in course docs)."
 
-    gen_raw = getattr(gen, "content", gen)
-    print("[GENERATION RAW]")
-    print(gen_raw)
+    return {"front": front, "back": back, "external": external, "note": note}
 
-    gen_json = _safe_json_load(gen_raw)
-    if not isinstance(gen_json, dict):
-        print("[GENERATION] ❌ Invalid JSON; retrying once")
-        retry = await client.add_message(
+
+def _flashcards_request(content: str):
+    async def op(client, assistant_id, thread_id):
+        logger.debug("Flashcards request on thread %s", thread_id)
+        return await client.add_message(
             thread_id=thread_id,
-            content="Return ONLY valid JSON. No markdown. No commentary.\n\n"
-            + FLASHCARDS_SYSTEM
-            + "\n\n"
-            + user_prompt,
+            content=content,
             llm_provider="openai",
             model_name="gpt-4o",
             stream=False,
+            # use Readonly so you don't store flashcards in memory
             memory="Readonly",
         )
-        retry_raw = getattr(retry, "content", retry)
-        print("[RETRY RAW]")
-        print(retry_raw)
-        gen_json = _safe_json_load(retry_raw)
 
-    mode = "external_only"
-    confidence = 25
-    cards = []
+    return op
 
-    if isinstance(gen_json, dict):
-        mode = (gen_json.get("mode") or "external_only").strip().lower()
-        if mode not in ("grounded", "mixed", "external_only"):
-            mode = "external_only"
 
-        try:
-            confidence = int(gen_json.get("confidence", 25))
-        except Exception:
-            confidence = 25
-        confidence = max(0, min(100, confidence))
+def _flashcards_stream_request(content: str, on_card):
+    """Like _flashcards_request, but calls on_card(card) for every card as it completes."""
+
+    async def op(client, assistant_id, thread_id):
+        logger.debug("Flashcards stream on thread %s", thread_id)
+        parser = TolerantJsonParser(item_key="cards")
+        events = await client.add_message(
+            thread_id=thread_id,
+            content=content,
+            llm_provider="openai",
+            model_name="gpt-4o",
+            stream=True,
+            memory="Readonly",
+        )
+        async for event in events:
+            if event.get("type") == "content_streaming":
+                for card in parser.feed(event.get("content") or ""):
+                    on_card(card)
+        return parser
+
+    return op
+
+
+async def _generate_deck_cards(deckid: str, projectid: str, name: str, prompt: str):
+    local_conn = connect_db()
+    local_cursor = local_conn.cursor()
+    try:
+        _set_deck_status(local_cursor, local_conn, deckid, "generating")
+
+        file_paths = get_project_file_paths(projectid)
+        file_names = [os.path.basename(p) for p in (file_paths or [])]
+
+        if not file_names:
+            logger.warning("Deck %s: no indexed files found for project %s", deckid, projectid)
+
+        user_prompt = f"""
+Course: {projectid}
+Deck name: {name}
+
+User study prompt:
+{prompt}
+
+Indexed file names (for context; retrieval uses the indexed docs automatically):
+{chr(10).join(f"- {n}" for n in file_names) if file_names else "- (none found)"}
+""".strip()
+
+        # -------------------------
+        # Save cards as they are produced
+        # (DB only stores front/back; append external marker to back)
+        # Near-duplicates of cards already in the course are dropped.
+        # -------------------------
+        inserted = 0
+        dropped = 0  # near-duplicates of cards already in the course
+        saved_cards = []
+        ensure_indexed(local_cursor, projectid)
+
+        def save_cards(raw_cards, dedupe: bool = True):
+            nonlocal inserted, dropped
+            pairs = []
+            for raw_card in raw_cards:
+                card = _clean_flashcard(raw_card)
+                if card is None:
+                    continue
+                if inserted + len(pairs) >= DECK_MAX_CARDS:
+                    break
+                back_to_store = card["back"]
+                if card["external"]:
+                    back_to_store += f"\n\n[External] {card['note']}"
+                pairs.append((card["front"], back_to_store))
+            if dedupe:
+                pairs, n_dropped = drop_duplicates(local_cursor, projectid, pairs)
+                dropped += n_dropped
+            if not pairs:
+                return
+
+            _insert_cards(local_cursor, deckid, pairs, start_position=inserted)
+            # commit right away so the deck page sees the cards
+            local_conn.commit()
+            saved_cards.extend({"front": f, "back": b} for f, b in pairs)
+            inserted += len(pairs)
+
+        warning = None
+        gen_json = None
+
+        if DECK_STREAMING:
+            logger.debug("Deck %s: generating flashcards (streaming)", deckid)
+            try:
+                parser = await with_backboard_memory(
+                    projectid,
+                    _flashcards_stream_request(
+                        FLASHCARDS_SYSTEM + "\n\n" + user_prompt,
+                        lambda card: save_cards([card]),
+                    ),
+                )
+                logger.debug(
+                    "Deck %s: raw flashcards reply",
+                    deckid,
+                    extra={"payload": payload_for_log(parser.text)},
+                )
+                gen_json = parser.result()
+            except Exception as e:
+                logger.warning("Flashcard stream for deck %s broke off: %s", deckid, e)
+                if inserted:
+                    # keep the cards that made it; padding below fills the rest
+                    warning = "Generation stopped early; some cards may be missing."
+
+        # -------------------------
+        # Generate cards in one response (single pass + one retry if JSON is bad)
+        # -------------------------
+        if not inserted + dropped and not warning:
+            logger.debug("Deck %s: generating flashcards (single-pass)", deckid)
+
+            gen = await with_backboard_memory(
+                projectid, _flashcards_request(FLASHCARDS_SYSTEM + "\n\n" + user_prompt)
+            )
+
+            gen_raw = getattr(gen, "content", gen)
+            logger.debug(
+                "Deck %s: raw flashcards reply",
+                deckid,
+                extra={"payload": payload_for_log(gen_raw)},
+            )
+
+            gen_json = parse_tolerant_json(gen_raw)
+            if not isinstance(gen_json, dict):
+                logger.warning("Deck %s: flashcards reply was not valid JSON, retrying once", deckid)
+                retry = await with_backboard_memory(
+                    projectid,
+                    _flashcards_request(
+                        "Return ONLY valid JSON. No markdown. No commentary.\n\n"
+                        + FLASHCARDS_SYSTEM
+                        + "\n\n"
+                        + user_prompt
+                    ),
+                )
+                retry_raw = getattr(retry, "content", retry)
+                logger.debug(
+                    "Deck %s: raw flashcards retry reply",
+                    deckid,
+                    extra={"payload": payload_for_log(retry_raw)},
+                )
+                gen_json = parse_tolerant_json(retry_raw)
+
+            if isinstance(gen_json, dict):
+                cards = gen_json.get("cards") or []
+                if not isinstance(cards, list):
+                    cards = []
+                save_cards(cards)
 
-        cards = gen_json.get("cards") or []
-        if not isinstance(cards, list):
-            cards = []
-    else:
-        warning = "Model did not return valid JSON; padded with generic cards."
         mode = "external_only"
-        confidence = 20
-        cards = []
-
-    # -------------------------
-    # Clean & ensure 10 cards minimum (always generate)
-    # -------------------------
-    cleaned = []
-    for c in cards[:20]:
-        if not isinstance(c, dict):
-            continue
-        front = (c.get("front") or "").strip()
-        back = (c.get("back") or "").strip()
-        if not front or not back:
-            continue
+        confidence = 25
 
-        external = bool(c.get("external", True))
-        note = (c.get("note") or "").strip()
-        if external and not note:
-            note = "General knowledge (not found in course docs)."
+        if isinstance(gen_json, dict):
+            mode = (gen_json.get("mode") or "external_only").strip().lower()
+            if mode not in ("grounded", "mixed", "external_only"):
+                mode = "external_only"
 
-        cleaned.append(
-            {"front": front, "back": back, "external": external, "note": note}
+            try:
+                confidence = int(gen_json.get("confidence", 25))
+            except Exception:
+                confidence = 25
+            confidence = max(0, min(100, confidence))
+        elif not inserted:
+            warning = "Model did not return valid JSON; padded with generic cards."
+            mode = "external_only"
+            confidence = 20
+
+        # -------------------------
+        # Ensure 10 cards minimum (always generate)
+        # -------------------------
+        if inserted < DECK_MIN_CARDS:
+            # templates differ only by number, so they skip the duplicate check
+            save_cards(
+                [
+                    {
+                        "front": f"Key idea #{n + 1}",
+                        "back": "Write a concise explanation and one example from your notes.",
+                        "external": True,
+                        "note": "General study template (not found in course docs).",
+                    }
+                    for n in range(inserted, DECK_MIN_CARDS)
+                ],
+                dedupe=False,
+            )
+            confidence = min(confidence, 25)
+            warning = warning or "Some cards were padded with general study templates."
+
+        _set_deck_status(local_cursor, local_conn, deckid, "ready")
+        logger.info(
+            "Deck generated",
+            extra={
+                "deckid": deckid,
+                "cards": inserted,
+                "dropped_duplicates": dropped,
+                "mode": mode,
+                "confidence": confidence,
+                "warning": warning,
+            },
         )
 
-    while len(cleaned) < 10:
-        cleaned.append(
-            {
-                "front": f"Key idea #{len(cleaned) + 1}",
-                "back": "Write a concise explanation and one example from your notes.",
-                "external": True,
-                "note": "General study template (not found in course docs).",
-            }
+        # padded or cut-short decks are not worth handing out again
+        if warning is None:
+            cache_key, index_version = _deck_cache_key(local_cursor, projectid, prompt)
+            put_cached_generation(
+                local_conn,
+                cache_key,
+                projectid,
+                index_version,
+                "deck",
+                {"cards": saved_cards, "mode": mode, "confidence": confidence},
+            )
+
+        return {
+            "deckid": deckid,
+            "generated": inserted,
+            "dropped_duplicates": dropped,
+            "confidence": confidence,
+            "mode": mode,
+            "matched_files": file_names,
+            "warning": warning,
+        }
+
+    except Exception as e:
+        logger.error("Deck generation failed: %s", e)
+        err_detail = f"{type(e).__name__}: {e}".strip()
+        _set_deck_status(
+            local_cursor,
+            local_conn,
+            deckid,
+            "failed",
+            f"Deck generation failed ({err_detail})",
         )
-        confidence = min(confidence, 25)
-        warning = warning or "Some cards were padded with general study templates."
-
-    cleaned = cleaned[:20]
-
-    print("[GENERATION FINAL]")
-    print("  final_mode:", mode)
-    print("  final_confidence:", confidence)
-    print("  final_cards:", len(cleaned))
-    if warning:
-        print("  warning:", warning)
-
-    # -------------------------
-    # Save cards
-    # (DB only stores front/back; append external marker to back)
-    # -------------------------
-    inserted = 0
-    for c in cleaned:
-        cardid = uuid.uuid4().hex[:8]
-
-        back_to_store = c["back"]
-        if c["external"]:
-            back_to_store += f"\n\n[External] {c['note']}"
+        return {"deckid": deckid, "generated": 0, "error": err_detail}
+    finally:
+        local_conn.close()
 
-        cursor.execute(
-            "INSERT INTO cards (cardid, deckid, front, back) VALUES (?, ?, ?, ?)",
-            (cardid, deckid, c["front"], back_to_store),
+
+async def _run_deck_generation_job(payload: dict):
+    deckid = payload["deckid"]
+    local_conn = connect_db()
+    try:
+        row = local_conn.execute(
+            "SELECT projectid, name, prompt FROM decks WHERE deckid=?", (deckid,)
+        ).fetchone()
+        if row is not None:
+            # a retried job starts over, so drop cards from an interrupted attempt
+            cardids = [
+                r[0]
+                for r in local_conn.execute(
+                    "SELECT cardid FROM cards WHERE deckid=?", (deckid,)
+                ).fetchall()
+            ]
+            unindex_cards(local_conn, cardids)
+            local_conn.execute("DELETE FROM cards WHERE deckid=?", (deckid,))
+            local_conn.commit()
+    finally:
+        local_conn.close()
+    if row is None:
+        logger.warning("Deck %s disappeared before generation", deckid)
+        return None
+
+    return await _generate_deck_cards(deckid, row[0], row[1], row[2])
+
+
+async def _give_up_deck_generation(payload: dict, error: str):
+    local_conn = connect_db()
+    try:
+        _set_deck_status(
+            local_conn.cursor(),
+            local_conn,
+            payload["deckid"],
+            "failed",
+            f"Deck generation was interrupted ({error}). Try creating the deck again.",
         )
-        inserted += 1
+    finally:
+        local_conn.close()
 
-    conn.commit()
-    print(f"[DB] cards inserted: {inserted}")
 
-    return {
-        "success": True,
-        "deckid": deckid,
-        "generated": inserted,
-        "confidence": confidence,
-        "mode": mode,
-        "matched_files": file_names,
-        "warning": warning,
-    }
+JOB_HANDLERS["deck_generation"] = JobHandler(
+    _run_deck_generation_job,
+    on_give_up=_give_up_deck_generation,
+    max_in_flight=GENERATION_MAX_IN_FLIGHT,
+    in_flight_group="generation",
+)
 
 
 # Get deck details and cards (with scheduling fields)
@@ -1703,7 +2432,7 @@ async def get_deck(deckid: str, session: str = Cookie(None)):
 
     # Deck ownership check
     cursor.execute(
-        "SELECT deckid, projectid, name, prompt, createddate FROM decks WHERE deckid=? AND userid=?",
+        "SELECT deckid, projectid, name, prompt, createddate, status, generation_error FROM decks WHERE deckid=? AND userid=?",
         (deckid, userid),
     )
     row = cursor.fetchone()
@@ -1716,6 +2445,9 @@ async def get_deck(deckid: str, session: str = Cookie(None)):
         "name": row[2],
         "prompt": row[3],
         "createddate": row[4],
+        # decks created before background generation have no status
+        "status": row[5] or "ready",
+        "generation_error": row[6],
     }
 
     # Cards + scheduling fields
@@ -1725,7 +2457,7 @@ async def get_deck(deckid: str, session: str = Cookie(None)):
             cardid,
             front,
             back,
-            COALESCE(position, 999999) as pos,
+            position,
             due_at,
             interval_days,
             ease,
@@ -1734,7 +2466,7 @@ async def get_deck(deckid: str, session: str = Cookie(None)):
             last_reviewed_at
         FROM cards
         WHERE deckid=?
-        ORDER BY pos ASC, rowid ASC
+        ORDER BY position ASC, rowid ASC
     """,
         (deckid,),
     )
@@ -1758,17 +2490,86 @@ async def get_deck(deckid: str, session: str = Cookie(None)):
             }
         )
 
+    # cards appear as generation saves them; the client polls until status is final
+    deck["cards_generated"] = len(cards)
+
     return {"success": True, "deck": deck, "cards": cards}
 
 
-@app.delete("/decks/{deckid}")
-async def delete_deck(deckid: str, session: str = Cookie(None)):
+# How often the deck event stream checks the database for new cards.
+DECK_EVENTS_POLL_S = float(os.getenv("DECK_EVENTS_POLL_S", "0.5"))
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {dumps_text(data)}\n\n"
+
+
+# Stream cards of a deck while it is being generated (server-sent events)
+@app.get("/decks/{deckid}/events")
+async def deck_events(deckid: str, request: Request, session: str = Cookie(None)):
+    """
+    Sends a `card` event for every saved card, `status` when the deck status
+    changes and `done` once the deck is ready or failed. Generation usually runs
+    in the worker process, so this follows the database rather than the job.
+    """
     if session is None:
         return {"success": False, "message": "Unauthorized"}
     userid = session
 
-    # Verify deck belongs to this user
-    cursor.execute(
+    cursor.execute("SELECT 1 FROM decks WHERE deckid=? AND userid=?", (deckid, userid))
+    if cursor.fetchone() is None:
+        return {"success": False, "message": "Deck not found"}
+
+    async def events():
+        last_rowid = 0
+        last_status = None
+        while not await request.is_disconnected():
+            rows = conn.execute(
+                """
+                SELECT rowid, cardid, front, back, position
+                FROM cards WHERE deckid=? AND rowid>?
+                ORDER BY rowid
+                """,
+                (deckid, last_rowid),
+            ).fetchall()
+            for r in rows:
+                last_rowid = r[0]
+                yield _sse(
+                    "card",
+                    {"cardid": r[1], "front": r[2], "back": r[3], "position": r[4]},
+                )
+
+            row = conn.execute(
+                "SELECT status, generation_error FROM decks WHERE deckid=?", (deckid,)
+            ).fetchone()
+            if row is None:
+                yield _sse("done", {"status": "deleted"})
+                return
+            status = row[0] or "ready"
+            if status != last_status:
+                last_status = status
+                yield _sse("status", {"status": status, "generation_error": row[1]})
+            if status in ("ready", "failed"):
+                yield _sse("done", {"status": status})
+                return
+
+            await asyncio.sleep(DECK_EVENTS_POLL_S)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.delete("/decks/{deckid}")
+async def delete_deck(deckid: str, session: str = Cookie(None)):
+    if session is None:
+        return {"success": False, "message": "Unauthorized"}
+    userid = session
+
+    # Verify deck belongs to this user
+    cursor.execute(
         "SELECT projectid FROM decks WHERE deckid=? AND userid=?", (deckid, userid)
     )
     row = cursor.fetchone()
@@ -1776,6 +2577,8 @@ async def delete_deck(deckid: str, session: str = Cookie(None)):
         return {"success": False, "message": "Deck not found"}
 
     # Delete cards first (safe even without foreign keys)
+    cursor.execute("SELECT cardid FROM cards WHERE deckid=?", (deckid,))
+    unindex_cards(cursor, [r[0] for r in cursor.fetchall()])
     cursor.execute("DELETE FROM cards WHERE deckid=?", (deckid,))
     cursor.execute("DELETE FROM decks WHERE deckid=?", (deckid,))
     conn.commit()
@@ -1783,6 +2586,143 @@ async def delete_deck(deckid: str, session: str = Cookie(None)):
     return {"success": True, "deleted_deckid": deckid}
 
 
+STUDY_QUEUE_MAX = 200
+# cards a user may see for the first time per day, across all decks
+STUDY_NEW_CARDS_PER_DAY = int(os.getenv("STUDY_NEW_CARDS_PER_DAY", "20"))
+
+_STUDY_CARD_COLUMNS = """
+    c.cardid, c.deckid, d.name, d.projectid, c.front, c.back, c.position,
+    c.due_at, c.interval_days, c.ease, c.reps, c.lapses, c.last_reviewed_at
+"""
+
+
+def _study_card(r) -> dict:
+    return {
+        "cardid": r[0],
+        "deckid": r[1],
+        "deck_name": r[2],
+        "projectid": r[3],
+        "front": r[4],
+        "back": r[5],
+        "position": r[6],
+        "due_at": r[7],
+        "interval_days": r[8],
+        "ease": r[9],
+        "reps": r[10],
+        "lapses": r[11],
+        "last_reviewed_at": r[12],
+    }
+
+
+@app.get("/study/queue")
+async def study_queue(
+    limit: int = 20,
+    projectid: str | None = None,
+    tz_offset_minutes: int = 0,
+    session: str = Cookie(None),
+):
+    """
+    Next cards to study across the user's decks (or one course): cards in review
+    that are due, earliest first, then new cards in deck order while today's
+    new-card allowance (STUDY_NEW_CARDS_PER_DAY) lasts. tz_offset_minutes moves
+    the start of "today" to the user's local midnight.
+    """
+    if session is None:
+        return {"success": False, "message": "Unauthorized"}
+    userid = session
+
+    if limit <= 0 or limit > STUDY_QUEUE_MAX:
+        return {"success": False, "message": f"limit must be between 1 and {STUDY_QUEUE_MAX}"}
+    if projectid is not None and not _require_project_owned(projectid, userid):
+        return {"success": False, "message": "Project not found"}
+
+    deck_filter = "d.userid=?" + (" AND d.projectid=?" if projectid else "")
+    deck_args = (userid, projectid) if projectid else (userid,)
+
+    now = datetime.now(dt.UTC)
+    local_now = now + timedelta(minutes=tz_offset_minutes)
+    day_start = (
+        local_now.replace(hour=0, minute=0, second=0, microsecond=0)
+        - timedelta(minutes=tz_offset_minutes)
+    ).isoformat()
+
+    cursor.execute(
+        f"""
+        SELECT {_STUDY_CARD_COLUMNS}
+        FROM decks d
+        JOIN cards c ON c.deckid = d.deckid
+        WHERE {deck_filter} AND c.introduced_at IS NOT NULL AND c.due_at<=?
+        ORDER BY c.due_at
+        LIMIT ?
+        """,
+        (*deck_args, now.isoformat(), limit),
+    )
+    due = [_study_card(r) for r in cursor.fetchall()]
+
+    # the allowance is per user, whichever course the cards were introduced in
+    cursor.execute(
+        """
+        SELECT COUNT(*)
+        FROM decks d
+        JOIN cards c ON c.deckid = d.deckid
+        WHERE d.userid=? AND c.introduced_at IS NOT NULL AND c.introduced_at>=?
+        """,
+        (userid, day_start),
+    )
+    new_remaining = max(0, STUDY_NEW_CARDS_PER_DAY - cursor.fetchone()[0])
+
+    new = []
+    new_limit = min(limit - len(due), new_remaining)
+    if new_limit > 0:
+        cursor.execute(
+            f"""
+            SELECT {_STUDY_CARD_COLUMNS}
+            FROM decks d
+            JOIN cards c ON c.deckid = d.deckid
+            WHERE {deck_filter} AND c.introduced_at IS NULL
+            ORDER BY d.createddate, d.deckid, c.position
+            LIMIT ?
+            """,
+            (*deck_args, new_limit),
+        )
+        new = [_study_card(r) for r in cursor.fetchall()]
+
+    return {
+        "success": True,
+        "cards": due + new,
+        "due": len(due),
+        "new": len(new),
+        "new_remaining_today": new_remaining,
+    }
+
+
+STUDY_STATS_MAX_DAYS = 365
+
+
+@app.get("/study/stats")
+async def study_stats(
+    days: int = 30,
+    projectid: str | None = None,
+    deckid: str | None = None,
+    session: str = Cookie(None),
+):
+    """
+    Review counts, pass rate and mature-card retention per UTC day over the
+    last `days` days, for all decks, one course or one deck. Reads only the
+    daily rollups, never the review log.
+    """
+    if session is None:
+        return {"success": False, "message": "Unauthorized"}
+    userid = session
+
+    if days <= 0 or days > STUDY_STATS_MAX_DAYS:
+        return {"success": False, "message": f"days must be between 1 and {STUDY_STATS_MAX_DAYS}"}
+
+    since_day = (datetime.now(dt.UTC) - timedelta(days=days - 1)).date().isoformat()
+    stats = daily_stats(cursor, userid, since_day, projectid=projectid, deckid=deckid)
+    return {"success": True, "since": since_day, **stats}
+
+
 # endregion
 
 ###############
@@ -1881,64 +2821,64 @@ async def add_card(deckid: str, body: CreateCardRequest, session: str = Cookie(N
     if not front or not back:
         return {"success": False, "message": "front and back are required"}
 
-    # position = max(position)+1 (fallback if null)
-    cursor.execute(
-        "SELECT COALESCE(MAX(position), 0) FROM cards WHERE deckid=?", (deckid,)
-    )
-    max_pos = cursor.fetchone()[0] or 0
-    pos = int(max_pos) + 1
+    card = _insert_cards(cursor, deckid, [(front, back)])[0]
+    conn.commit()
 
-    cardid = uuid.uuid4().hex[:8]
-    createddate = datetime.now(dt.UTC).isoformat()
+    return {"success": True, "card": card}
 
-    # initial scheduling defaults
-    due_at = datetime.now(dt.UTC).isoformat()
-    interval_days = 0.0
-    ease = 2.5
-    reps = 0
-    lapses = 0
-    last_reviewed_at = None
 
-    cursor.execute(
-        """
-        INSERT INTO cards (
-            cardid, deckid, front, back, position,
-            due_at, interval_days, ease, reps, lapses, last_reviewed_at, createddate
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """,
-        (
-            cardid,
-            deckid,
-            front,
-            back,
-            pos,
-            due_at,
-            interval_days,
-            ease,
-            reps,
-            lapses,
-            last_reviewed_at,
-            createddate,
-        ),
-    )
+@app.post("/decks/{deckid}/cards/bulk")
+async def add_cards_bulk(
+    deckid: str, body: CreateCardsBulkRequest, session: str = Cookie(None)
+):
+    if session is None:
+        return {"success": False, "message": "Unauthorized"}
+    userid = session
+
+    if not _require_deck_owned(deckid, userid):
+        return {"success": False, "message": "Deck not found"}
+
+    if not body.cards:
+        return {"success": False, "message": "cards is required"}
+    if len(body.cards) > CARDS_BULK_MAX:
+        return {"success": False, "message": f"At most {CARDS_BULK_MAX} cards at once"}
+
+    pairs = []
+    for i, item in enumerate(body.cards):
+        front = (item.front or "").strip()
+        back = (item.back or "").strip()
+        if not front or not back:
+            return {
+                "success": False,
+                "message": f"Card {i + 1}: front and back are required",
+            }
+        pairs.append((front, back))
+
+    cards = _insert_cards(cursor, deckid, pairs)
     conn.commit()
 
-    return {
-        "success": True,
-        "card": {
-            "cardid": cardid,
-            "deckid": deckid,
-            "front": front,
-            "back": back,
-            "position": pos,
-        },
-    }
+    return {"success": True, "cards": cards}
 
 
-@app.post("/projects/{projectid}/quizzes")
-async def create_quiz(
-    projectid: str, body: CreateQuizRequest, session: str = Cookie(None)
+def _scheduling_rank(card: dict) -> tuple:
+    # more reviews, then a longer interval, then fewer lapses, then the older card
+    return (
+        -(card["reps"] or 0),
+        -(card["interval_days"] or 0.0),
+        card["lapses"] or 0,
+        card["rowid"],
+    )
+
+
+@app.post("/projects/{projectid}/cards/dedupe")
+async def dedupe_cards(
+    projectid: str, body: DedupeCardsRequest, session: str = Cookie(None)
 ):
+    """
+    Reports clusters of near-duplicate cards across the course's decks. With
+    merge, each cluster keeps its best-scheduled card (most review progress)
+    and the other cards are deleted.
+    """
     if session is None:
         return {"success": False, "message": "Unauthorized"}
     userid = session
@@ -1949,41 +2889,133 @@ async def create_quiz(
     if cursor.fetchone() is None:
         return {"success": False, "message": "Project not found"}
 
+    threshold = body.threshold if body.threshold is not None else CARD_DEDUPE_THRESHOLD
+    if not 0 < threshold <= 1:
+        return {"success": False, "message": "threshold must be between 0 and 1"}
+
+    ensure_indexed(cursor, projectid)
+    clusters = duplicate_clusters(cursor, projectid, threshold)
+
+    cardids = [cardid for cluster in clusters for cardid in cluster]
+    cards = {}
+    if cardids:
+        cursor.execute(
+            f"""
+            SELECT c.rowid, c.cardid, c.deckid, d.name, c.front, c.reps,
+                   c.interval_days, c.lapses, c.last_reviewed_at, c.due_at
+            FROM cards c
+            JOIN decks d ON d.deckid = c.deckid
+            WHERE c.cardid IN ({",".join("?" * len(cardids))})
+            """,
+            cardids,
+        )
+        for r in cursor.fetchall():
+            cards[r[1]] = {
+                "rowid": r[0],
+                "cardid": r[1],
+                "deckid": r[2],
+                "deck_name": r[3],
+                "front": r[4],
+                "reps": r[5],
+                "interval_days": r[6],
+                "lapses": r[7],
+                "last_reviewed_at": r[8],
+                "due_at": r[9],
+            }
+
+    report = []
+    removed = []
+    for cluster in clusters:
+        members = sorted((cards[c] for c in cluster if c in cards), key=_scheduling_rank)
+        if len(members) < 2:
+            continue
+        for card in members:
+            card.pop("rowid")
+        report.append({"keep": members[0], "duplicates": members[1:]})
+        removed.extend(card["cardid"] for card in members[1:])
+
+    if body.merge and removed:
+        cursor.executemany(
+            "DELETE FROM cards WHERE cardid=?", [(cardid,) for cardid in removed]
+        )
+        unindex_cards(cursor, removed)
+        conn.commit()
+        logger.info(
+            "Merged duplicate cards",
+            extra={"projectid": projectid, "clusters": len(report), "removed": len(removed)},
+        )
+
+    return {
+        "success": True,
+        "clusters": report,
+        "duplicates": len(removed),
+        "merged": len(removed) if body.merge else 0,
+    }
+
+
+def _parse_quiz_spec(db_cursor, projectid: str, body: CreateQuizRequest):
+    """Validates a quiz request. Returns (error, None) or (None, spec dict)."""
     topic = (body.topic or "").strip()
     quiz_type = (body.quiz_type or "").strip().lower()
     num_questions = int(body.num_questions or 0)
     document_ids = body.document_ids or []
 
     if not topic:
-        return {"success": False, "message": "topic is required"}
+        return "topic is required", None
     if quiz_type not in {"mcq", "short", "long"}:
-        return {
-            "success": False,
-            "message": "quiz_type must be one of: mcq, short, long",
-        }
+        return "quiz_type must be one of: mcq, short, long", None
     if num_questions <= 0 or num_questions > 50:
-        return {"success": False, "message": "num_questions must be between 1 and 50"}
+        return "num_questions must be between 1 and 50", None
 
     # If no document_ids supplied, default to all documents in the project
     if not document_ids:
-        cursor.execute(
-            """
-            SELECT documentid
-            FROM documents
-            WHERE projectid=? AND userid=?
-            """,
-            (projectid, userid),
+        db_cursor.execute(
+            "SELECT fileid FROM fileinproj WHERE projectid=?", (projectid,)
         )
-        document_ids = [r[0] for r in cursor.fetchall()]
+        document_ids = [r[0] for r in db_cursor.fetchall()]
 
     if not document_ids:
-        return {"success": False, "message": "No documents available for this course"}
+        return "No documents available for this course", None
+
+    return None, {
+        "topic": topic,
+        "quiz_type": quiz_type,
+        "num_questions": num_questions,
+        "document_ids": document_ids,
+        "no_cache": body.no_cache,
+    }
 
+
+def _insert_quiz(
+    db_cursor, db_conn, projectid: str, userid: str, spec: dict, index_version: str
+) -> dict:
+    """
+    Inserts a quiz row without committing. It is filled from the question bank
+    when the bank has enough questions the user has not seen, otherwise it is
+    left 'pending' for generation. Returns the quiz as sent to the client.
+    """
     quizid = uuid.uuid4().hex[:8]
     createddate = datetime.now(dt.UTC).isoformat()
-    title = f"{topic} ({quiz_type.upper()})"
+    title = f"{spec['topic']} ({spec['quiz_type'].upper()})"
 
-    cursor.execute(
+    # enough unseen questions in the course bank: the quiz is ready right away
+    banked = None
+    if not spec["no_cache"]:
+        rows = sample_questions(
+            db_conn,
+            userid,
+            projectid,
+            spec["topic"],
+            spec["quiz_type"],
+            spec["document_ids"],
+            index_version,
+            spec["num_questions"],
+        )
+        if len(rows) == spec["num_questions"]:
+            banked = assemble_quiz(rows)
+            mark_served(db_conn, userid, [row[0] for row in rows], commit=False)
+
+    db_cursor.execute(
         """
         INSERT INTO quizzes (
             quizid, projectid, userid, title, topic, quiz_type, num_questions,
@@ -1996,47 +3028,401 @@ async def create_quiz(
             projectid,
             userid,
             title,
-            topic,
-            quiz_type,
-            num_questions,
-            json.dumps(document_ids),
-            json.dumps({"questions": []}),
-            json.dumps({}),
-            json.dumps({}),
-            "pending",
+            spec["topic"],
+            spec["quiz_type"],
+            spec["num_questions"],
+            dumps_text(spec["document_ids"]),
+            dumps_text({"questions": banked[0] if banked else []}),
+            dumps_text(banked[1] if banked else {}),
+            dumps_text(banked[2] if banked else {}),
+            "ready" if banked else "pending",
             None,
             createddate,
         ),
     )
-    conn.commit()
 
-    asyncio.create_task(
-        _generate_quiz_content(
-            quizid=quizid,
-            projectid=projectid,
-            userid=userid,
-            topic=topic,
-            quiz_type=quiz_type,
-            num_questions=num_questions,
-            document_ids=document_ids,
+    return {
+        "quizid": quizid,
+        "projectid": projectid,
+        "title": title,
+        "topic": spec["topic"],
+        "quiz_type": spec["quiz_type"],
+        "num_questions": spec["num_questions"],
+        "document_ids": spec["document_ids"],
+        "status": "ready" if banked else "pending",
+        "generation_error": None,
+        "createddate": createddate,
+    }
+
+
+@app.post("/projects/{projectid}/quizzes")
+async def create_quiz(
+    projectid: str, body: CreateQuizRequest, session: str = Cookie(None)
+):
+    if session is None:
+        return {"success": False, "message": "Unauthorized"}
+    userid = session
+
+    cursor.execute(
+        "SELECT 1 FROM projects WHERE projectid=? AND userid=?", (projectid, userid)
+    )
+    if cursor.fetchone() is None:
+        return {"success": False, "message": "Project not found"}
+
+    error, spec = _parse_quiz_spec(cursor, projectid, body)
+    if error:
+        return {"success": False, "message": error}
+
+    quiz = _insert_quiz(
+        cursor, conn, projectid, userid, spec, project_index_version(cursor, projectid)
+    )
+    if quiz["status"] == "pending":
+        # quiz row and its generation job are committed together
+        enqueue_job(
+            cursor,
+            conn,
+            "quiz_generation",
+            {"quizid": quiz["quizid"], "userid": userid, "fresh": spec["no_cache"]},
+            dedupe_key=f"quiz:{quiz['quizid']}",
+            commit=False,
         )
+    conn.commit()
+
+    return {"success": True, "quiz": quiz, "from_bank": quiz["status"] == "ready"}
+
+
+QUIZ_BATCH_MAX_QUIZZES = 20
+# Output a single batch call may produce; gpt-4o writes at most 16k tokens.
+QUIZ_BATCH_OUTPUT_TOKENS = int(os.getenv("QUIZ_BATCH_OUTPUT_TOKENS", "12000"))
+# rough output size of one question with its answer and explanation
+_QUIZ_TOKENS_PER_QUESTION = {"mcq": 150, "short": 120, "long": 250}
+
+
+@app.post("/projects/{projectid}/quizzes/batch")
+async def create_quiz_batch(
+    projectid: str, body: CreateQuizBatchRequest, session: str = Cookie(None)
+):
+    if session is None:
+        return {"success": False, "message": "Unauthorized"}
+    userid = session
+
+    cursor.execute(
+        "SELECT 1 FROM projects WHERE projectid=? AND userid=?", (projectid, userid)
     )
+    if cursor.fetchone() is None:
+        return {"success": False, "message": "Project not found"}
+
+    if not body.quizzes:
+        return {"success": False, "message": "quizzes is required"}
+    if len(body.quizzes) > QUIZ_BATCH_MAX_QUIZZES:
+        return {
+            "success": False,
+            "message": f"At most {QUIZ_BATCH_MAX_QUIZZES} quizzes per batch",
+        }
+
+    specs = []
+    for i, item in enumerate(body.quizzes):
+        error, spec = _parse_quiz_spec(cursor, projectid, item)
+        if error:
+            return {"success": False, "message": f"Quiz {i + 1}: {error}"}
+        specs.append(spec)
+
+    index_version = project_index_version(cursor, projectid)
+    quizzes = [
+        _insert_quiz(cursor, conn, projectid, userid, spec, index_version)
+        for spec in specs
+    ]
+
+    # quizzes the bank could not fill are generated together, as few model
+    # calls as the output budget allows
+    pending = [q for q in quizzes if q["status"] == "pending"]
+    fresh = {q["quizid"] for q, spec in zip(quizzes, specs) if spec["no_cache"]}
+    jobids = []
+    for group in _group_quiz_specs(pending, QUIZ_BATCH_OUTPUT_TOKENS):
+        quizids = [q["quizid"] for q in group]
+        jobids.append(
+            enqueue_job(
+                cursor,
+                conn,
+                "quiz_batch_generation",
+                {
+                    "quizids": quizids,
+                    "userid": userid,
+                    "fresh": [quizid for quizid in quizids if quizid in fresh],
+                },
+                dedupe_key=f"quizbatch:{quizids[0]}",
+                commit=False,
+            )
+        )
+    conn.commit()
+
+    return {"success": True, "quizzes": quizzes, "jobids": jobids}
+
+
+def _quiz_output_tokens(quiz: dict) -> int:
+    return quiz["num_questions"] * _QUIZ_TOKENS_PER_QUESTION[quiz["quiz_type"]]
+
+
+def _group_quiz_specs(quizzes: list[dict], budget: int) -> list[list[dict]]:
+    """Packs quizzes into as few groups as fit the output budget (first-fit decreasing)."""
+    groups: list[list[dict]] = []
+    sizes: list[int] = []
+    for quiz in sorted(quizzes, key=_quiz_output_tokens, reverse=True):
+        size = _quiz_output_tokens(quiz)
+        for i, used in enumerate(sizes):
+            if used + size <= budget:
+                groups[i].append(quiz)
+                sizes[i] += size
+                break
+        else:
+            # a quiz bigger than the budget still gets a call of its own
+            groups.append([quiz])
+            sizes.append(size)
+    return groups
+
+
+def _split_quiz_batch(payload, count: int) -> list:
+    """Per-quiz payloads of a batch reply, matched by key and else by position."""
+    entries = payload.get("quizzes") if isinstance(payload, dict) else payload
+    if not isinstance(entries, list):
+        return [None] * count
+    entries = [e for e in entries if isinstance(e, dict)]
+    by_key = {str(e.get("key")): e for e in entries if e.get("key") is not None}
+    return [
+        by_key.get(f"quiz{i + 1}", entries[i] if i < len(entries) else None)
+        for i in range(count)
+    ]
+
+
+async def _run_quiz_batch_job(payload: dict):
+    userid = payload["userid"]
+    local_conn = connect_db()
+    local_cursor = local_conn.cursor()
+    try:
+        placeholders = ",".join(["?"] * len(payload["quizids"]))
+        rows = local_conn.execute(
+            f"""
+            SELECT quizid, projectid, topic, quiz_type, num_questions, document_ids_json
+            FROM quizzes WHERE quizid IN ({placeholders}) AND status<>'ready'
+            """,
+            payload["quizids"],
+        ).fetchall()
+        if not rows:
+            return None
+        projectid = rows[0][1]
+        quizzes = [
+            {
+                "quizid": row[0],
+                "topic": row[2],
+                "quiz_type": row[3],
+                "num_questions": row[4],
+                "document_ids": orjson.loads(row[5] or "[]"),
+            }
+            for row in rows
+        ]
+
+        def fail_all(message: str):
+            for quiz in quizzes:
+                _set_quiz_status(
+                    local_cursor, local_conn, quiz["quizid"], "failed", message, commit=False
+                )
+            local_conn.commit()
+
+        if not BACKBOARD_API_KEY:
+            fail_all("BACKBOARD_API_KEY not set")
+            return None
+
+        document_ids = sorted({d for quiz in quizzes for d in quiz["document_ids"]})
+        error = _check_quiz_documents_indexed(local_cursor, projectid, document_ids)
+        if not error:
+            error, source = await _wait_for_quiz_documents(
+                local_cursor, local_conn, projectid, document_ids
+            )
+        if error:
+            fail_all(error)
+            return None
+        client, thread_id, _ = source
+
+        file_names = dict(
+            local_conn.execute(
+                f"SELECT fileid, filepath FROM files WHERE fileid IN ({','.join(['?'] * len(document_ids))})",
+                document_ids,
+            ).fetchall()
+        )
+        async def ask(wanted: list[tuple[dict, int]]) -> list:
+            """One model call for (quiz, question count) pairs; their payloads, in order."""
+            lines = []
+            for i, (quiz, count) in enumerate(wanted):
+                files = [
+                    _display_filename(file_names[d])
+                    for d in quiz["document_ids"]
+                    if file_names.get(d)
+                ]
+                lines.append(
+                    f"- quiz{i + 1}: topic: {quiz['topic']}; type: {quiz['quiz_type']}; "
+                    f"questions: {count}; prioritize: {', '.join(files) or 'selected documents'}"
+                )
+            generation_prompt = f"""
+Course: {projectid}
+
+Generate these quizzes:
+{chr(10).join(lines)}
+
+If needed, you may use any indexed course documents to complete a quiz.
+""".strip()
+
+            response = await client.add_message(
+                thread_id=thread_id,
+                content=QUIZ_BATCH_SYSTEM + "\n\n" + generation_prompt,
+                llm_provider="openai",
+                model_name="gpt-4o",
+                stream=False,
+                memory="Auto",
+            )
+            raw = getattr(response, "content", response)
+            raw_str = raw if isinstance(raw, str) else str(raw)
+            logger.debug(
+                "Quiz batch: raw reply", extra={"payload": payload_for_log(raw_str)}
+            )
+            return _split_quiz_batch(parse_tolerant_json(raw_str), len(wanted))
+
+        index_version = project_index_version(local_cursor, projectid)
+        fresh = set(payload.get("fresh") or [])
+        bank_keys = {
+            quiz["quizid"]: (
+                projectid,
+                quiz["topic"],
+                quiz["quiz_type"],
+                quiz["document_ids"],
+                index_version,
+            )
+            for quiz in quizzes
+        }
+        selections = {quiz["quizid"]: [] for quiz in quizzes}
+
+        def select(quiz: dict, rows: list):
+            selected = selections[quiz["quizid"]]
+            seen = {row[0] for row in selected}
+            missing = quiz["num_questions"] - len(selected)
+            selected.extend([row for row in rows if row[0] not in seen][:missing])
+
+        def bank_part(quiz: dict, part, count: int):
+            """Banks a quiz's part of the reply and adds questions to its selection."""
+            bank_key = bank_keys[quiz["quizid"]]
+            questions = []
+            if part is not None:
+                questions, answer_key, explanations = _normalize_quiz_payload(
+                    part, quiz["quiz_type"], count
+                )
+                add_questions(local_conn, *bank_key, questions, answer_key, explanations)
+            if quiz["quizid"] in fresh:
+                # no_cache: only the questions generated for this quiz
+                select(quiz, bank_rows_for(local_conn, *bank_key, questions))
+            else:
+                select(
+                    quiz,
+                    sample_questions(
+                        local_conn, userid, *bank_key, quiz["num_questions"]
+                    ),
+                )
+
+        def still_missing() -> list[tuple[dict, int]]:
+            return [
+                (quiz, quiz["num_questions"] - len(selections[quiz["quizid"]]))
+                for quiz in quizzes
+                if len(selections[quiz["quizid"]]) < quiz["num_questions"]
+            ]
+
+        wanted = [(quiz, quiz["num_questions"]) for quiz in quizzes]
+        for (quiz, count), part in zip(wanted, await ask(wanted)):
+            bank_part(quiz, part, count)
+
+        # ask again, once, only for what is still missing
+        wanted = still_missing()
+        if wanted:
+            logger.debug("Quiz batch: %d quizzes short, asking again", len(wanted))
+            try:
+                parts = await ask(wanted)
+            except Exception as e:
+                logger.warning("Quiz batch retry failed: %s", e)
+                parts = [None] * len(wanted)
+            for (quiz, count), part in zip(wanted, parts):
+                bank_part(quiz, part, count)
+
+        # out of new questions: repeat the ones the user saw longest ago (unless
+        # the quiz asked for fresh questions)
+        for quiz, count in still_missing():
+            if quiz["quizid"] not in fresh:
+                select(
+                    quiz,
+                    sample_questions(
+                        local_conn,
+                        userid,
+                        *bank_keys[quiz["quizid"]],
+                        quiz["num_questions"],
+                        allow_repeats=True,
+                    ),
+                )
+
+        # every quiz of the batch becomes ready (or failed) in one transaction
+        for quiz in quizzes:
+            selected = selections[quiz["quizid"]]
+            if selected:
+                _set_quiz_from_bank(
+                    local_cursor,
+                    local_conn,
+                    quiz["quizid"],
+                    userid,
+                    selected,
+                    commit=False,
+                    generation_error=_short_quiz_warning(
+                        len(selected), quiz["num_questions"]
+                    ),
+                )
+            else:
+                _set_quiz_status(
+                    local_cursor,
+                    local_conn,
+                    quiz["quizid"],
+                    "failed",
+                    "No questions were generated for this quiz. Try generating it again.",
+                    commit=False,
+                )
+        local_conn.commit()
+        return {"ready": sum(1 for selected in selections.values() if selected)}
+    finally:
+        local_conn.close()
+
+
+async def _give_up_quiz_batch(payload: dict, error: str):
+    local_conn = connect_db()
+    local_cursor = local_conn.cursor()
+    try:
+        placeholders = ",".join(["?"] * len(payload["quizids"]))
+        local_cursor.execute(
+            f"SELECT quizid FROM quizzes WHERE quizid IN ({placeholders}) AND status<>'ready'",
+            payload["quizids"],
+        )
+        for (quizid,) in local_cursor.fetchall():
+            _set_quiz_status(
+                local_cursor,
+                local_conn,
+                quizid,
+                "failed",
+                f"Quiz generation was interrupted ({error}). Try generating again.",
+                commit=False,
+            )
+        local_conn.commit()
+    finally:
+        local_conn.close()
 
-    return {
-        "success": True,
-        "quiz": {
-            "quizid": quizid,
-            "projectid": projectid,
-            "title": title,
-            "topic": topic,
-            "quiz_type": quiz_type,
-            "num_questions": num_questions,
-            "document_ids": document_ids,
-            "status": "pending",
-            "generation_error": None,
-            "createddate": createddate,
-        },
-    }
+
+JOB_HANDLERS["quiz_batch_generation"] = JobHandler(
+    _run_quiz_batch_job,
+    on_give_up=_give_up_quiz_batch,
+    max_in_flight=GENERATION_MAX_IN_FLIGHT,
+    in_flight_group="generation",
+)
 
 
 @app.get("/quizzes/{quizid}")
@@ -2048,7 +3434,10 @@ async def get_quiz(quizid: str, session: str = Cookie(None)):
     cursor.execute(
         """
         SELECT quizid, projectid, title, topic, quiz_type, num_questions,
-               questions_json, status, generation_error, createddate
+               CASE WHEN json_valid(questions_json)
+                         AND json_type(questions_json, '$.questions') = 'array'
+                    THEN json_extract(questions_json, '$.questions') END,
+               status, generation_error, createddate
         FROM quizzes
         WHERE quizid=? AND userid=?
         """,
@@ -2058,11 +3447,6 @@ async def get_quiz(quizid: str, session: str = Cookie(None)):
     if row is None:
         return {"success": False, "message": "Quiz not found"}
 
-    try:
-        questions_payload = json.loads(row[6] or "{}")
-    except json.JSONDecodeError:
-        questions_payload = {"questions": []}
-
     quiz = {
         "quizid": row[0],
         "projectid": row[1],
@@ -2074,11 +3458,114 @@ async def get_quiz(quizid: str, session: str = Cookie(None)):
         "generation_error": row[8],
         "createddate": row[9],
     }
-    questions = questions_payload.get("questions", [])
+    try:
+        questions = orjson.loads(row[6] or "[]")
+    except orjson.JSONDecodeError:
+        questions = []
 
     return {"success": True, "quiz": quiz, "questions": questions}
 
 
+# How often the bridge checks the database for quiz changes made by workers.
+QUIZ_EVENTS_POLL_S = float(os.getenv("QUIZ_EVENTS_POLL_S", "0.5"))
+QUIZ_EVENTS_KEEPALIVE_S = 15
+_quiz_bridge_task: asyncio.Task | None = None
+
+
+def _read_quiz_states(db_conn, quizids: list[str]) -> list[tuple]:
+    placeholders = ",".join(["?"] * len(quizids))
+    return db_conn.execute(
+        f"""
+        SELECT quizid, COALESCE(status, 'ready'), generation_error,
+               CASE WHEN json_valid(questions_json)
+                    THEN COALESCE(json_array_length(questions_json, '$.questions'), 0)
+                    ELSE 0 END
+        FROM quizzes WHERE quizid IN ({placeholders})
+        """,
+        quizids,
+    ).fetchall()
+
+
+async def _quiz_status_bridge():
+    """
+    One query per interval for every watched quiz, however many clients are
+    watching, instead of each client polling get_quiz.
+    """
+    while True:
+        await asyncio.sleep(QUIZ_EVENTS_POLL_S)
+        quizids = quiz_events.topics()
+        for quizid in set(_quiz_states) - set(quizids):
+            del _quiz_states[quizid]
+        if not quizids:
+            continue
+        try:
+            rows = _read_quiz_states(conn, quizids)
+        except sqlite3.Error as e:
+            logger.warning("Quiz status bridge: %s", e)
+            continue
+        for row in rows:
+            _publish_quiz_state(*row)
+
+
+# Push quiz status changes (server-sent events)
+@app.get("/quizzes/{quizid}/events")
+async def quiz_status_events(
+    quizid: str, request: Request, session: str = Cookie(None)
+):
+    """
+    Sends a `status` event with the current state and on every change
+    (status, generation_error, questions_ready), then `done` once the quiz is
+    ready or failed.
+    """
+    if session is None:
+        return {"success": False, "message": "Unauthorized"}
+    userid = session
+
+    cursor.execute("SELECT 1 FROM quizzes WHERE quizid=? AND userid=?", (quizid, userid))
+    if cursor.fetchone() is None:
+        return {"success": False, "message": "Quiz not found"}
+
+    # subscribe before reading the current state so no change slips in between
+    queue = quiz_events.subscribe(quizid)
+
+    async def events():
+        try:
+            rows = _read_quiz_states(conn, [quizid])
+            if not rows:
+                yield _sse("done", {"status": "deleted"})
+                return
+            _, status, generation_error, questions_ready = rows[0]
+            state = {
+                "status": status,
+                "generation_error": generation_error,
+                "questions_ready": questions_ready,
+            }
+            last = None
+            while True:
+                if state != last:
+                    last = state
+                    yield _sse("status", state)
+                    if state["status"] in ("ready", "failed"):
+                        yield _sse("done", {"status": state["status"]})
+                        return
+                try:
+                    state = await asyncio.wait_for(
+                        queue.get(), timeout=QUIZ_EVENTS_KEEPALIVE_S
+                    )
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": keepalive\n\n"
+        finally:
+            quiz_events.unsubscribe(quizid, queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.delete("/cards/{cardid}")
 async def delete_card(cardid: str, session: str = Cookie(None)):
     if session is None:
@@ -2090,6 +3577,7 @@ async def delete_card(cardid: str, session: str = Cookie(None)):
         return {"success": False, "message": "Card not found"}
 
     cursor.execute("DELETE FROM cards WHERE cardid=?", (cardid,))
+    unindex_cards(cursor, [cardid])
     conn.commit()
 
     return {"success": True, "deleted": True, "cardid": cardid}
@@ -2113,27 +3601,52 @@ async def generate_quiz(quizid: str, session: str = Cookie(None)):
     if row is None:
         return {"success": False, "message": "Quiz not found"}
 
-    try:
-        document_ids = json.loads(row[6] or "[]")
-        if not isinstance(document_ids, list):
-            document_ids = []
-    except json.JSONDecodeError:
-        document_ids = []
-
-    # kick off async generation
-    asyncio.create_task(
-        _generate_quiz_content(
-            quizid=row[0],
-            projectid=row[1],
-            userid=row[2],
-            topic=row[3],
-            quiz_type=row[4],
-            num_questions=row[5],
-            document_ids=document_ids,
-        )
+    cursor.execute(
+        "SELECT jobid FROM jobs WHERE dedupe_key=? AND status IN ('queued', 'running')",
+        (f"quiz:{quizid}",),
+    )
+    existing = cursor.fetchone()
+    if existing:
+        return {"success": True, "jobid": existing[0], "already_queued": True}
+
+    # queue generation; the job worker picks it up (and again after a restart).
+    # fresh: regenerating asks the model for new questions instead of the bank
+    jobid = enqueue_job(
+        cursor,
+        conn,
+        "quiz_generation",
+        {"quizid": quizid, "userid": userid, "fresh": True},
+        dedupe_key=f"quiz:{quizid}",
+        commit=False,
     )
+    # the page shows the quiz as pending right away, not the old failure
+    _set_quiz_status(cursor, conn, quizid, "pending")
+
+    return {"success": True, "jobid": jobid}
+
+
+def _schedule_review(state: CardSchedule, rating: str) -> CardSchedule:
+    """Next scheduling state after a review; the card is due interval_days after it."""
+    ease, interval_days, reps, lapses = state.ease, state.interval_days, state.reps, state.lapses
+
+    # Simple Anki-ish rules
+    if rating == "again":
+        ease = max(1.3, ease - 0.2)
+        interval_days = 0.02  # ~30 minutes
+        lapses += 1
+    elif rating == "hard":
+        ease = max(1.3, ease - 0.15)
+        interval_days = 0.5 if reps == 0 else max(0.5, interval_days * 1.2)
+        reps += 1
+    elif rating == "good":
+        interval_days = 1.0 if reps == 0 else max(1.0, interval_days * ease)
+        reps += 1
+    elif rating == "easy":
+        ease = min(3.0, ease + 0.15)
+        interval_days = 2.0 if reps == 0 else max(2.0, interval_days * ease * 1.3)
+        reps += 1
 
-    return {"success": True}
+    return CardSchedule(interval_days=interval_days, ease=ease, reps=reps, lapses=lapses)
 
 
 @app.post("/cards/{cardid}/review")
@@ -2146,7 +3659,8 @@ async def review_card(
 
     cursor.execute(
         """
-        SELECT c.deckid, c.due_at, c.interval_days, c.ease, c.reps, c.lapses
+        SELECT c.deckid, d.projectid, c.last_reviewed_at,
+               c.interval_days, c.ease, c.reps, c.lapses
         FROM cards c
         JOIN decks d ON d.deckid = c.deckid
         WHERE c.cardid=? AND d.userid=?
@@ -2157,43 +3671,48 @@ async def review_card(
     if row is None:
         return {"success": False, "message": "Card not found"}
 
-    deckid, due_at, interval_days, ease, reps, lapses = row
-
-    ease = float(ease) if ease is not None else 2.5
-    interval_days = float(interval_days) if interval_days is not None else 0.0
-    reps = int(reps) if reps is not None else 0
-    lapses = int(lapses) if lapses is not None else 0
-
+    deckid, projectid, prev_reviewed_at = row[:3]
     rating = body.rating
     now = datetime.now(dt.UTC)
+    prev_state = CardSchedule.from_row(*row[3:])
+    state = _schedule_review(prev_state, rating)
 
-    # Simple Anki-ish rules
-    if rating == "again":
-        ease = max(1.3, ease - 0.2)
-        interval_days = 0.02  # ~30 minutes
-        lapses += 1
-    elif rating == "hard":
-        ease = max(1.3, ease - 0.15)
-        interval_days = 0.5 if reps == 0 else max(0.5, interval_days * 1.2)
-        reps += 1
-    elif rating == "good":
-        interval_days = 1.0 if reps == 0 else max(1.0, interval_days * ease)
-        reps += 1
-    elif rating == "easy":
-        ease = min(3.0, ease + 0.15)
-        interval_days = 2.0 if reps == 0 else max(2.0, interval_days * ease * 1.3)
-        reps += 1
-
-    due_at = (now + timedelta(days=interval_days)).isoformat()
+    due_at = (now + timedelta(days=state.interval_days)).isoformat()
     last_reviewed_at = now.isoformat()
 
     cursor.execute(
         """
         UPDATE cards
-        SET due_at=?, interval_days=?, ease=?, reps=?, lapses=?, last_reviewed_at=?
+        SET due_at=?, interval_days=?, ease=?, reps=?, lapses=?, last_reviewed_at=?,
+            introduced_at=COALESCE(introduced_at, ?)
         WHERE cardid=?
         """,
-        (due_at, interval_days, ease, reps, lapses, last_reviewed_at, cardid),
+        (
+            due_at,
+            state.interval_days,
+            state.ease,
+            state.reps,
+            state.lapses,
+            last_reviewed_at,
+            last_reviewed_at,
+            cardid,
+        ),
+    )
+    log_reviews(
+        cursor,
+        userid,
+        [
+            ReviewEntry(
+                cardid=cardid,
+                deckid=deckid,
+                projectid=projectid,
+                rating=rating,
+                prev_interval_days=prev_state.interval_days,
+                next_interval_days=state.interval_days,
+                reviewed_at=now,
+                prev_reviewed_at=_parse_utc(prev_reviewed_at) if prev_reviewed_at else None,
+            )
+        ],
     )
     conn.commit()
 
@@ -2202,14 +3721,154 @@ async def review_card(
         "cardid": cardid,
         "deckid": deckid,
         "due_at": due_at,
-        "interval_days": interval_days,
-        "ease": ease,
-        "reps": reps,
-        "lapses": lapses,
+        "interval_days": state.interval_days,
+        "ease": state.ease,
+        "reps": state.reps,
+        "lapses": state.lapses,
         "rating": rating,
     }
 
 
+REVIEW_BATCH_MAX = 500
+
+
+def _as_utc(value: datetime) -> datetime:
+    # naive timestamps are taken to be UTC
+    return value.replace(tzinfo=dt.UTC) if value.tzinfo is None else value
+
+
+def _parse_utc(text: str) -> datetime:
+    return _as_utc(datetime.fromisoformat(text))
+
+
+@app.post("/cards/reviews")
+async def review_cards_batch(body: BatchReviewRequest, session: str = Cookie(None)):
+    """
+    Applies reviews recorded by the client (e.g. while offline) in the order
+    given, each at its own reviewed_at, with the same rules as review_card, and
+    commits once. Reviews not newer than a card's last review are skipped, so
+    re-sending a batch after a lost response does not count it twice.
+    """
+    if session is None:
+        return {"success": False, "message": "Unauthorized"}
+    userid = session
+
+    if not body.reviews:
+        return {"success": False, "message": "reviews is required"}
+    if len(body.reviews) > REVIEW_BATCH_MAX:
+        return {"success": False, "message": f"At most {REVIEW_BATCH_MAX} reviews at once"}
+
+    cardids = list({r.cardid for r in body.reviews})
+    cursor.execute(
+        f"""
+        SELECT c.cardid, c.deckid, c.interval_days, c.ease, c.reps, c.lapses,
+               c.last_reviewed_at, c.introduced_at, d.projectid
+        FROM cards c
+        JOIN decks d ON d.deckid = c.deckid
+        WHERE d.userid=? AND c.cardid IN ({",".join("?" * len(cardids))})
+        """,
+        (userid, *cardids),
+    )
+    cards = {
+        r[0]: {
+            "deckid": r[1],
+            "state": CardSchedule.from_row(*r[2:6]),
+            "last_reviewed_at": _parse_utc(r[6]) if r[6] else None,
+            "introduced_at": r[7],
+            "projectid": r[8],
+            "due_at": None,
+        }
+        for r in cursor.fetchall()
+    }
+
+    now = datetime.now(dt.UTC)
+    results = []
+    log_entries = []
+    for review in body.reviews:
+        card = cards.get(review.cardid)
+        if card is None:
+            results.append({"cardid": review.cardid, "status": "not_found"})
+            continue
+
+        reviewed_at = _as_utc(review.reviewed_at) if review.reviewed_at else now
+        reviewed_at = min(reviewed_at, now)  # client clocks run ahead
+        if card["last_reviewed_at"] is not None and reviewed_at <= card["last_reviewed_at"]:
+            results.append({"cardid": review.cardid, "status": "skipped"})
+            continue
+
+        prev_state = card["state"]
+        card["state"] = _schedule_review(prev_state, review.rating)
+        log_entries.append(
+            ReviewEntry(
+                cardid=review.cardid,
+                deckid=card["deckid"],
+                projectid=card["projectid"],
+                rating=review.rating,
+                prev_interval_days=prev_state.interval_days,
+                next_interval_days=card["state"].interval_days,
+                reviewed_at=reviewed_at,
+                prev_reviewed_at=card["last_reviewed_at"],
+            )
+        )
+        card["last_reviewed_at"] = reviewed_at
+        card["introduced_at"] = card["introduced_at"] or reviewed_at.isoformat()
+        card["due_at"] = (
+            reviewed_at + timedelta(days=card["state"].interval_days)
+        ).isoformat()
+        results.append(
+            {
+                "cardid": review.cardid,
+                "status": "applied",
+                "rating": review.rating,
+                "due_at": card["due_at"],
+                "interval_days": card["state"].interval_days,
+            }
+        )
+
+    updated = {cardid: card for cardid, card in cards.items() if card["due_at"] is not None}
+    cursor.executemany(
+        """
+        UPDATE cards
+        SET due_at=?, interval_days=?, ease=?, reps=?, lapses=?, last_reviewed_at=?,
+            introduced_at=?
+        WHERE cardid=?
+        """,
+        [
+            (
+                card["due_at"],
+                card["state"].interval_days,
+                card["state"].ease,
+                card["state"].reps,
+                card["state"].lapses,
+                card["last_reviewed_at"].isoformat(),
+                card["introduced_at"],
+                cardid,
+            )
+            for cardid, card in updated.items()
+        ],
+    )
+    log_reviews(cursor, userid, log_entries)
+    conn.commit()
+
+    return {
+        "success": True,
+        "applied": sum(1 for r in results if r["status"] == "applied"),
+        "results": results,
+        "cards": [
+            {
+                "cardid": cardid,
+                "deckid": card["deckid"],
+                "due_at": card["due_at"],
+                "interval_days": card["state"].interval_days,
+                "ease": card["state"].ease,
+                "reps": card["state"].reps,
+                "lapses": card["state"].lapses,
+            }
+            for cardid, card in updated.items()
+        ],
+    }
+
+
 @app.post("/quizzes/{quizid}/submit")
 async def submit_quiz(
     quizid: str, body: SubmitQuizRequest, session: str = Cookie(None)
@@ -2232,15 +3891,15 @@ async def submit_quiz(
 
     quiz_type = row[0]
     try:
-        questions_payload = json.loads(row[1] or "{}")
+        questions_payload = orjson.loads(row[1] or "{}")
     except json.JSONDecodeError:
         questions_payload = {"questions": []}
     try:
-        answer_key = json.loads(row[2] or "{}")
+        answer_key = orjson.loads(row[2] or "{}")
     except json.JSONDecodeError:
         answer_key = {}
     try:
-        explanations = json.loads(row[3] or "{}")
+        explanations = orjson.loads(row[3] or "{}")
     except json.JSONDecodeError:
         explanations = {}
 
@@ -2300,9 +3959,9 @@ async def submit_quiz(
             attemptid,
             quizid,
             userid,
-            json.dumps(answers),
+            dumps_text(answers),
             score,
-            json.dumps(feedback),
+            dumps_text(feedback),
             createddate,
         ),
     )
@@ -2326,21 +3985,53 @@ async def index_project_documents(projectid: str, session: str = Cookie(None)):
     if not BACKBOARD_API_KEY:
         return {"success": False, "message": "BACKBOARD_API_KEY not set"}
 
+    jobid = enqueue_job(
+        cursor,
+        conn,
+        "index_project",
+        {"projectid": projectid, "userid": userid},
+        dedupe_key=f"index:{projectid}",
+    )
+    return {"success": True, "jobid": jobid, "status": "queued"}
+
+
+async def _run_index_job(payload: dict):
+    local_conn = connect_db()
+    local_cursor = local_conn.cursor()
     try:
-        return await index_project_documents_impl(
-            projectid=projectid,
-            userid=userid,
-            cursor=cursor,
-            conn=conn,
+        result = await index_project_documents_impl(
+            projectid=payload["projectid"],
+            userid=payload["userid"],
+            cursor=local_cursor,
+            conn=local_conn,
             client_factory=None,  # optional
-            get_memory=get_or_create_backboard_memory,
+            # indexing uploads to the thread, so always confirm it still exists
+            get_memory=lambda pid: get_or_create_backboard_memory(
+                pid, db_cursor=local_cursor, validate=True
+            ),
         )
-    except BackboardServerError as e:
-        logger.error("Backboard indexing failed: %s", e)
-        return {
-            "success": False,
-            "message": "Backboard service unavailable. Please try again shortly.",
-        }
+    finally:
+        local_conn.close()
+    # upstream failures (server errors, timeouts, rate limits, open breaker)
+    # propagate out of index_project_documents_impl, so the job is retried with
+    # a delay; other per-file errors are counted in failed_files
+    return result
+
+
+JOB_HANDLERS["index_project"] = JobHandler(_run_index_job)
+
+
+@app.get("/jobs/{jobid}")
+async def get_job_status(jobid: str, session: str = Cookie(None)):
+    if session is None:
+        return {"success": False, "message": "Unauthorized"}
+
+    job = get_job(cursor, jobid)
+    if job is None or job["payload"].get("userid") != session:
+        return {"success": False, "message": "Job not found"}
+
+    job.pop("payload")
+    return {"success": True, "job": job}
 
 
 # endregion
@@ -2595,19 +4286,14 @@ Style:
 """.strip()
 
 
-@app.post("/chats/{chatid}/messages")
-async def send_chat_message(
-    chatid: str,
-    body: SendChatMessageRequest,
-    session: str = Cookie(None),
-):
-    if session is None:
-        return {"success": False, "message": "Unauthorized"}
-    userid = session
-
+def _start_chat_turn(chatid: str, body: SendChatMessageRequest, userid: str):
+    """
+    Validates a chat message and stores it. Returns (error_response, None) on
+    failure, otherwise (None, turn) with what is needed to ask and to store the reply.
+    """
     content = (body.content or "").strip()
     if not content:
-        return {"success": False, "message": "Message cannot be empty"}
+        return {"success": False, "message": "Message cannot be empty"}, None
 
     # Load chat session + project
     cursor.execute(
@@ -2620,13 +4306,13 @@ async def send_chat_message(
     )
     row = cursor.fetchone()
     if row is None:
-        return {"success": False, "message": "Chat not found"}
+        return {"success": False, "message": "Chat not found"}, None
 
     projectid, chat_title, saved_provider, saved_model = row
 
     # Ensure project ownership
     if not _require_project_owned(projectid, userid):
-        return {"success": False, "message": "Project not found"}
+        return {"success": False, "message": "Project not found"}, None
 
     # Is this the first message in this chat?
     cursor.execute("SELECT COUNT(*) FROM chat_messages WHERE chatid=?", (chatid,))
@@ -2657,29 +4343,26 @@ async def send_chat_message(
     )
     conn.commit()
 
-    # Get assistant response (course-level memory: one thread per project)
-    assistant_text = ""
-    if not BACKBOARD_API_KEY:
-        assistant_text = "BACKBOARD_API_KEY not set, so I can't answer yet."
-    else:
-        client, assistant_id, thread_id = await get_or_create_backboard_memory(
-            projectid
-        )
-
+    return None, {
+        "chatid": chatid,
+        "userid": userid,
+        "projectid": projectid,
+        "chat_title": chat_title,
+        "content": content,
+        "llm_provider": llm_provider,
+        "model_name": model_name,
+        "autotitle": is_first_message and should_autotitle,
+        "user_msgid": user_msgid,
+        "created_at": now,
         # Keep memory structured by chat title
-        prompt = f"[Chat: {chat_title}] {content}"
+        "prompt": CHAT_SYSTEM + "\n\n" + f"[Chat: {chat_title}] {content}",
+    }
 
-        resp = await client.add_message(
-            thread_id=thread_id,
-            content=CHAT_SYSTEM + "\n\n" + prompt,
-            llm_provider=llm_provider,
-            model_name=model_name,
-            stream=False,
-            memory="Readwrite",
-        )
-        assistant_text = getattr(resp, "content", resp)
-        if not isinstance(assistant_text, str):
-            assistant_text = str(assistant_text)
+
+def _finish_chat_turn(turn: dict, assistant_text: str) -> dict:
+    """Stores the assistant reply and chat metadata; returns the endpoint response."""
+    chatid, userid = turn["chatid"], turn["userid"]
+    chat_title = turn["chat_title"]
 
     # Store assistant message
     now2 = datetime.now(dt.UTC).isoformat()
@@ -2699,13 +4382,12 @@ async def send_chat_message(
         SET updated_at=?, llm_provider=?, model_name=?
         WHERE chatid=? AND userid=?
         """,
-        (now2, llm_provider, model_name, chatid, userid),
+        (now2, turn["llm_provider"], turn["model_name"], chatid, userid),
     )
 
     # Auto-title on first message
-    new_title = None
-    if is_first_message and should_autotitle:
-        new_title = generate_chat_title_from_first_message(content)
+    if turn["autotitle"]:
+        new_title = generate_chat_title_from_first_message(turn["content"])
         cursor.execute(
             """
             UPDATE chat_sessions
@@ -2722,14 +4404,14 @@ async def send_chat_message(
         "success": True,
         "chatid": chatid,
         "chat_title": chat_title,  # NEW: frontend can update header/sidebar immediately
-        "llm_provider": llm_provider,
-        "model_name": model_name,
+        "llm_provider": turn["llm_provider"],
+        "model_name": turn["model_name"],
         "messages": [
             {
-                "msgid": user_msgid,
+                "msgid": turn["user_msgid"],
                 "role": "user",
-                "content": content,
-                "created_at": now,
+                "content": turn["content"],
+                "created_at": turn["created_at"],
             },
             {
                 "msgid": assistant_msgid,
@@ -2741,4 +4423,128 @@ async def send_chat_message(
     }
 
 
+@app.post("/chats/{chatid}/messages")
+async def send_chat_message(
+    chatid: str,
+    body: SendChatMessageRequest,
+    session: str = Cookie(None),
+):
+    if session is None:
+        return {"success": False, "message": "Unauthorized"}
+    userid = session
+
+    error, turn = _start_chat_turn(chatid, body, userid)
+    if error:
+        return error
+
+    # Get assistant response (course-level memory: one thread per project)
+    assistant_text = ""
+    if not BACKBOARD_API_KEY:
+        assistant_text = "BACKBOARD_API_KEY not set, so I can't answer yet."
+    else:
+
+        async def ask(client, assistant_id, thread_id):
+            return await client.add_message(
+                thread_id=thread_id,
+                content=turn["prompt"],
+                llm_provider=turn["llm_provider"],
+                model_name=turn["model_name"],
+                stream=False,
+                memory="Readwrite",
+            )
+
+        resp = await with_backboard_memory(turn["projectid"], ask)
+        assistant_text = getattr(resp, "content", resp)
+        if not isinstance(assistant_text, str):
+            assistant_text = str(assistant_text)
+
+    return _finish_chat_turn(turn, assistant_text)
+
+
+# Same as send_chat_message, but relays the reply as server-sent events
+@app.post("/chats/{chatid}/messages/stream")
+async def stream_chat_message(
+    chatid: str,
+    body: SendChatMessageRequest,
+    session: str = Cookie(None),
+):
+    """
+    Events: `token` ({"content": "..."}) for every streamed chunk, then `done` with
+    the same payload send_chat_message returns once the reply is stored, or `error`.
+    If the client goes away the upstream Backboard stream is closed and nothing
+    is stored for the reply.
+    """
+    if session is None:
+        return {"success": False, "message": "Unauthorized"}
+    userid = session
+
+    error, turn = _start_chat_turn(chatid, body, userid)
+    if error:
+        return error
+
+    async def ask(client, assistant_id, thread_id):
+        upstream = await client.add_message(
+            thread_id=thread_id,
+            content=turn["prompt"],
+            llm_provider=turn["llm_provider"],
+            model_name=turn["model_name"],
+            stream=True,
+            memory="Readwrite",
+        )
+        # pull the first event here so a stale thread is retried by with_backboard_memory
+        try:
+            first = await anext(upstream)
+        except StopAsyncIteration:
+            first = None
+        except BaseException:
+            await upstream.aclose()
+            raise
+        return first, upstream
+
+    async def events():
+        if not BACKBOARD_API_KEY:
+            text = "BACKBOARD_API_KEY not set, so I can't answer yet."
+            yield _sse("token", {"content": text})
+            yield _sse("done", _finish_chat_turn(turn, text))
+            return
+
+        upstream = None
+        parts = []
+        try:
+            first, upstream = await with_backboard_memory(turn["projectid"], ask)
+            pending = [first] if first is not None else []
+            while True:
+                if pending:
+                    event = pending.pop()
+                else:
+                    try:
+                        event = await anext(upstream)
+                    except StopAsyncIteration:
+                        break
+                if event.get("type") == "content_streaming":
+                    chunk = event.get("content") or ""
+                    if chunk:
+                        parts.append(chunk)
+                        yield _sse("token", {"content": chunk})
+        except asyncio.CancelledError:
+            # client disconnected; Starlette cancels the response task
+            logger.info("Chat %s stream cancelled by client", chatid)
+            raise
+        except Exception as e:
+            logger.error("Chat %s stream failed: %s", chatid, e)
+            yield _sse("error", {"message": "Failed to get response. Try again."})
+            return
+        finally:
+            if upstream is not None:
+                await upstream.aclose()
+
+        yield _sse("done", _finish_chat_turn(turn, "".join(parts)))
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # endregion
@@ -0,0 +1,38 @@
+import asyncio
+
+
+class PubSub:
+    """
+    In-process publish/subscribe on string topics (e.g. a quiz id). Subscribers
+    get their own bounded queue; publishing never blocks, and a subscriber that
+    falls behind loses its oldest messages, which suits "latest state" updates.
+    """
+
+    def __init__(self, queue_size: int = 16):
+        self._queue_size = queue_size
+        self._subscribers: dict[str, set[asyncio.Queue]] = {}
+
+    def topics(self) -> list[str]:
+        return list(self._subscribers)
+
+    def subscribe(self, topic: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self._queue_size)
+        self._subscribers.setdefault(topic, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, topic: str, queue: asyncio.Queue):
+        queues = self._subscribers.get(topic)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[topic]
+
+    def publish(self, topic: str, message) -> int:
+        """Returns the number of subscribers the message was handed to."""
+        queues = self._subscribers.get(topic, ())
+        for queue in queues:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(message)
+        return len(queues)
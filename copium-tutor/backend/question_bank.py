@@ -0,0 +1,226 @@
+import os
+import time
+import uuid
+import hashlib
+import orjson
+
+from generation_cache import normalize_prompt
+
+# Questions generated per LLM call when the bank runs low (at least the quiz size).
+QUESTION_BANK_FILL_SIZE = int(os.getenv("QUESTION_BANK_FILL_SIZE", "20"))
+
+# projectid -> index version whose stale questions were last pruned (per process)
+_pruned_versions: dict[str, str] = {}
+
+_BANK_FILTER = """
+    b.projectid=? AND b.topic=? AND b.quiz_type=? AND b.sources_key=? AND b.index_version=?
+"""
+
+
+def _sources_key(document_ids) -> str:
+    return ",".join(sorted(set(document_ids)))
+
+
+def _question_hash(question: dict) -> str:
+    return hashlib.sha1(normalize_prompt(question["question"]).encode()).hexdigest()
+
+
+def _bank_args(projectid, topic, quiz_type, document_ids, index_version) -> tuple:
+    return (
+        projectid,
+        normalize_prompt(topic),
+        quiz_type,
+        _sources_key(document_ids),
+        index_version,
+    )
+
+
+def prune_question_bank(db_conn, projectid: str, index_version: str):
+    """
+    Drops the project's questions made from older versions of its documents,
+    and who was served them. Runs once per index version change in a process,
+    since sampling already ignores questions of other versions.
+    """
+    if _pruned_versions.get(projectid) == index_version:
+        return
+    db_conn.execute(
+        """
+        DELETE FROM question_bank_served WHERE questionid IN (
+            SELECT questionid FROM question_bank WHERE projectid=? AND index_version<>?
+        )
+        """,
+        (projectid, index_version),
+    )
+    db_conn.execute(
+        "DELETE FROM question_bank WHERE projectid=? AND index_version<>?",
+        (projectid, index_version),
+    )
+    db_conn.commit()
+    _pruned_versions[projectid] = index_version
+
+
+def add_questions(
+    db_conn,
+    projectid: str,
+    topic: str,
+    quiz_type: str,
+    document_ids: list[str],
+    index_version: str,
+    questions: list[dict],
+    answer_key: dict,
+    explanations: dict,
+) -> int:
+    """
+    Adds normalized questions (see _normalize_quiz_payload) to the course bank and
+    returns how many were new. Questions already in the bank are skipped.
+    """
+    now = time.time()
+    bank_args = _bank_args(projectid, topic, quiz_type, document_ids, index_version)
+    rows = []
+    for q in questions:
+        question = {k: v for k, v in q.items() if k != "id"}
+        rows.append(
+            (
+                uuid.uuid4().hex[:12],
+                *bank_args,
+                _question_hash(q),
+                orjson.dumps(question).decode(),
+                orjson.dumps(answer_key.get(q["id"])).decode(),
+                explanations.get(q["id"]) or "",
+                now,
+            )
+        )
+
+    prune_question_bank(db_conn, projectid, index_version)
+    db_cursor = db_conn.cursor()
+    before = db_conn.total_changes
+    db_cursor.executemany(
+        """
+        INSERT OR IGNORE INTO question_bank (
+            questionid, projectid, topic, quiz_type, sources_key, index_version,
+            question_hash, question_json, answer_json, explanation, created_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        rows,
+    )
+    added = db_conn.total_changes - before
+    db_conn.commit()
+    return added
+
+
+def sample_questions(
+    db_conn,
+    userid: str,
+    projectid: str,
+    topic: str,
+    quiz_type: str,
+    document_ids: list[str],
+    index_version: str,
+    count: int,
+    allow_repeats: bool = False,
+) -> list[tuple]:
+    """
+    Picks up to `count` random bank questions the user has not been served yet.
+    With allow_repeats, the rest is topped up with the questions they saw longest ago.
+    Rows are (questionid, question_json, answer_json, explanation).
+    """
+    bank_args = _bank_args(projectid, topic, quiz_type, document_ids, index_version)
+    rows = db_conn.execute(
+        f"""
+        SELECT b.questionid, b.question_json, b.answer_json, b.explanation
+        FROM question_bank b
+        LEFT JOIN question_bank_served s ON s.questionid=b.questionid AND s.userid=?
+        WHERE {_BANK_FILTER} AND s.questionid IS NULL
+        ORDER BY random()
+        LIMIT ?
+        """,
+        (userid, *bank_args, count),
+    ).fetchall()
+    if allow_repeats and len(rows) < count:
+        rows += db_conn.execute(
+            f"""
+            SELECT b.questionid, b.question_json, b.answer_json, b.explanation
+            FROM question_bank b
+            JOIN question_bank_served s ON s.questionid=b.questionid AND s.userid=?
+            WHERE {_BANK_FILTER}
+            ORDER BY s.served_at
+            LIMIT ?
+            """,
+            (userid, *bank_args, count - len(rows)),
+        ).fetchall()
+    return rows
+
+
+def bank_rows_for(
+    db_conn,
+    projectid: str,
+    topic: str,
+    quiz_type: str,
+    document_ids: list[str],
+    index_version: str,
+    questions: list[dict],
+) -> list[tuple]:
+    """
+    Bank rows of the given (normalized, already added) questions, in their order,
+    whether or not the user was served them. Rows as in sample_questions.
+    """
+    hashes = list(dict.fromkeys(_question_hash(q) for q in questions))
+    if not hashes:
+        return []
+    bank_args = _bank_args(projectid, topic, quiz_type, document_ids, index_version)
+    rows = db_conn.execute(
+        f"""
+        SELECT b.question_hash, b.questionid, b.question_json, b.answer_json, b.explanation
+        FROM question_bank b
+        WHERE {_BANK_FILTER} AND b.question_hash IN ({",".join("?" * len(hashes))})
+        """,
+        (*bank_args, *hashes),
+    ).fetchall()
+    by_hash = {row[0]: row[1:] for row in rows}
+    return [by_hash[h] for h in hashes if h in by_hash]
+
+
+def bank_question_texts(
+    db_conn,
+    projectid: str,
+    topic: str,
+    quiz_type: str,
+    document_ids: list[str],
+    index_version: str,
+    limit: int = 40,
+) -> list[str]:
+    """Questions already banked, so a refill can ask the model for different ones."""
+    bank_args = _bank_args(projectid, topic, quiz_type, document_ids, index_version)
+    rows = db_conn.execute(
+        f"""
+        SELECT b.question_json FROM question_bank b
+        WHERE {_BANK_FILTER}
+        ORDER BY b.created_at DESC
+        LIMIT ?
+        """,
+        (*bank_args, limit),
+    ).fetchall()
+    return [orjson.loads(row[0]).get("question", "") for row in rows]
+
+
+def mark_served(db_conn, userid: str, questionids: list[str], commit: bool = True):
+    now = time.time()
+    db_conn.executemany(
+        "INSERT OR REPLACE INTO question_bank_served (userid, questionid, served_at) VALUES (?, ?, ?)",
+        [(userid, questionid, now) for questionid in questionids],
+    )
+    if commit:
+        db_conn.commit()
+
+
+def assemble_quiz(rows: list[tuple]) -> tuple[list[dict], dict, dict]:
+    """Bank rows -> (questions, answer_key, explanations) with fresh q1..qN ids."""
+    questions = []
+    answer_key = {}
+    explanations = {}
+    for idx, (_, question_json, answer_json, explanation) in enumerate(rows):
+        qid = f"q{idx + 1}"
+        questions.append({"id": qid, **orjson.loads(question_json)})
+        answer_key[qid] = orjson.loads(answer_json)
+        explanations[qid] = explanation
+    return questions, answer_key, explanations
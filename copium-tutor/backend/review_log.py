@@ -0,0 +1,144 @@
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+
+# Reviews of cards whose previous interval was at least this long count
+# towards mature-card retention (the usual Anki cut-off).
+MATURE_INTERVAL_DAYS = 21.0
+
+
+@dataclass
+class ReviewEntry:
+    cardid: str
+    deckid: str
+    projectid: str
+    rating: str
+    prev_interval_days: float
+    next_interval_days: float
+    reviewed_at: datetime
+    prev_reviewed_at: datetime | None
+
+
+def log_reviews(db_cursor, userid: str, entries: list[ReviewEntry]):
+    """
+    Appends reviews to review_log and adds them to the per-day rollups, in the
+    caller's transaction (no commit). Days are UTC dates of reviewed_at.
+    """
+    if not entries:
+        return
+
+    db_cursor.executemany(
+        """
+        INSERT INTO review_log (
+            logid, userid, cardid, deckid, projectid, rating,
+            prev_interval_days, next_interval_days, elapsed_days, reviewed_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        [
+            (
+                uuid.uuid4().hex[:12],
+                userid,
+                e.cardid,
+                e.deckid,
+                e.projectid,
+                e.rating,
+                e.prev_interval_days,
+                e.next_interval_days,
+                (
+                    (e.reviewed_at - e.prev_reviewed_at).total_seconds() / 86400
+                    if e.prev_reviewed_at is not None
+                    else None
+                ),
+                e.reviewed_at.isoformat(),
+            )
+            for e in entries
+        ],
+    )
+
+    rollups: dict[tuple, list[int]] = {}
+    for e in entries:
+        key = (userid, e.deckid, e.projectid, e.reviewed_at.date().isoformat())
+        counts = rollups.setdefault(key, [0, 0, 0, 0, 0])
+        passed = e.rating != "again"
+        mature = e.prev_interval_days >= MATURE_INTERVAL_DAYS
+        counts[0] += 1
+        counts[1] += passed
+        counts[2] += mature
+        counts[3] += mature and passed
+        counts[4] += e.prev_reviewed_at is None
+    db_cursor.executemany(
+        """
+        INSERT INTO review_daily (
+            userid, deckid, projectid, day,
+            reviews, passes, mature_reviews, mature_passes, new_cards
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (userid, deckid, day) DO UPDATE SET
+            reviews = reviews + excluded.reviews,
+            passes = passes + excluded.passes,
+            mature_reviews = mature_reviews + excluded.mature_reviews,
+            mature_passes = mature_passes + excluded.mature_passes,
+            new_cards = new_cards + excluded.new_cards
+        """,
+        [(*key, *counts) for key, counts in rollups.items()],
+    )
+
+
+def _rate(part: int, whole: int) -> float | None:
+    return round(part / whole, 4) if whole else None
+
+
+def daily_stats(
+    db_cursor,
+    userid: str,
+    since_day: str,
+    projectid: str | None = None,
+    deckid: str | None = None,
+) -> dict:
+    """Per-day and total review counts, pass rate and mature retention, from the rollups only."""
+    where = "userid=? AND day>=?"
+    args = [userid, since_day]
+    if projectid:
+        where += " AND projectid=?"
+        args.append(projectid)
+    if deckid:
+        where += " AND deckid=?"
+        args.append(deckid)
+
+    db_cursor.execute(
+        f"""
+        SELECT day, SUM(reviews), SUM(passes), SUM(mature_reviews),
+               SUM(mature_passes), SUM(new_cards)
+        FROM review_daily
+        WHERE {where}
+        GROUP BY day
+        ORDER BY day
+        """,
+        args,
+    )
+    days = []
+    totals = [0, 0, 0, 0, 0]
+    for day, *counts in db_cursor.fetchall():
+        totals = [t + c for t, c in zip(totals, counts)]
+        reviews, passes, mature_reviews, mature_passes, new_cards = counts
+        days.append(
+            {
+                "day": day,
+                "reviews": reviews,
+                "new_cards": new_cards,
+                "pass_rate": _rate(passes, reviews),
+                "mature_reviews": mature_reviews,
+                "mature_retention": _rate(mature_passes, mature_reviews),
+            }
+        )
+
+    reviews, passes, mature_reviews, mature_passes, new_cards = totals
+    return {
+        "days": days,
+        "totals": {
+            "reviews": reviews,
+            "new_cards": new_cards,
+            "pass_rate": _rate(passes, reviews),
+            "mature_reviews": mature_reviews,
+            "mature_retention": _rate(mature_passes, mature_reviews),
+        },
+    }
@@ -0,0 +1,48 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from json_stream import TolerantJsonParser, parse_tolerant_json
+
+PROSE_THEN_FENCE = (
+    "Here are [10] cards:\n```json\n"
+    '{"cards": [{"front": "a", "back": "b"}, {"front": "c", "back": "d"}]}\n```'
+)
+
+
+def _stream(text, item_key, chunk=7):
+    parser = TolerantJsonParser(item_key=item_key)
+    items = []
+    for i in range(0, len(text), chunk):
+        items += parser.feed(text[i : i + chunk])
+    return items, parser.result()
+
+
+def test_bracket_in_prose_before_fenced_object():
+    assert parse_tolerant_json(PROSE_THEN_FENCE) == {
+        "cards": [{"front": "a", "back": "b"}, {"front": "c", "back": "d"}]
+    }
+
+
+def test_bracket_in_prose_before_object_when_streamed():
+    items, result = _stream(PROSE_THEN_FENCE, "cards")
+    assert items == [{"front": "a", "back": "b"}, {"front": "c", "back": "d"}]
+    assert result == {"cards": items}
+
+
+def test_bracket_in_prose_before_unfenced_object():
+    assert parse_tolerant_json('Pick [one] of these: {"questions": [1, 2]}') == {
+        "questions": [1, 2]
+    }
+
+
+def test_top_level_array_without_object():
+    assert parse_tolerant_json('Answers:\n[1, 2, 3]') == [1, 2, 3]
+    assert _stream('Answers:\n[1, 2, 3]', "questions")[1] == [1, 2, 3]
+
+
+def test_truncated_stream_drops_unfinished_item():
+    items, result = _stream('{"cards": [{"front": "a", "back": "b"}, {"front": "c', "cards")
+    assert items == [{"front": "a", "back": "b"}]
+    assert result == {"cards": [{"front": "a", "back": "b"}]}
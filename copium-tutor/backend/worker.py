@@ -0,0 +1,47 @@
+"""
+Standalone job worker: runs quiz generation (single and batched), flashcard deck
+generation and document indexing out of the API process. Start it next to the
+API (both share the SQLite database):
+
+    uvicorn main:app --port 8000
+    python -m worker
+
+Several workers may run at once; each claims jobs with a lease. The number of jobs
+one worker runs concurrently is GENERATION_CONCURRENCY (4).
+"""
+import signal
+import asyncio
+import logging
+
+import main
+from jobs import JobWorker
+from log_config import setup_logging
+from backboard_client import start_backboard_client, close_backboard_client
+
+logger = logging.getLogger(__name__)
+
+
+async def run_worker():
+    await start_backboard_client(main.BACKBOARD_API_KEY)
+    worker = JobWorker(main.JOB_HANDLERS)
+    task = asyncio.create_task(worker.run_forever())
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, task.cancel)
+        except NotImplementedError:  # Windows
+            pass
+
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    finally:
+        await close_backboard_client()
+        logger.info("Job worker %s stopped", worker.owner)
+
+
+if __name__ == "__main__":
+    setup_logging()
+    asyncio.run(run_worker())
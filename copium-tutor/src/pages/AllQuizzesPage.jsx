@@ -13,6 +13,7 @@ const QUIZ_TYPE_LABELS = {
 
 const STATUS_LABELS = {
   pending: "Generating",
+  generating: "Generating",
   ready: "Ready",
   failed: "Failed",
 };
@@ -164,28 +164,9 @@ export default function CourseChatPage() {
     bottomRef.current?.scrollIntoView({ behavior: "smooth" });
   }, [messages.length]);
 
-  // ---- typewriter helper (GPT-like gradual reveal)
-  async function typeOutAssistant(msgid, fullText) {
-    const text = fullText || "";
-    let i = 0;
-
-    // adaptive step: longer answers move faster per tick
-    const stepSize = Math.max(1, Math.floor(text.length / 420));
-    const delayMs = 12;
-
-    return new Promise((resolve) => {
-      function step() {
-        i = Math.min(text.length, i + stepSize);
-        const slice = text.slice(0, i);
-
-        setMessages((prev) => prev.map((m) => (m.msgid === msgid ? { ...m, content: slice } : m)));
-
-        if (i >= text.length) return resolve();
-        setTimeout(step, delayMs);
-      }
-      step();
-    });
-  }
+  // ---- stop a streaming reply when leaving the page (the server cancels upstream)
+  const streamAbortRef = useRef(null);
+  useEffect(() => () => streamAbortRef.current?.abort(), []);
 
   async function handleAsk(text) {
     const trimmed = (text || "").trim();
@@ -212,11 +193,26 @@ export default function CourseChatPage() {
       };
       setMessages((m) => [...m, tempAssistant]);
 
-      const resp = await ChatAPI.sendMessage(chatid, {
-        content: trimmed,
-        llm_provider: llmProvider,
-        model_name: modelName,
-      });
+      // stream the reply into the placeholder as it is generated
+      let streamed = "";
+      streamAbortRef.current = new AbortController();
+      const resp = await ChatAPI.streamMessage(
+        chatid,
+        {
+          content: trimmed,
+          llm_provider: llmProvider,
+          model_name: modelName,
+        },
+        {
+          onToken: (chunk) => {
+            streamed += chunk;
+            setMessages((prev) =>
+              prev.map((m) => (m.msgid === tempAssistantId ? { ...m, content: streamed } : m))
+            );
+          },
+          signal: streamAbortRef.current.signal,
+        }
+      );
 
       if (!resp?.success) {
         // replace thinking with error
@@ -230,21 +226,16 @@ export default function CourseChatPage() {
         return;
       }
 
-      // remove temps
-      setMessages((prev) => prev.filter((x) => x.msgid !== tempUser.msgid && x.msgid !== tempAssistantId));
-
+      // swap temps for the stored messages
       const userMsg = (resp.messages || []).find((m) => m.role === "user");
       const assistantMsg = (resp.messages || []).find((m) => m.role === "assistant");
-
-      // add real user
-      if (userMsg) setMessages((prev) => [...prev, userMsg]);
-
-      // add assistant placeholder then type out
-      if (assistantMsg) {
-        const full = assistantMsg.content || "";
-        setMessages((prev) => [...prev, { ...assistantMsg, content: "" }]);
-        await typeOutAssistant(assistantMsg.msgid, full);
-      }
+      setMessages((prev) =>
+        prev.map((m) => {
+          if (m.msgid === tempUser.msgid && userMsg) return userMsg;
+          if (m.msgid === tempAssistantId && assistantMsg) return assistantMsg;
+          return m;
+        })
+      );
 
       // NEW: sync auto-generated title from backend
       if (resp.chat_title) {
@@ -253,6 +244,7 @@ export default function CourseChatPage() {
 
       await refreshSidebar(projectid);
     } catch (e) {
+      if (e?.name === "AbortError") return;
       console.error("[CourseChatPage] handleAsk error:", e);
       setMessages((prev) => [
         ...prev,
@@ -250,7 +250,29 @@ export default function CoursePage() {
                     setIndexError(data.message || "Indexing failed");
                     return;
                 }
-                setIndexResult(data);
+
+                // indexing runs in the worker; poll the job until it finishes
+                let job = null;
+                while (!job || job.status === "queued" || job.status === "running") {
+                    await new Promise((r) => setTimeout(r, 1500));
+                    const jobRes = await fetch(`${API_URL}/jobs/${data.jobid}`, {
+                        credentials: "include",
+                    });
+                    const jobData = await jobRes.json();
+                    if (!jobData.success) {
+                        setIndexError(jobData.message || "Indexing failed");
+                        return;
+                    }
+                    job = jobData.job;
+                }
+
+                if (job.status === "failed" || !job.result?.success) {
+                    setIndexError(
+                        job.result?.message || job.last_error || "Indexing failed",
+                    );
+                    return;
+                }
+                setIndexResult(job.result);
             } catch (e) {
                 console.error("[CoursePage] indexDocuments error:", e);
                 setIndexError("Indexing failed (network/server error)");
@@ -256,8 +256,8 @@ export default function DeckPage() {
   }, [projectid]);
 
   // Fetch deck + cards
-  const fetchDeck = useCallback(async () => {
-    setLoading(true);
+  const fetchDeck = useCallback(async ({ silent = false } = {}) => {
+    if (!silent) setLoading(true);
     try {
       const res = await fetch(`${API_URL}/decks/${deckId}`, { credentials: "include" });
       const data = await res.json();
@@ -265,8 +265,10 @@ export default function DeckPage() {
       if (data.success) {
         setDeck(data.deck);
         setCards(data.cards || []);
-        setIndex(0);
-        setFlipped(false);
+        if (!silent) {
+          setIndex(0);
+          setFlipped(false);
+        }
       } else {
         setDeck(null);
         setCards([]);
@@ -285,6 +287,45 @@ export default function DeckPage() {
     fetchDeck();
   }, [fetchProjectsAndCourse, fetchDeck]);
 
+  // Cards are generated in the background; stream them in as they are saved
+  const deckGenerating = deck?.status === "pending" || deck?.status === "generating";
+  const [streamFailed, setStreamFailed] = useState(false);
+
+  useEffect(() => {
+    if (!deckGenerating || streamFailed) return;
+    const source = new EventSource(`${API_URL}/decks/${deckId}/events`, {
+      withCredentials: true,
+    });
+
+    source.addEventListener("card", (e) => {
+      const card = JSON.parse(e.data);
+      setCards((prev) =>
+        prev.some((c) => c.cardid === card.cardid) ? prev : [...prev, card]
+      );
+    });
+    source.addEventListener("status", (e) => {
+      const { status, generation_error } = JSON.parse(e.data);
+      setDeck((prev) => (prev ? { ...prev, status, generation_error } : prev));
+    });
+    source.addEventListener("done", () => {
+      source.close();
+      fetchDeck({ silent: true });
+    });
+    source.onerror = () => {
+      source.close();
+      setStreamFailed(true);
+    };
+
+    return () => source.close();
+  }, [deckGenerating, streamFailed, deckId, fetchDeck]);
+
+  // Fallback when the event stream is unavailable: poll until ready or failed
+  useEffect(() => {
+    if (!deckGenerating || !streamFailed) return;
+    const t = setTimeout(() => fetchDeck({ silent: true }), 2000);
+    return () => clearTimeout(t);
+  }, [deckGenerating, streamFailed, deck, fetchDeck]);
+
   const projectsList = useMemo(
     () => projects.map((p) => ({ name: p.name, href: `/project/${p.projectid}` })),
     [projects]
@@ -562,13 +603,22 @@ export default function DeckPage() {
                     <div className="mt-3 text-sm text-dark/60">
                       {course.name} · projectid: {projectid}
                     </div>
+                    {deckGenerating ? (
+                      <div className="mt-3 text-sm text-dark/70">
+                        Generating cards… ({cards.length} so far)
+                      </div>
+                    ) : deck.status === "failed" ? (
+                      <div className="mt-3 text-sm text-primary font-semibold">
+                        Generation failed: {deck.generation_error || "Unknown error"}
+                      </div>
+                    ) : null}
                   </div>
 
                   <div className="flex items-center gap-2">
                     <SoftButton onClick={() => setEditMode((v) => !v)} title="Toggle edit mode" disabled={saving}>
                       {editMode ? "Done editing" : "Edit cards"}
                     </SoftButton>
-                    <SoftButton onClick={fetchDeck} title="Refresh" disabled={saving}>
+                    <SoftButton onClick={() => fetchDeck()} title="Refresh" disabled={saving}>
                       Refresh
                     </SoftButton>
                   </div>
@@ -13,6 +13,7 @@ const QUIZ_TYPE_LABELS = {
 
 const QUIZ_STATUS_LABELS = {
   pending: "Generating",
+  generating: "Generating",
   ready: "Ready",
   failed: "Failed",
 };
@@ -102,8 +103,8 @@ export default function QuizPage() {
     }
   }, [projectid]);
 
-  const fetchQuiz = useCallback(async () => {
-    setLoading(true);
+  const fetchQuiz = useCallback(async ({ silent = false } = {}) => {
+    if (!silent) setLoading(true);
     try {
       const res = await fetch(`${API_URL}/quizzes/${quizId}`, {
         credentials: "include",
@@ -112,18 +113,23 @@ export default function QuizPage() {
       if (data.success) {
         setQuiz(data.quiz);
         setQuestions(data.questions || data.questions?.questions || []);
-        setAnswers({});
-        setResult(null);
-      } else {
+        // polling while questions arrive keeps what the user already answered
+        if (!silent) {
+          setAnswers({});
+          setResult(null);
+        }
+      } else if (!silent) {
         setQuiz(null);
         setQuestions([]);
       }
     } catch (e) {
       console.error(e);
-      setQuiz(null);
-      setQuestions([]);
+      if (!silent) {
+        setQuiz(null);
+        setQuestions([]);
+      }
     } finally {
-      setLoading(false);
+      if (!silent) setLoading(false);
     }
   }, [quizId]);
 
@@ -132,16 +138,43 @@ export default function QuizPage() {
     fetchQuiz();
   }, [fetchProjectsAndCourse, fetchQuiz]);
 
+  const quizGenerating = quiz?.status === "pending" || quiz?.status === "generating";
+
+  const [streamFailed, setStreamFailed] = useState(false);
+
+  // The server pushes status changes; refetch only when something changed
+  useEffect(() => {
+    if (!quizGenerating || streamFailed) return;
+    const source = new EventSource(`${API_URL}/quizzes/${quizId}/events`, {
+      withCredentials: true,
+    });
+
+    source.addEventListener("status", () => {
+      fetchQuiz({ silent: true });
+    });
+    source.addEventListener("done", () => {
+      source.close();
+    });
+    source.onerror = () => {
+      source.close();
+      setStreamFailed(true);
+    };
+
+    return () => source.close();
+  }, [quizGenerating, streamFailed, quizId, fetchQuiz]);
+
+  // Fallback when the event stream is unavailable: poll until ready or failed
   useEffect(() => {
-    if (!quiz || quiz.status !== "pending") return;
+    if (!quizGenerating || !streamFailed) return;
     const interval = setInterval(() => {
-      fetchQuiz();
-    }, 5000);
+      fetchQuiz({ silent: true });
+    }, 1500);
     return () => clearInterval(interval);
-  }, [quiz, fetchQuiz]);
+  }, [quizGenerating, streamFailed, fetchQuiz]);
 
   const total = questions.length;
   const quizReady = total > 0 && (quiz?.status === "ready" || !quiz?.status);
+  const quizPartial = total > 0 && quiz?.status === "generating";
 
   const updateAnswer = (qid, value) => {
     setAnswers((prev) => ({ ...prev, [qid]: value }));
@@ -221,7 +254,8 @@ export default function QuizPage() {
     }, 0);
   }, [answers, questions, quiz]);
   const loadingGif = `${API_URL}/public/cat.gif`;
-  const showGeneratingOverlay = !!quiz && !quizReady && quiz?.status !== "failed";
+  const showGeneratingOverlay =
+    !!quiz && !quizReady && !quizPartial && quiz?.status !== "failed";
 
   return (
     <div className="flex">
@@ -289,7 +323,7 @@ export default function QuizPage() {
                         tone={
                           quiz.status === "failed"
                             ? "danger"
-                            : quiz.status === "pending"
+                            : quizGenerating
                             ? "warm"
                             : "strong"
                         }
@@ -321,7 +355,7 @@ export default function QuizPage() {
                 </div>
               </div>
 
-              {!quizReady ? (
+              {!quizReady && !quizPartial ? (
                 <div className="mt-6 rounded-3xl border border-white/40 bg-white/60 backdrop-blur p-6 shadow-sm space-y-4">
                   {quiz?.status === "failed" ? (
                     <div className="text-primary font-semibold">
@@ -349,6 +383,12 @@ export default function QuizPage() {
                 </div>
               ) : (
                 <>
+                  {quizPartial ? (
+                    <div className="mt-6 rounded-2xl border border-accent/40 bg-accent/10 px-4 py-3 text-dark/80">
+                      Generating questions… {total} of {quiz.num_questions} ready. You can start answering.
+                    </div>
+                  ) : null}
+
                   <div className="mt-6 flex flex-wrap items-center gap-3">
                     <Badge label={`${total} questions`} title="Total questions" />
                     <Badge label={`${answeredCount} answered`} title="Answered" />
@@ -450,7 +490,7 @@ export default function QuizPage() {
                     <SoftButton
                       variant="primary"
                       onClick={submitQuiz}
-                      disabled={submitting || !!result}
+                      disabled={submitting || !!result || quizPartial}
                     >
                       {submitting ? "Submitting…" : "Submit quiz"}
                     </SoftButton>
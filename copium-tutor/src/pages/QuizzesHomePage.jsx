@@ -15,6 +15,7 @@ const QUIZ_TYPE_LABELS = {
 
 const QUIZ_STATUS_LABELS = {
   pending: "Generating",
+  generating: "Generating",
   ready: "Ready",
   failed: "Failed",
 };
@@ -655,7 +656,7 @@ export default function QuizzesHomePage() {
                                   tone={
                                     q.status === "failed"
                                       ? "danger"
-                                      : q.status === "pending"
+                                      : q.status === "pending" || q.status === "generating"
                                       ? "warm"
                                       : "strong"
                                   }
@@ -1,4 +1,28 @@
-import { apiFetch } from "./api";
+import { apiFetch, API_BASE } from "./api";
+
+// Reads "event: x / data: {...}" blocks from a server-sent events response body.
+async function readEvents(res, onEvent) {
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    let sep;
+    while ((sep = buffer.indexOf("\n\n")) >= 0) {
+      const block = buffer.slice(0, sep);
+      buffer = buffer.slice(sep + 2);
+      let event = "message";
+      let data = "";
+      for (const line of block.split("\n")) {
+        if (line.startsWith("event:")) event = line.slice(6).trim();
+        else if (line.startsWith("data:")) data += line.slice(5).trim();
+      }
+      if (data) onEvent(event, JSON.parse(data));
+    }
+  }
+}
 
 export const ChatAPI = {
   listChats: (projectid) => apiFetch(`/projects/${projectid}/chats`),
@@ -13,6 +37,29 @@ export const ChatAPI = {
       method: "POST",
       body: JSON.stringify(payload),
     }),
+  // Streams the reply: onToken(text) per chunk; resolves with the same payload as
+  // sendMessage once the reply is stored. Pass an AbortSignal to stop generation.
+  streamMessage: async (chatid, payload, { onToken, signal } = {}) => {
+    const res = await fetch(`${API_BASE}/chats/${chatid}/messages/stream`, {
+      method: "POST",
+      credentials: "include",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify(payload),
+      signal,
+    });
+    if (!res.ok) throw new Error(`Request failed (${res.status})`);
+    if (!(res.headers.get("content-type") || "").startsWith("text/event-stream")) {
+      return res.json(); // validation errors come back as plain JSON
+    }
+
+    let result = { success: false, message: "Stream ended early" };
+    await readEvents(res, (event, data) => {
+      if (event === "token") onToken?.(data.content || "");
+      else if (event === "done") result = data;
+      else if (event === "error") result = { success: false, ...data };
+    });
+    return result;
+  },
   renameChat: (chatid, title) =>
     apiFetch(`/chats/${chatid}`, {
       method: "PATCH",